@@ -3,6 +3,7 @@ import time
 import logging
 from database.models import init_db
 from scheduler import start_scheduler
+from config import DB_READ_STATS, METRICS_ENABLED, TRACING_ENABLED, TRAFFIC_CAPTURE_ENABLED, ADMIN_SECRET
 
 app = Flask(__name__)
 
@@ -30,6 +31,43 @@ if db_initialized:
     app.register_blueprint(user_bp)
     app.register_blueprint(reminder_bp)
 
+    # Profiles and memory introspection exist only when an admin secret is configured
+    if ADMIN_SECRET:
+        from routes.admin import admin_bp
+        app.register_blueprint(admin_bp)
+
+    # Decode the bearer token once per request into flask.g
+    from utils.auth_middleware import init_auth
+    init_auth(app)
+
+    # Drain welcome emails left in the outbox by a previous process
+    from functions.email_outbox import sender
+    sender.ensure_started()
+
+    if DB_READ_STATS:
+        from database.read_stats import init_read_stats
+        init_read_stats(app)
+
+    if METRICS_ENABLED:
+        from utils.metrics import init_metrics
+        init_metrics(app)
+
+    if TRACING_ENABLED:
+        from utils.tracing import init_tracing
+        init_tracing(app)
+
+    if TRAFFIC_CAPTURE_ENABLED:
+        from utils.traffic_capture import init_traffic_capture
+        init_traffic_capture(app)
+
+    # Periodic RSS/cache-size line in the logs of each worker
+    from utils.memory import rss_logger
+    rss_logger.ensure_started()
+
+    # X-Profile: 1 with the admin secret profiles a single request (PROFILING_ENABLED=1, staging)
+    from utils.profiler import init_profiler
+    init_profiler(app)
+
 
 @app.route('/api/hello', methods=['GET'])
 def hello():    
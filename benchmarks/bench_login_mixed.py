@@ -0,0 +1,87 @@
+"""
+Login burst vs chat latency: inline password hashing against the process pool.
+
+A steady "chat" loop (a few ms of pure-Python request work) runs while a burst of
+concurrent logins verifies passwords, first on the request threads and then through
+utils.passwords. Reports logins/sec and the chat loop's latency percentiles.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_login_mixed --logins 200 --threads 16
+"""
+import argparse
+import json
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cryptography.fernet import Fernet
+
+os.environ.setdefault("ENCRYPTION_KEY", Fernet.generate_key().decode())
+
+from werkzeug.security import check_password_hash, generate_password_hash
+from config import PASSWORD_HASH_METHOD
+from utils import passwords
+
+def chat_work():
+    """Stand-in for the CPU part of a chat request: build, split and serialize a reply."""
+    reply = " ||| ".join(f"chunk {i} of a reasonably sized reply" for i in range(40))
+    chunks = [part.strip() for part in reply.split("|||")]
+    return json.dumps({"role": "AI", "message": reply, "message_chunks": chunks})
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))] if ordered else 0.0
+
+def run_mode(label, verify, password_hash, logins, threads):
+    stop = threading.Event()
+    chat_latencies = []
+
+    def chat_loop():
+        while not stop.is_set():
+            started = time.perf_counter()
+            for _ in range(20):
+                chat_work()
+            chat_latencies.append((time.perf_counter() - started) * 1000)
+            time.sleep(0.005)
+
+    chat_thread = threading.Thread(target=chat_loop)
+    chat_thread.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(lambda _: verify(password_hash, "correct horse"), range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    chat_thread.join()
+
+    assert all(results)
+    print(
+        f"{label:>8}  {logins / elapsed:8.1f} logins/s  "
+        f"chat p50 {statistics.median(chat_latencies):7.1f} ms  "
+        f"p95 {percentile(chat_latencies, 0.95):7.1f} ms  p99 {percentile(chat_latencies, 0.99):7.1f} ms"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark logins/sec against chat latency")
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+
+    password_hash = generate_password_hash("correct horse", PASSWORD_HASH_METHOD)
+    print(f"method {PASSWORD_HASH_METHOD}, pool workers {passwords.PASSWORD_HASH_WORKERS}")
+
+    baseline = []
+    for _ in range(50):
+        started = time.perf_counter()
+        for _ in range(20):
+            chat_work()
+        baseline.append((time.perf_counter() - started) * 1000)
+    print(f"{'idle':>8}  chat p50 {statistics.median(baseline):7.1f} ms")
+
+    run_mode("inline", check_password_hash, password_hash, args.logins, args.threads)
+    passwords.verify_password(password_hash, "warm-up")
+    run_mode("pool", passwords.verify_password, password_hash, args.logins, args.threads)
+
+if __name__ == "__main__":
+    main()
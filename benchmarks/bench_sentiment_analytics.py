@@ -0,0 +1,59 @@
+"""
+Benchmark for functions/sentiment_analytics.compute_analytics over synthetic multi-year series.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_sentiment_analytics
+    python -m benchmarks.bench_sentiment_analytics --years 1 5 10 --repeat 20
+"""
+import argparse
+import statistics
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from functions.sentiment_analytics import compute_analytics
+
+def synthetic_sentiments(years, seed=42, gap_ratio=0.15):
+    """Daily sentiment entries with a slow drift, weekly rhythm, noise, level shifts and missing days."""
+    rng = np.random.default_rng(seed)
+    n = int(years * 365)
+    t = np.arange(n)
+    scores = 70 + 8 * np.sin(2 * np.pi * t / 7) + np.cumsum(rng.normal(0, 0.4, n)) + rng.normal(0, 4, n)
+    for start in rng.choice(n, size=max(1, n // 180), replace=False):
+        scores[start:] += rng.choice([-12, 12])
+    scores = np.clip(scores, 0, 100)
+    keep = rng.random(n) > gap_ratio
+
+    start_day = date.today() - timedelta(days=n)
+    states = ["Anxiety", "Burnout", "Happy", "Content", "None"]
+    return [
+        {
+            "date": (start_day + timedelta(days=int(i))).isoformat(),
+            "mental_score": float(scores[i]),
+            "emotional_state": states[i % len(states)]
+        }
+        for i in t[keep]
+    ]
+
+def run(years_list, repeat):
+    print(f"{'years':>6} {'days':>7} {'median ms':>10} {'p95 ms':>8} {'days/ms':>9}")
+    for years in years_list:
+        sentiments = synthetic_sentiments(years)
+        compute_analytics(sentiments)  # warm-up
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            compute_analytics(sentiments)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        median = statistics.median(timings)
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        print(f"{years:>6} {len(sentiments):>7} {median:>10.2f} {p95:>8.2f} {len(sentiments) / median:>9.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark vectorized sentiment analytics")
+    parser.add_argument("--years", type=float, nargs="+", default=[1, 3, 5, 10])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    run(args.years, args.repeat)
@@ -0,0 +1,167 @@
+"""
+Boot the real Flask app offline and seed it with synthetic users.
+
+The app is imported as-is; only its Mongo handle is swapped for mongomock (or
+pointed at a local mongod via --mongo-uri) and the model providers for the
+fakes. Everything that writes to disk (LLM cache, traces, profiles) goes to a
+temporary directory.
+"""
+import os
+import random
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+
+from cryptography.fernet import Fernet
+
+def configure_environment(mongo_uri=None, llm_cache=False, recordings=None):
+    """Environment for config.py; must run before anything imports config."""
+    workdir = tempfile.mkdtemp(prefix="aira-loadtest-")
+    os.environ.setdefault("ENCRYPTION_KEY", Fernet.generate_key().decode())
+    os.environ.setdefault("JWT_SECRET_KEY", "loadtest-jwt-secret-0123456789abcdef")
+    os.environ["MONGO_CONNECTION_STRING"] = mongo_uri or "mongodb://localhost:27017/aira_loadtest"
+    os.environ["LLM_CACHE_ENABLED"] = "1" if llm_cache else "0"
+    os.environ["LLM_CACHE_PATH"] = os.path.join(workdir, "llm_cache.sqlite3")
+    os.environ["TRACE_FILE"] = os.path.join(workdir, "traces.ndjson")
+    os.environ["PROFILE_DIR"] = os.path.join(workdir, "profiles")
+    if recordings:
+        os.environ["LLM_RECORDINGS_PATH"] = os.path.abspath(recordings)
+    os.environ.setdefault("MEMORY_LOG_SECONDS", "0")
+    os.environ.setdefault("LLM_RATE_LIMIT_PER_MIN", "0")
+    return workdir
+
+class _MongomockHandle:
+    """Just enough of flask_pymongo.PyMongo for database.models.init_db."""
+
+    def __init__(self):
+        import mongomock
+        self.db = mongomock.MongoClient().aira_loadtest
+
+    def init_app(self, app, **kwargs):
+        pass
+
+def boot_app(mongo_uri=None, chat_latency_ms=300, large_latency_ms=1500, embed_latency_ms=10, llm_cache=False,
+             recordings=None):
+    """Import app.py against the chosen Mongo and install the fake models. Returns the Flask app.
+
+    With `recordings` (a file written by LLM_PROVIDER=record) chat calls replay
+    the recorded responses and latencies instead of the fake chat model.
+    """
+    configure_environment(mongo_uri, llm_cache, recordings)
+    from database import models
+    if mongo_uri is None:
+        models.mongo = _MongomockHandle()
+    import app as app_module
+    if not app_module.db_initialized:
+        raise RuntimeError("Database initialization failed; see the log above")
+
+    from benchmarks.loadtest.fakes import install_fakes
+    install_fakes(chat_latency_ms, large_latency_ms, embed_latency_ms, "replay" if recordings else "fake")
+    if mongo_uri is None:
+        # mongomock cannot apply the scorer's positional $push/$inc; needs a real mongod
+        import routes.chat
+        routes.chat.schedule_message_scoring = lambda user_id, message: None
+        print("⚠️ mongomock: background sentiment scoring is skipped (use --mongo-uri to include it)")
+    return app_module.app
+
+# --- seed data -------------------------------------------------------------------
+
+NAMES = ["Asha", "Ravi", "Meera", "Kabir", "Isha", "Arjun", "Nila", "Dev"]
+GOALS = ["Sleep by 11", "Walk daily", "Journal each evening", "Call family weekly", "Read 20 pages"]
+USER_LINES = [
+    "Work was stressful today and I couldn't focus.",
+    "I went for a walk and felt a bit better.",
+    "I'm worried about my exams next week.",
+    "Had a nice dinner with friends.",
+    "I feel tired all the time lately.",
+    "Managed to finish my project, feeling proud.",
+]
+
+def _message(role, content, created_at):
+    message = {"role": role, "content": content, "created_at": created_at.strftime("%Y-%m-%d %H:%M:%S")}
+    if role == "User":
+        message["message_id"] = str(uuid.uuid4())
+        message["key_data_flag"] = 0
+    else:
+        message["response_id"] = str(uuid.uuid4())
+        message["message_chunks"] = [content]
+    return message
+
+def _conversation(rng, day, turns):
+    messages = []
+    for turn in range(turns):
+        at = day + timedelta(minutes=5 * turn)
+        messages.append(_message("User", rng.choice(USER_LINES), at))
+        messages.append(_message("AI", "Thanks for sharing that with me.", at + timedelta(seconds=20)))
+    return messages
+
+def seed_users(count, journal_days=30, chat_turns=10, reminders=3, seed=7):
+    """Insert `count` users with assessments, goals, chat, journals, sentiments and reminders. Returns [(user_id, token)]."""
+    from bson import ObjectId
+    from database import models
+    from functions.auth_functions import generate_token
+    from functions.reminder_functions import new_reminder_doc
+    from functions.sentiment_functions import refresh_sentiment_stats
+
+    rng = random.Random(seed)
+    today = datetime.utcnow().replace(hour=9, minute=0, second=0, microsecond=0)
+    users = []
+    for index in range(count):
+        user_id = ObjectId()
+        key = str(user_id)
+        name = f"{rng.choice(NAMES)} {index}"
+        models.users_collection.insert_one({
+            "_id": user_id, "username": name, "email": f"loadtest{index}@example.com",
+            "password": "not-a-real-hash", "created_at": today.isoformat(), "streak": rng.randint(0, 30)
+        })
+        session_id = str(uuid.uuid4())
+        models.sessions_collection.insert_one({
+            "user_id": key, "session_id": session_id, "login_time": today,
+            "expires_at": today + timedelta(days=7), "active": True
+        })
+        users.append((key, generate_token(key, session_id, timedelta(days=7))))
+
+        models.brain_collection.insert_one({
+            "user_id": key,
+            "assessments": [{
+                "demographics": {"name": name, "age": str(rng.randint(18, 60)), "gender": "prefer not to say",
+                                 "occupation": "student", "education": "graduate", "hobbies": "music"},
+                "assessment": {"answers": [], "score": rng.randint(5, 30), "mental_state": "Moderate"},
+                "timestamp": today - timedelta(days=journal_days)
+            }],
+            "goals": [
+                {"goal_id": str(uuid.uuid4()), "timestamp": today, "data": goal, "value": 0}
+                for goal in rng.sample(GOALS, 3)
+            ]
+        })
+        models.chat_collection.insert_one({
+            "user_id": key, "messages": _conversation(rng, today, chat_turns),
+            "typing_flag": 0, "journal_start_flag": 1, "journal_end_flag": 0
+        })
+
+        days = [today - timedelta(days=offset) for offset in range(journal_days, 0, -1)]
+        models.journal_collection.insert_one({
+            "user_id": key,
+            "journals": [
+                {"date": day.date().isoformat(), "title": f"Journal - {day.date().isoformat()}",
+                 "messages": _conversation(rng, day, 4), "exported_at": day.isoformat()}
+                for day in days
+            ]
+        })
+        models.sentiment_collection.insert_one({
+            "user_id": key,
+            "sentiments": [
+                {"date": day.date().isoformat(), "mental_score": rng.randint(40, 95),
+                 "emotional_state": rng.choice(["Happy", "Content", "Anxiety", "Stress"]),
+                 "reflection_text": "", "supporting_text": "", "suggestions": [], "message_count": 4}
+                for day in days
+            ]
+        })
+        refresh_sentiment_stats(key)
+
+        for number in range(reminders):
+            at = today + timedelta(hours=6 + 12 * number)
+            models.reminder_collection.insert_one(
+                new_reminder_doc(key, f"Reminder {number}", at.strftime("%Y-%m-%d %H:%M:%S"))
+            )
+    return users
@@ -0,0 +1,146 @@
+"""
+Deterministic stand-ins for Groq and the HuggingFace/FAISS retrieval stack.
+
+Replies and vectors are derived from a hash of the input, so two runs with the
+same seed data produce the same traffic. Latency is configurable per model to
+mimic the real providers (e.g. ~300 ms for the 8B chat model, ~1.5 s for 70B).
+They plug in through utils.providers as the "fake" chat and embedding providers.
+"""
+import hashlib
+import json
+import time
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+EMBEDDING_DIM = 384
+
+SENTENCES = [
+    "That sounds like a lot to carry.",
+    "It makes sense that you feel this way.",
+    "Small steps still count.",
+    "Take a breath; there is no rush.",
+    "You handled today better than you think.",
+    "What helped you the last time this happened?",
+    "Rest is part of the work, not a break from it.",
+    "I'm here whenever you want to talk it through.",
+]
+STATES = ["Happy", "Content", "Anxiety", "Stress", "Burnout", "None"]
+
+THERAPIST_REPLIES = [
+    "It sounds like work has been overwhelming lately. Let's look at what is in your control.",
+    "Feeling lonely after a move is very common. Building routines can help.",
+    "Sleep troubles often follow stress. A wind-down ritual may help.",
+    "Arguments with people we love hurt. What would you want them to understand?",
+    "Exam pressure can feel endless. Breaking study into short blocks helps.",
+    "Grief comes in waves. There is no right way to feel it.",
+    "Celebrating small wins builds momentum.",
+    "Setting boundaries is a form of self-respect.",
+]
+
+def _digest(text):
+    return int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:16], 16)
+
+def fake_reply(prompt, as_json=False):
+    """Deterministic reply for a prompt; a sentiment-shaped JSON object when as_json."""
+    h = _digest(prompt)
+    if as_json:
+        return json.dumps({
+            "mental_score": 40 + h % 60,
+            "emotional_state": STATES[h % len(STATES)],
+            "reflection_text": SENTENCES[h % len(SENTENCES)],
+            "supporting_text": SENTENCES[(h >> 4) % len(SENTENCES)],
+            "suggestions": [SENTENCES[(h >> 8) % len(SENTENCES)]]
+        })
+    count = 2 + h % 3
+    return " ||| ".join(SENTENCES[(h >> (4 * i)) % len(SENTENCES)] for i in range(count))
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that sleeps `latency_ms` and answers from fake_reply()."""
+
+    model_name: str = "fake-chat"
+    latency_ms: float = 0.0
+
+    @property
+    def _llm_type(self):
+        return "fake-chat"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        prompt = "\n".join(str(message.content) for message in messages)
+        as_json = "response_format" in kwargs or "json" in prompt.lower()
+        text = fake_reply(prompt, as_json)
+        usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(text) // 4}
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=text))],
+            llm_output={"token_usage": usage, "model_name": self.model_name}
+        )
+
+class FakeEmbeddings(Embeddings):
+    """Unit vectors seeded by the text's hash, EMBEDDING_DIM wide like all-MiniLM-L6-v2."""
+
+    def __init__(self, latency_ms=0.0, dim=EMBEDDING_DIM):
+        self.latency_ms = latency_ms
+        self.dim = dim
+
+    def _vector(self, text):
+        vector = np.random.default_rng(_digest(text)).standard_normal(self.dim)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return self._vector(text)
+
+class VectorRetriever:
+    """Brute-force cosine top-k, used when faiss is not installed."""
+
+    def __init__(self, embeddings, texts, k=2):
+        self.embeddings = embeddings
+        self.texts = texts
+        self.matrix = np.array(embeddings.embed_documents(texts))
+        self.k = k
+
+    def invoke(self, query, config=None, **kwargs):
+        scores = self.matrix @ np.array(self.embeddings.embed_query(query))
+        return [Document(page_content=self.texts[i]) for i in np.argsort(-scores)[:self.k]]
+
+def build_retriever(embeddings, k=2):
+    """An in-memory FAISS index over THERAPIST_REPLIES, or VectorRetriever without faiss."""
+    try:
+        from langchain_community.vectorstores import FAISS
+        store = FAISS.from_texts(THERAPIST_REPLIES, embeddings)
+        return store.as_retriever(search_type="similarity", search_kwargs={"k": k})
+    except ImportError:
+        return VectorRetriever(embeddings, THERAPIST_REPLIES, k)
+
+def install_fakes(chat_latency_ms=300, large_latency_ms=1500, embed_latency_ms=10, chat_provider="fake"):
+    """Register the fakes as the "fake" providers and select them; chat_provider="replay" serves recordings instead."""
+    from utils import model_utils, providers
+
+    latencies = {providers.CHAT_MODEL: chat_latency_ms, providers.LARGE_CHAT_MODEL: large_latency_ms}
+
+    @providers.register_chat_provider("fake")
+    def build_fake_chat(model_name, callbacks):
+        return FakeChatModel(model_name=model_name, latency_ms=latencies.get(model_name, chat_latency_ms), callbacks=callbacks)
+
+    @providers.register_embedding_provider("fake")
+    def build_fake_embeddings(model_name):
+        return FakeEmbeddings(embed_latency_ms)
+
+    providers.use_providers(chat=chat_provider, embeddings="fake")
+    embeddings = model_utils.TimedEmbeddings(providers.get_embeddings())
+    model_utils.model = None
+    model_utils.embedding_model = embeddings
+    model_utils.retriever = build_retriever(embeddings)
+    return embeddings
@@ -0,0 +1,152 @@
+"""
+Offline load test: the real app, mongomock (or a local mongod) and fake models.
+
+Simulated users each run in their own thread with their own test client, pick
+actions from scenarios.ACTIONS by weight and pause for a think time between
+them. Reports per-endpoint p50/p95/p99 latency, error count and throughput.
+
+Needs the bench extras on top of the app's requirements (mongomock, pytest):
+    pip install -r requirements-dev.txt
+
+Usage (from the repo root):
+    python -m benchmarks.loadtest.run --users 50 --duration 30
+    python -m benchmarks.loadtest.run --users 20 --requests 2000 --chat-latency-ms 0 --think-ms 0
+    python -m benchmarks.loadtest.run --mongo-uri mongodb://localhost:27017/aira_loadtest --json report.json
+    python -m benchmarks.loadtest.run --recordings cache/llm_recordings.sqlite3
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+from collections import defaultdict
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))] if ordered else 0.0
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def record(self, name, ms, ok):
+        with self.lock:
+            self.latencies[name].append(ms)
+            if not ok:
+                self.errors[name] += 1
+
+    def report(self, elapsed):
+        rows = {}
+        for name in sorted(self.latencies):
+            values = self.latencies[name]
+            rows[name] = {
+                "requests": len(values),
+                "errors": self.errors[name],
+                "rps": round(len(values) / elapsed, 2),
+                "p50_ms": round(statistics.median(values), 2),
+                "p95_ms": round(percentile(values, 0.95), 2),
+                "p99_ms": round(percentile(values, 0.99), 2),
+                "max_ms": round(max(values), 2)
+            }
+        total = sum(len(v) for v in self.latencies.values())
+        return {"elapsed_seconds": round(elapsed, 2), "requests": total, "rps": round(total / elapsed, 2), "endpoints": rows}
+
+def run_user(app, user, recorder, deadline, budget, think_ms, only):
+    from benchmarks.loadtest.scenarios import pick_action
+    client = app.test_client()
+    while time.perf_counter() < deadline and budget.take():
+        name, action = pick_action(user.rng, only)
+        started = time.perf_counter()
+        try:
+            response = action(client, user)
+            ok = response.status_code < 400
+        except Exception as e:
+            print(f"❌ {name} raised {e}")
+            ok = False
+        recorder.record(name, (time.perf_counter() - started) * 1000, ok)
+        if think_ms:
+            time.sleep(user.rng.uniform(0.5, 1.5) * think_ms / 1000)
+
+class Budget:
+    """Shared request budget across users; None means unlimited."""
+
+    def __init__(self, total):
+        self.remaining = total
+        self.lock = threading.Lock()
+
+    def take(self):
+        if self.remaining is None:
+            return True
+        with self.lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+def print_report(report):
+    width = max([22] + [len(name) for name in report["endpoints"]])
+    print(f"\n{'endpoint':<{width}} {'reqs':>6} {'err':>4} {'rps':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, row in report["endpoints"].items():
+        print(
+            f"{name:<{width}} {row['requests']:>6} {row['errors']:>4} {row['rps']:>7.2f} "
+            f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['max_ms']:>8.1f}"
+        )
+    print(f"\n{report['requests']} requests in {report['elapsed_seconds']} s = {report['rps']} req/s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test against fake models and a local Mongo")
+    parser.add_argument("--users", type=int, default=20, help="simulated users (one thread each)")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to run")
+    parser.add_argument("--requests", type=int, default=None, help="stop after this many requests in total")
+    parser.add_argument("--think-ms", type=float, default=200, help="mean pause between a user's requests")
+    parser.add_argument("--chat-latency-ms", type=float, default=300, help="fake 8B chat model latency")
+    parser.add_argument("--large-latency-ms", type=float, default=1500, help="fake 70B model latency")
+    parser.add_argument("--embed-latency-ms", type=float, default=10, help="fake embedding latency")
+    parser.add_argument("--journal-days", type=int, default=30, help="seeded journal/sentiment days per user")
+    parser.add_argument("--mongo-uri", default=None, help="local mongod URI (default: mongomock)")
+    parser.add_argument("--llm-cache", action="store_true", help="enable the SQLite LLM cache")
+    parser.add_argument("--recordings", help="replay chat responses recorded with LLM_PROVIDER=record")
+    parser.add_argument("--only", nargs="*", help="restrict to these scenario names")
+    parser.add_argument("--json", dest="json_path", help="also write the report here")
+    args = parser.parse_args()
+
+    from benchmarks.loadtest.environment import boot_app, seed_users
+    app = boot_app(
+        args.mongo_uri, args.chat_latency_ms, args.large_latency_ms, args.embed_latency_ms, args.llm_cache, args.recordings
+    )
+
+    from benchmarks.loadtest.scenarios import SimulatedUser
+    started = time.perf_counter()
+    users = [SimulatedUser(user_id, token, seed) for seed, (user_id, token) in enumerate(seed_users(args.users, args.journal_days))]
+    print(f"🌱 Seeded {len(users)} users in {time.perf_counter() - started:.1f} s")
+
+    recorder = Recorder()
+    budget = Budget(args.requests)
+    started = time.perf_counter()
+    deadline = started + args.duration
+    threads = [
+        threading.Thread(target=run_user, args=(app, user, recorder, deadline, budget, args.think_ms, args.only))
+        for user in users
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    report = recorder.report(time.perf_counter() - started)
+    report["settings"] = vars(args)
+    if args.recordings:
+        from utils.llm_recordings import get_replay_stats
+        report["replay"] = get_replay_stats()
+
+    print_report(report)
+    for site, levels in report.get("replay", {}).items():
+        print(f"🔁 replay {site}: " + ", ".join(f"{level}={count}" for level, count in sorted(levels.items())))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"📝 Report written to {args.json_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+The traffic mix: what a simulated user does, weighted by how often the app does it.
+
+Each action takes a Flask test client and a simulated user and returns the
+response. Weights roughly follow a session: mostly chat turns, with the app
+polling messages and typing state, and occasional dashboard, journal,
+sentiment and reminder screens.
+"""
+import random
+from datetime import datetime, timedelta
+
+CHAT_LINES = [
+    "I had a rough day at work.",
+    "Feeling a little better after talking to a friend.",
+    "Can't sleep again, my mind keeps racing.",
+    "I finished my assignment today!",
+    "Not sure why, but I feel low.",
+    "Went to the gym, feeling good.",
+]
+
+class SimulatedUser:
+    def __init__(self, user_id, token, seed):
+        self.user_id = user_id
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.rng = random.Random(seed)
+
+def chat_send(client, user):
+    return client.post("/api/chat/send", json={"message": user.rng.choice(CHAT_LINES)}, headers=user.headers)
+
+def get_messages(client, user):
+    return client.get("/api/chat/get_messages", headers=user.headers)
+
+def check_typing_flag(client, user):
+    return client.get("/api/chat/check_typing_flag", headers=user.headers)
+
+def get_journals(client, user):
+    return client.get("/api/chat/get_journals", headers=user.headers)
+
+def get_sentiments(client, user):
+    return client.get("/api/sentiment/get_sentiments?days=30", headers=user.headers)
+
+def sentiment_summary(client, user):
+    return client.get("/api/sentiment/summary?days=30", headers=user.headers)
+
+def sentiment_analytics(client, user):
+    return client.get("/api/sentiment/analytics?days=90", headers=user.headers)
+
+def get_reminders(client, user):
+    return client.get(f"/api/reminder/get_all_reminders?user_id={user.user_id}", headers=user.headers)
+
+def add_reminder(client, user):
+    at = datetime.utcnow() + timedelta(hours=user.rng.randint(1, 72))
+    return client.post("/api/reminder/add_reminder", json={
+        "user_id": user.user_id, "title": "Stretch", "scheduled_time": at.strftime("%Y-%m-%d %H:%M:%S")
+    }, headers=user.headers)
+
+def dashboard(client, user):
+    return client.get("/api/user/dashboard", headers=user.headers)
+
+def generate_story(client, user):
+    return client.get(f"/api/user/generate_story?user_id={user.user_id}", headers=user.headers)
+
+def send_motivation(client, user):
+    return client.get(f"/api/user/send_motivation?user_id={user.user_id}", headers=user.headers)
+
+def get_goals(client, user):
+    return client.get(f"/api/visionboard/get_goals?user_id={user.user_id}", headers=user.headers)
+
+ACTIONS = {
+    "chat_send": (chat_send, 30),
+    "get_messages": (get_messages, 15),
+    "check_typing_flag": (check_typing_flag, 10),
+    "get_journals": (get_journals, 6),
+    "get_sentiments": (get_sentiments, 6),
+    "sentiment_summary": (sentiment_summary, 4),
+    "sentiment_analytics": (sentiment_analytics, 2),
+    "get_reminders": (get_reminders, 6),
+    "add_reminder": (add_reminder, 2),
+    "dashboard": (dashboard, 8),
+    "generate_story": (generate_story, 3),
+    "send_motivation": (send_motivation, 3),
+    "get_goals": (get_goals, 5),
+}
+
+def pick_action(rng, only=None):
+    names = [name for name in ACTIONS if not only or name in only]
+    weights = [ACTIONS[name][1] for name in names]
+    name = rng.choices(names, weights)[0]
+    return name, ACTIONS[name][0]
@@ -0,0 +1,39 @@
+"""Per-request chat helpers: the first-message-today scan and `|||` chunk splitting."""
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+chat_functions = pytest.importorskip("functions.chat_functions")
+
+def chat_messages(size, seed=1):
+    """Alternating User/AI messages spread over the days before today, so the scan reads all of them."""
+    rng = random.Random(seed)
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    start = today - timedelta(minutes=size * 30 + 60)
+    messages = []
+    for i in range(size):
+        at = start + timedelta(minutes=i * 30 + rng.randint(0, 5))
+        messages.append({
+            "role": "User" if i % 2 == 0 else "AI",
+            "content": f"message {i}",
+            "created_at": at.strftime("%Y-%m-%d %H:%M:%S")
+        })
+    return messages
+
+def reply_with_chunks(size, seed=2):
+    rng = random.Random(seed)
+    words = ["that", "sounds", "hard", "and", "it", "makes", "sense", "you", "feel", "tired", "today"]
+    return " ||| ".join(" ".join(rng.choices(words, k=rng.randint(4, 16))) for _ in range(size))
+
+def test_is_first_user_message_today(benchmark, size):
+    messages = chat_messages(size)
+    assert benchmark(chat_functions.is_first_user_message_today, messages) is True
+
+def test_split_message_chunks(benchmark, size):
+    reply = reply_with_chunks(size)
+    assert len(benchmark(chat_functions.split_message_chunks, reply)) == size
+
+def test_split_message_chunks_drop_empty(benchmark, size):
+    reply = reply_with_chunks(size) + " |||  ||| "
+    assert len(benchmark(chat_functions.split_message_chunks, reply, drop_empty=True)) == size
@@ -0,0 +1,32 @@
+"""Reminder timezone conversion, run for every reminder listed or scheduled."""
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+reminder_functions = pytest.importorskip("functions.reminder_functions")
+
+def timestamps(size, seed=6):
+    """A mix of what the app sends: "%Y-%m-%d %H:%M:%S", ISO with Z, and naive datetimes."""
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    values = []
+    for i in range(size):
+        at = start + timedelta(minutes=rng.randint(0, 525_600))
+        style = i % 3
+        if style == 0:
+            values.append(at.strftime(reminder_functions.TIME_FORMAT))
+        elif style == 1:
+            values.append(at.strftime("%Y-%m-%dT%H:%M:%SZ"))
+        else:
+            values.append(at)
+    return values
+
+def convert_all(convert, values):
+    return [convert(value) for value in values]
+
+@pytest.mark.parametrize("direction", ["to_ist", "to_utc"])
+def test_timezone_conversion(benchmark, size, direction):
+    values = timestamps(size)
+    converted = benchmark(convert_all, getattr(reminder_functions, direction), values)
+    assert len(converted) == size and all(converted)
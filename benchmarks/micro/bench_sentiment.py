@@ -0,0 +1,47 @@
+"""Sentiment helpers: the daily aggregation and the /summary trend."""
+import random
+from datetime import date, timedelta
+
+import pytest
+
+sentiment_functions = pytest.importorskip("functions.sentiment_functions")
+
+STATES = ["Anxiety", "Burnout", "Happy", "Content", "Loneliness", "None"]
+
+def message_analyses(size, seed=4):
+    rng = random.Random(seed)
+    return [
+        {
+            "mental_score": rng.randint(20, 95),
+            "emotional_state": rng.choice(STATES),
+            "reflection_text": "You seem to be carrying a lot right now.",
+            "supporting_text": "I feel tired",
+            "suggestions": [rng.choice(["Take a short walk", "Drink water", "Call a friend", "Rest early"])]
+        }
+        for _ in range(size)
+    ]
+
+def daily_sentiments(size, seed=5):
+    """`size` date-sorted days, as window_stats receives them from filter_recent."""
+    rng = random.Random(seed)
+    start = date.today() - timedelta(days=size)
+    return [
+        {
+            "date": (start + timedelta(days=i)).isoformat(),
+            "mental_score": rng.uniform(30, 95),
+            "emotional_state": rng.choice(STATES)
+        }
+        for i in range(size)
+    ]
+
+def test_aggregate_message_analyses(benchmark, size):
+    analyses = message_analyses(size)
+    entry = benchmark(sentiment_functions.aggregate_message_analyses, analyses, size)
+    assert entry["scored_count"] == size
+
+def summary(sentiments):
+    return sentiment_functions.summary_from_stats(sentiment_functions.window_stats(sentiments))
+
+def test_sentiment_summary_trend(benchmark, size):
+    sentiments = daily_sentiments(size)
+    assert benchmark(summary, sentiments)["total_days"] == size
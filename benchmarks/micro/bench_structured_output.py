@@ -0,0 +1,54 @@
+"""Model-output JSON parsing and local repair, run on every sentiment analysis reply."""
+import json
+import random
+
+import pytest
+
+structured_output = pytest.importorskip("utils.structured_output")
+
+STATES = ["Anxiety", "Burnout", "Happy", "Content", "Loneliness", "None"]
+REQUIRED_KEYS = ("mental_score", "emotional_state", "reflection_text", "suggestions")
+
+def payloads(size, seed=3):
+    rng = random.Random(seed)
+    return [
+        json.dumps({
+            "mental_score": rng.randint(20, 95),
+            "emotional_state": rng.choice(STATES),
+            "reflection_text": "You seem to be carrying a lot right now.",
+            "supporting_text": "I feel tired",
+            "suggestions": ["Take a short walk", "Write down one good thing"]
+        })
+        for _ in range(size)
+    ]
+
+def model_replies(size):
+    """Analysis replies the way the model returns them: fenced, prefixed with prose, sometimes bare."""
+    replies = []
+    for i, payload in enumerate(payloads(size)):
+        style = i % 3
+        if style == 0:
+            replies.append(f"```json\n{payload}\n```")
+        elif style == 1:
+            replies.append(f"Here is the analysis you asked for:\n{payload}\nLet me know if you need more.")
+        else:
+            replies.append(payload)
+    return replies
+
+def truncated_replies(size):
+    """Replies cut off mid-object, or with a trailing comma, as repair_json receives them."""
+    return [payload[:-len(payload) // 4] if i % 2 else payload[:-1] + ",}" for i, payload in enumerate(payloads(size))]
+
+def parse_all(replies):
+    return [structured_output.parse_json_output(reply, REQUIRED_KEYS)[0] for reply in replies]
+
+def repair_all(replies):
+    return [structured_output.repair_json(reply) for reply in replies]
+
+def test_parse_json_output(benchmark, size):
+    replies = model_replies(size)
+    assert all(benchmark(parse_all, replies))
+
+def test_repair_json(benchmark, size):
+    replies = truncated_replies(size)
+    assert all(json.loads(text) for text in benchmark(repair_all, replies))
@@ -0,0 +1,183 @@
+"""
+Microbenchmarks for hot pure functions, pytest-benchmark style.
+
+Usage (from the repo root):
+    python -m pytest benchmarks/micro                      # compare against baselines.json
+    python -m pytest benchmarks/micro --micro-save         # record new baselines
+    python -m pytest benchmarks/micro -k chunks --micro-sizes 10 1000
+    python -m pytest benchmarks/micro --micro-tolerance 0.5
+
+Tests take the `benchmark` fixture from pytest-benchmark when it is installed
+and a minimal stand-in with the same call style otherwise. Either way the
+median of each benchmark is compared with baselines.json and anything slower
+than baseline * (1 + tolerance) is reported as a regression and fails the
+run. Baselines are machine-specific; re-record them with --micro-save on the
+machine that runs the comparison.
+
+bench_*.py files are only collected when benchmarks/micro is named on the
+command line, so a plain `pytest` of the repo does not run them. config.py
+needs ENCRYPTION_KEY and JWT_SECRET_KEY; throwaway values are set here when the
+environment has none, before any bench module imports app code.
+"""
+import json
+import os
+import platform
+import statistics
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from cryptography.fernet import Fernet
+
+os.environ.setdefault("ENCRYPTION_KEY", Fernet.generate_key().decode())
+os.environ.setdefault("JWT_SECRET_KEY", "microbench-jwt-secret-0123456789abcdef")
+
+HERE = Path(__file__).resolve().parent
+BASELINES = HERE / "baselines.json"
+SIZES = (10, 1_000, 100_000)
+
+try:
+    import pytest_benchmark  # noqa: F401
+    HAVE_PYTEST_BENCHMARK = True
+except ImportError:
+    HAVE_PYTEST_BENCHMARK = False
+
+def pytest_addoption(parser):
+    group = parser.getgroup("micro", "microbenchmarks")
+    group.addoption("--micro-save", action="store_true", help="write medians to baselines.json")
+    group.addoption("--micro-tolerance", type=float, default=0.25, help="allowed slowdown before flagging (0.25 = 25%%)")
+    group.addoption("--micro-baselines", default=str(BASELINES), help="baselines file")
+    group.addoption("--micro-sizes", type=int, nargs="+", default=list(SIZES), help="input sizes to run")
+
+def _requested(config):
+    for arg in config.args:
+        path = Path(arg.split("::")[0]).resolve()
+        if path == HERE or HERE in path.parents:
+            return True
+    return False
+
+def pytest_collect_file(file_path, parent):
+    if file_path.name.startswith("bench_") and file_path.suffix == ".py" and _requested(parent.config):
+        return pytest.Module.from_parent(parent, path=file_path)
+
+def pytest_generate_tests(metafunc):
+    if "size" in metafunc.fixturenames:
+        metafunc.parametrize("size", metafunc.config.getoption("--micro-sizes"))
+
+class Benchmark:
+    """Stand-in for pytest-benchmark's fixture: `benchmark(fn, *args, **kwargs)` returns fn's result."""
+
+    def __init__(self, min_rounds=5, min_time=0.2, max_time=5.0, round_time=0.001):
+        self.min_rounds = min_rounds
+        self.min_time = min_time
+        self.max_time = max_time
+        self.round_time = round_time
+        self.times = []
+
+    def __call__(self, fn, *args, **kwargs):
+        started = time.perf_counter()
+        result = fn(*args, **kwargs)
+        first = time.perf_counter() - started
+        # Batch fast calls so each round is long enough for the clock
+        iterations = max(1, int(self.round_time / first)) if first else 1000
+        started = time.perf_counter()
+        while True:
+            round_started = time.perf_counter()
+            for _ in range(iterations):
+                result = fn(*args, **kwargs)
+            self.times.append((time.perf_counter() - round_started) / iterations)
+            elapsed = time.perf_counter() - started
+            if len(self.times) >= self.min_rounds and elapsed >= self.min_time or elapsed >= self.max_time:
+                return result
+
+    @property
+    def median(self):
+        return statistics.median(self.times) if self.times else None
+
+if not HAVE_PYTEST_BENCHMARK:
+    @pytest.fixture
+    def benchmark():
+        return Benchmark()
+
+def _median(benchmark):
+    if isinstance(benchmark, Benchmark):
+        return benchmark.median
+    stats = getattr(benchmark, "stats", None)
+    return stats.stats.median if stats else None
+
+def _key(node):
+    return f"{node.path.name}::{node.name}"
+
+@pytest.fixture(autouse=True)
+def _collect_median(request):
+    if "benchmark" not in request.fixturenames:
+        yield
+        return
+    # Held from setup: the benchmark fixture is torn down before this one
+    benchmark = request.getfixturevalue("benchmark")
+    yield
+    median = _median(benchmark)
+    if median is not None:
+        request.config._micro_results[_key(request.node)] = median
+
+def pytest_configure(config):
+    config._micro_results = {}
+    config._micro_rows = []
+
+def _environment():
+    return {"python": platform.python_version(), "machine": platform.machine(), "system": platform.system()}
+
+def pytest_sessionfinish(session, exitstatus):
+    config = session.config
+    results = config._micro_results
+    if not results:
+        return
+    path = Path(config.getoption("--micro-baselines"))
+    stored = json.loads(path.read_text()) if path.exists() else {"benchmarks": {}}
+    baselines = stored.get("benchmarks", {})
+    tolerance = config.getoption("--micro-tolerance")
+
+    for key in results:
+        baseline = baselines.get(key, {}).get("median_s")
+        ratio = results[key] / baseline if baseline else None
+        regressed = ratio is not None and ratio > 1 + tolerance
+        config._micro_rows.append((key, baseline, results[key], ratio, regressed))
+
+    if config.getoption("--micro-save"):
+        baselines.update({key: {"median_s": median} for key, median in results.items()})
+        stored = {"environment": _environment(), "saved_at": datetime.utcnow().isoformat(timespec="seconds"),
+                  "benchmarks": baselines}
+        path.write_text(json.dumps(stored, indent=2) + "\n")
+        config._micro_saved = path
+    elif any(row[4] for row in config._micro_rows):
+        session.exitstatus = pytest.ExitCode.TESTS_FAILED
+    config._micro_environment = stored.get("environment")
+
+def _format(seconds):
+    if seconds is None:
+        return "-"
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    rows = config._micro_rows
+    if not rows:
+        return
+    write = terminalreporter.write_line
+    terminalreporter.section("microbenchmarks (median per call)")
+    width = max(len(row[0]) for row in rows)
+    write(f"{'benchmark':<{width}} {'baseline':>11} {'current':>11} {'ratio':>7}")
+    for key, baseline, current, ratio, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        ratio_text = f"{ratio:.2f}x" if ratio is not None else "new"
+        write(f"{key:<{width}} {_format(baseline):>11} {_format(current):>11} {ratio_text:>7}{flag}", red=regressed)
+    environment = getattr(config, "_micro_environment", None)
+    if environment and environment != _environment():
+        write(f"⚠️ Baselines were recorded on {environment}; this is {_environment()}")
+    if getattr(config, "_micro_saved", None):
+        write(f"📝 Baselines written to {config._micro_saved}")
+    elif any(row[4] for row in rows):
+        write(f"❌ {sum(row[4] for row in rows)} benchmark(s) regressed beyond {config.getoption('--micro-tolerance'):.0%}")
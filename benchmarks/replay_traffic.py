@@ -0,0 +1,315 @@
+"""
+Replay captured traffic (utils/traffic_capture.py) against a staging instance.
+
+Requests are fired at their recorded offsets divided by --speed, so 10x keeps
+the shape of the day (night chat bursts, morning dashboards, scheduler
+end_journal sweeps) while compressing it tenfold. Each recorded user bucket is
+mapped onto one of the staging users from --tokens; bodies are synthesized
+from the recorded field names, types and sizes. Reports per-route latency
+next to the latency recorded in production, plus how far the replay fell
+behind schedule (lag) and the peak number of requests in flight.
+
+Each worker process writes its own capture file; pass them all, or a glob
+(quoted so the shell leaves it alone), and they are merged by arrival time.
+
+Usage (from the repo root):
+    python -m benchmarks.replay_traffic 'cache/traffic.*.ndjson' --shape
+    python -m benchmarks.replay_traffic 'cache/traffic.*.ndjson' --base-url https://staging.example.com \\
+        --tokens staging_tokens.json --speed 10
+    python -m benchmarks.replay_traffic cache/traffic.311.ndjson cache/traffic.312.ndjson --offline --users 50 --speed 100
+
+--tokens is a JSON list of {"user_id": ..., "token": ...} for existing staging
+users. --offline replays against the app in-process with mongomock, fake
+models and seeded users (see benchmarks/loadtest).
+"""
+import argparse
+import glob
+import json
+import statistics
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from benchmarks.loadtest.run import Recorder, percentile, print_report
+
+DEFAULT_SKIP = ["/api/auth/", "/api/admin/"]
+IST = ZoneInfo("Asia/Kolkata")
+
+def capture_files(patterns):
+    """Capture files named by paths or globs, each file once."""
+    paths = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)) or [pattern]:
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+def _parse(line):
+    """A capture record, or None for a malformed line (e.g. cut short when a worker was killed)."""
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(record, dict) or not isinstance(record.get("ts"), (int, float)) or "method" not in record:
+        return None
+    return record
+
+def load_records(paths, skip=DEFAULT_SKIP, limit=None, max_gap=None):
+    """Replayable records from all `paths` sorted by arrival; gaps longer than max_gap seconds are squeezed to max_gap."""
+    if isinstance(paths, str):
+        paths = [paths]
+    records, malformed = [], 0
+    for path in capture_files(paths):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = _parse(line)
+                if record is None:
+                    malformed += 1
+                    continue
+                route = record.get("route")
+                if not route or "<" in route or any(route.startswith(prefix) for prefix in skip):
+                    continue
+                records.append(record)
+    if malformed:
+        print(f"⚠️ Skipped {malformed} malformed capture line(s)")
+    records.sort(key=lambda record: record["ts"])
+    if limit:
+        records = records[:limit]
+    offset, previous = 0.0, None
+    for record in records:
+        if max_gap is not None and previous is not None:
+            offset += max(0.0, record["ts"] - previous - max_gap)
+        previous = record["ts"]
+        record["replay_ts"] = record["ts"] - offset
+    return records
+
+def print_shape(records):
+    """Requests per IST hour by route group: where the bursts are."""
+    by_hour = defaultdict(Counter)
+    for record in records:
+        hour = datetime.fromtimestamp(record["ts"], IST).hour
+        by_hour[hour]["/".join(record["route"].split("/")[:3])] += 1
+    groups = sorted({group for counts in by_hour.values() for group in counts})
+    print(f"{'IST hour':<9}" + "".join(f"{group:>18}" for group in groups))
+    for hour in range(24):
+        counts = by_hour.get(hour, {})
+        print(f"{hour:02d}:00    " + "".join(f"{counts.get(group, 0):>18}" for group in groups))
+    span = records[-1]["ts"] - records[0]["ts"] if records else 0
+    per_minute = Counter(int(record["ts"] // 60) for record in records)
+    print(f"\n{len(records)} requests over {span / 3600:.1f} h; busiest minute {max(per_minute.values(), default=0)} requests")
+
+# --- request synthesis -----------------------------------------------------------
+
+FILLER = "I have been thinking about how the day went and wanted to talk it through. "
+
+def _text(size):
+    return (FILLER * (size // len(FILLER) + 1))[:max(size, 1)]
+
+def synthesize_body(shape, request_bytes, user_id):
+    """A JSON body with the recorded field names and types, strings sized to fill request_bytes."""
+    if not isinstance(shape, dict):
+        return None
+    strings = [key for key, kind in shape.items() if kind == "str" and key != "user_id"]
+    text_size = max(1, (request_bytes - 16 * len(shape)) // max(len(strings), 1))
+    body = {}
+    for key, kind in shape.items():
+        if key == "user_id":
+            body[key] = user_id
+        elif "time" in key or "date" in key:
+            body[key] = (datetime.utcnow() + timedelta(days=1)).strftime("%Y-%m-%d %H:%M:%S")
+        elif kind == "str":
+            body[key] = _text(text_size)
+        elif kind in ("int", "float"):
+            body[key] = 1
+        elif kind == "bool":
+            body[key] = False
+        else:
+            body[key] = {"list": [], "dict": {}}.get(kind)
+    return body
+
+def synthesize_query(shape, user_id):
+    return {key: user_id if key == "user_id" else value for key, value in (shape or {}).items() if value or key == "user_id"}
+
+# --- targets ---------------------------------------------------------------------
+
+class HttpTarget:
+    """A running instance over HTTP, one requests.Session per thread."""
+
+    def __init__(self, base_url, timeout=60):
+        import requests
+        self.requests = requests
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def send(self, method, path, params, body, headers):
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = self.local.session = self.requests.Session()
+        return session.request(method, self.base_url + path, params=params, json=body, headers=headers, timeout=self.timeout).status_code
+
+class AppTarget:
+    """The Flask app in-process via its test client."""
+
+    def __init__(self, app):
+        self.app = app
+        self.local = threading.local()
+
+    def send(self, method, path, params, body, headers):
+        client = getattr(self.local, "client", None)
+        if client is None:
+            client = self.local.client = self.app.test_client()
+        return client.open(path, method=method, query_string=params, json=body, headers=headers).status_code
+
+# --- replay ----------------------------------------------------------------------
+
+class Replay:
+    def __init__(self, target, users, speed, system_secret):
+        self.target = target
+        self.users = users
+        self.speed = speed
+        self.system_secret = system_secret
+        self.recorder = Recorder()
+        self.statuses = Counter()
+        self.lags = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.lock = threading.Lock()
+
+    def _user(self, bucket):
+        return None if bucket is None or not self.users else self.users[bucket % len(self.users)]
+
+    def fire(self, record, due):
+        user = self._user(record.get("user_bucket"))
+        user_id = user["user_id"] if user else None
+        headers = {}
+        if record.get("system"):
+            headers = {"System-Secret": self.system_secret, "User-ID": user_id or ""}
+        elif user:
+            headers = {"Authorization": f"Bearer {user['token']}"}
+        started = time.perf_counter()
+        with self.lock:
+            self.lags.append((started - due) * 1000)
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            status = self.target.send(
+                record["method"], record["route"], synthesize_query(record.get("query"), user_id),
+                synthesize_body(record.get("body"), record.get("request_bytes", 0), user_id), headers
+            )
+        except Exception as e:
+            print(f"❌ {record['method']} {record['route']} raised {e}")
+            status = "error"
+        elapsed = (time.perf_counter() - started) * 1000
+        with self.lock:
+            self.in_flight -= 1
+            self.statuses[status] += 1
+        self.recorder.record(f"{record['method']} {record['route']}", elapsed, status != "error" and status < 400)
+
+    def run(self, records, max_concurrency):
+        first = records[0]["replay_ts"]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_concurrency) as pool:
+            for record in records:
+                due = started + (record["replay_ts"] - first) / self.speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(self.fire, record, due)
+        return time.perf_counter() - started
+
+def recorded_latency(records):
+    durations = defaultdict(list)
+    for record in records:
+        durations[f"{record['method']} {record['route']}"].append(record["duration_ms"])
+    return {name: (statistics.median(values), percentile(values, 0.95)) for name, values in durations.items()}
+
+def print_comparison(report, recorded):
+    print(f"\n{'route':<40} {'prod p50':>9} {'replay p50':>11} {'prod p95':>9} {'replay p95':>11}")
+    for name, row in report["endpoints"].items():
+        prod_p50, prod_p95 = recorded.get(name, (0.0, 0.0))
+        print(f"{name:<40} {prod_p50:>9.1f} {row['p50_ms']:>11.1f} {prod_p95:>9.1f} {row['p95_ms']:>11.1f}")
+
+def _offline_target(user_count):
+    from benchmarks.loadtest.environment import boot_app, seed_users
+    app = boot_app()
+    users = [{"user_id": user_id, "token": token} for user_id, token in seed_users(user_count, journal_days=14)]
+    return AppTarget(app), users
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured traffic at 1x/10x/100x")
+    parser.add_argument("capture", nargs="+", help="NDJSON files or globs written with TRAFFIC_CAPTURE_ENABLED=1")
+    parser.add_argument("--base-url", help="staging instance, e.g. https://staging.example.com")
+    parser.add_argument("--tokens", help="JSON list of {user_id, token} for staging users")
+    parser.add_argument("--offline", action="store_true", help="replay in-process against mongomock and fake models")
+    parser.add_argument("--users", type=int, default=20, help="seeded users for --offline")
+    parser.add_argument("--speed", type=float, default=1.0, help="time compression: 1, 10, 100")
+    parser.add_argument("--max-concurrency", type=int, default=256, help="replay threads")
+    parser.add_argument("--max-gap", type=float, default=None, help="squeeze idle gaps longer than this many seconds")
+    parser.add_argument("--limit", type=int, default=None, help="replay only the first N requests")
+    parser.add_argument("--skip", nargs="*", default=DEFAULT_SKIP, help="route prefixes not to replay")
+    parser.add_argument("--system-secret", default=None, help="System-Secret for scheduler requests (default: config)")
+    parser.add_argument("--shape", action="store_true", help="print the traffic shape and exit")
+    parser.add_argument("--json", dest="json_path", help="also write the report here")
+    args = parser.parse_args()
+
+    records = load_records(args.capture, args.skip, args.limit, args.max_gap)
+    if not records:
+        parser.error("no replayable requests in the capture")
+    if args.shape:
+        print_shape(records)
+        return
+
+    if args.offline:
+        target, users = _offline_target(args.users)
+    elif args.base_url:
+        target = HttpTarget(args.base_url)
+        users = []
+        if args.tokens:
+            with open(args.tokens, encoding="utf-8") as f:
+                users = json.load(f)
+    else:
+        parser.error("--base-url or --offline is required")
+    system_secret = args.system_secret
+    if system_secret is None:
+        try:
+            from config import SYSTEM_SECRET
+            system_secret = SYSTEM_SECRET
+        except Exception as e:
+            records = [record for record in records if not record.get("system")]
+            print(f"⚠️ No --system-secret and config unavailable ({e}); scheduler requests are skipped")
+
+    span = (records[-1]["replay_ts"] - records[0]["replay_ts"]) / args.speed
+    print(f"▶️ Replaying {len(records)} requests at {args.speed:g}x (~{span:.0f} s) onto {len(users)} users")
+    replay = Replay(target, users, args.speed, system_secret)
+    elapsed = replay.run(records, args.max_concurrency)
+
+    report = replay.recorder.report(elapsed)
+    report["settings"] = vars(args)
+    report["statuses"] = {str(status): count for status, count in replay.statuses.items()}
+    report["lag_ms"] = {
+        "p50": round(statistics.median(replay.lags), 2),
+        "p95": round(percentile(replay.lags, 0.95), 2),
+        "max": round(max(replay.lags), 2)
+    }
+    report["peak_in_flight"] = replay.peak_in_flight
+    recorded = recorded_latency(records)
+    report["recorded"] = {name: {"p50_ms": p50, "p95_ms": p95} for name, (p50, p95) in recorded.items()}
+
+    print_report(report)
+    print_comparison(report, recorded)
+    print(f"\nstatuses {dict(replay.statuses)}; schedule lag p95 {report['lag_ms']['p95']} ms, "
+          f"max {report['lag_ms']['max']} ms; peak in flight {replay.peak_in_flight}")
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"📝 Report written to {args.json_path}")
+
+if __name__ == "__main__":
+    main()
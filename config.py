@@ -13,7 +13,64 @@ ENCRYPTION_KEY=os.getenv("ENCRYPTION_KEY")
 SENDER_EMAIL=os.getenv("SENDER_EMAIL")
 PASSWORD=os.getenv("PASSWORD")
 SYSTEM_SECRET = "my_secret_key_aira"
+ADMIN_SECRET = os.getenv("ADMIN_SECRET")
 PORT = int(os.getenv("PORT", 5000))
+SENTIMENT_WORKERS = int(os.getenv("SENTIMENT_WORKERS", 2))
+SENTIMENT_RETENTION_DAYS = int(os.getenv("SENTIMENT_RETENTION_DAYS", 90))
+SENTIMENT_STATS_REFRESH_SECONDS = int(os.getenv("SENTIMENT_STATS_REFRESH_SECONDS", 60))
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "cache/llm_cache.sqlite3")
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", 7 * 24 * 3600))
+LLM_CACHE_MAX_MB = int(os.getenv("LLM_CACHE_MAX_MB", 256))
+LLM_RATE_LIMIT_PER_MIN = int(os.getenv("LLM_RATE_LIMIT_PER_MIN", 0))
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", 10000))
+REVOCATION_REFRESH_SECONDS = int(os.getenv("REVOCATION_REFRESH_SECONDS", 5))
+PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", 32))
+PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", 10))
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", 465))
+SMTP_USE_SSL = os.getenv("SMTP_USE_SSL", "1") == "1"
+EMAIL_OUTBOX_BATCH = int(os.getenv("EMAIL_OUTBOX_BATCH", 20))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", 6))
+EMAIL_OUTBOX_POLL_SECONDS = int(os.getenv("EMAIL_OUTBOX_POLL_SECONDS", 30))
+WELCOME_EMAIL_INLINE_IMAGES = os.getenv("WELCOME_EMAIL_INLINE_IMAGES", "0") == "1"
+GSHEET_BATCH_SIZE = int(os.getenv("GSHEET_BATCH_SIZE", 50))
+GSHEET_FLUSH_SECONDS = float(os.getenv("GSHEET_FLUSH_SECONDS", 10))
+GSHEET_MAX_ATTEMPTS = int(os.getenv("GSHEET_MAX_ATTEMPTS", 5))
+GSHEET_DEAD_LETTER_PATH = os.getenv("GSHEET_DEAD_LETTER_PATH", "cache/gsheet_dead_letter.ndjson")
+AUTO_CREATE_INDEXES = os.getenv("AUTO_CREATE_INDEXES", "1") == "1"
+USER_ID_LEGACY_READS = os.getenv("USER_ID_LEGACY_READS", "1") == "1"
+DB_READ_STATS = os.getenv("DB_READ_STATS", "0") == "1"
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "0") == "1"
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", 1.0))
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "file")
+TRACE_FILE = os.getenv("TRACE_FILE", "cache/traces.ndjson")
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+PROFILE_DIR = os.getenv("PROFILE_DIR", "cache/profiles")
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", 50))
+MEMORY_LOG_SECONDS = int(os.getenv("MEMORY_LOG_SECONDS", 300))
+MEMORY_MAX_SNAPSHOTS = int(os.getenv("MEMORY_MAX_SNAPSHOTS", 5))
+REMINDER_DISPATCH_SECONDS = int(os.getenv("REMINDER_DISPATCH_SECONDS", 30))
+REMINDER_DISPATCH_BATCH = int(os.getenv("REMINDER_DISPATCH_BATCH", 100))
+REMINDER_DISPATCH_WORKERS = int(os.getenv("REMINDER_DISPATCH_WORKERS", 4))
+REMINDER_MAX_ATTEMPTS = int(os.getenv("REMINDER_MAX_ATTEMPTS", 5))
+DASHBOARD_WORKERS = int(os.getenv("DASHBOARD_WORKERS", 16))
+DASHBOARD_TIMEOUT_SECONDS = float(os.getenv("DASHBOARD_TIMEOUT_SECONDS", 3))
+DASHBOARD_STORY_TTL = int(os.getenv("DASHBOARD_STORY_TTL", 5 * 60))
+DASHBOARD_MOTIVATION_TTL = int(os.getenv("DASHBOARD_MOTIVATION_TTL", 5 * 60))
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "groq")
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "huggingface")
+LLM_RECORD_UPSTREAM = os.getenv("LLM_RECORD_UPSTREAM", "groq")
+LLM_RECORDINGS_PATH = os.getenv("LLM_RECORDINGS_PATH", "cache/llm_recordings.sqlite3")
+LLM_REPLAY_SPEED = float(os.getenv("LLM_REPLAY_SPEED", 1.0))
+LLM_REPLAY_ON_MISS = os.getenv("LLM_REPLAY_ON_MISS", "error")
+TRAFFIC_CAPTURE_ENABLED = os.getenv("TRAFFIC_CAPTURE_ENABLED", "0") == "1"
+TRAFFIC_CAPTURE_FILE = os.getenv("TRAFFIC_CAPTURE_FILE", "cache/traffic.ndjson")
+TRAFFIC_CAPTURE_SAMPLE_RATE = float(os.getenv("TRAFFIC_CAPTURE_SAMPLE_RATE", 1.0))
+TRAFFIC_CAPTURE_BUCKETS = int(os.getenv("TRAFFIC_CAPTURE_BUCKETS", 1000))
 print(f"🔍 Loaded MONGO_URI: {MONGO_URI}")
 
 fernet = Fernet(ENCRYPTION_KEY)
@@ -0,0 +1,44 @@
+"""
+MongoDB command latency for /metrics.
+
+A pymongo CommandListener times every command by collection and command name.
+The collection is only present on the started event, so it is held by request
+id until the matching succeeded/failed event arrives. Enabled with
+METRICS_ENABLED=1 (the default).
+"""
+import threading
+from pymongo import monitoring
+from utils.metrics import mongo_command_seconds
+
+# Handshakes and session bookkeeping; not worth a series each
+IGNORED_COMMANDS = {"hello", "ismaster", "isMaster", "ping", "endSessions", "saslStart", "saslContinue", "buildInfo"}
+
+class CommandMetricsListener(monitoring.CommandListener):
+    def __init__(self):
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def started(self, event):
+        if event.command_name in IGNORED_COMMANDS:
+            return
+        target = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            target = event.command.get("collection")
+        collection = target if isinstance(target, str) else "-"
+        with self.lock:
+            self.pending[(event.connection_id, event.request_id)] = collection
+
+    def _finish(self, event, outcome):
+        with self.lock:
+            collection = self.pending.pop((event.connection_id, event.request_id), None)
+        if collection is None:
+            return
+        mongo_command_seconds.observe(
+            event.duration_micros / 1e6, collection=collection, command=event.command_name, outcome=outcome
+        )
+
+    def succeeded(self, event):
+        self._finish(event, "ok")
+
+    def failed(self, event):
+        self._finish(event, "error")
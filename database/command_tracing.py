@@ -0,0 +1,41 @@
+"""
+MongoDB commands as trace spans.
+
+pymongo calls command listeners synchronously in the thread that issued the
+command, so each finished command is recorded as a child of whatever span is
+current there (a request stage, a scheduler job). Enabled with TRACING_ENABLED=1.
+"""
+import threading
+from pymongo import monitoring
+from database.command_metrics import IGNORED_COMMANDS
+from utils.tracing import record_span, current_span
+
+class CommandTracingListener(monitoring.CommandListener):
+    def __init__(self):
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def started(self, event):
+        if event.command_name in IGNORED_COMMANDS or current_span() is None:
+            return
+        target = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            target = event.command.get("collection")
+        with self.lock:
+            self.pending[(event.connection_id, event.request_id)] = target if isinstance(target, str) else None
+
+    def _finish(self, event, status):
+        with self.lock:
+            if (event.connection_id, event.request_id) not in self.pending:
+                return
+            collection = self.pending.pop((event.connection_id, event.request_id))
+        record_span(
+            f"mongo.{event.command_name}", event.duration_micros / 1e6, status,
+            db_system="mongodb", db_operation=event.command_name, db_collection=collection
+        )
+
+    def succeeded(self, event):
+        self._finish(event, "ok")
+
+    def failed(self, event):
+        self._finish(event, "error")
@@ -0,0 +1,129 @@
+"""
+Declarative index registry for every AIRA collection.
+
+ensure_indexes() is idempotent and runs at startup (AUTO_CREATE_INDEXES=1);
+check_query_plans() explains the hot queries and reports any that would scan
+a whole collection.
+
+Usage (from the repo root):
+    python -m database.indexes            # create missing indexes
+    python -m database.indexes --check    # create, then fail if a hot query is a COLLSCAN
+"""
+import argparse
+import sys
+from datetime import datetime
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+INDEX_SPECS = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "sessions": [
+        IndexModel([("session_id", ASCENDING)], name="session_id_unique", unique=True),
+        IndexModel([("user_id", ASCENDING), ("active", ASCENDING)], name="user_id_active"),
+        IndexModel([("revoked_at", ASCENDING)], name="revoked_at", sparse=True),
+        # Sessions (and their revocation records) disappear once they expire
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "chat": [
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+        IndexModel([("messages.response_id", ASCENDING)], name="messages_response_id"),
+        IndexModel([("journal_end_flag", ASCENDING)], name="journal_end_flag"),
+    ],
+    "journal": [
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+    ],
+    "brain": [
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+    ],
+    "sentiment": [
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+    ],
+    "reminders": [
+        IndexModel([("user_id", ASCENDING), ("due_at", ASCENDING)], name="user_id_due_at"),
+        IndexModel([("status", ASCENDING), ("due_at", ASCENDING)], name="status_due_at"),
+        IndexModel([("status", ASCENDING), ("locked_until", ASCENDING)], name="status_locked_until"),
+    ],
+    "feedback": [
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+    ],
+    "email_outbox": [
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)], name="status_next_attempt_at"),
+        IndexModel([("status", ASCENDING), ("locked_until", ASCENDING)], name="status_locked_until"),
+    ],
+}
+
+def hot_queries():
+    """(collection, filter) pairs for the per-request and per-job lookups that must use an index."""
+    now = datetime.utcnow()
+    return [
+        ("users", {"email": "probe@example.com"}),
+        ("sessions", {"session_id": "probe"}),
+        ("sessions", {"revoked_at": {"$gt": now}}),
+        ("chat", {"user_id": "probe"}),
+        ("chat", {"messages.response_id": "probe"}),
+        ("chat", {"journal_end_flag": 0}),
+        ("journal", {"user_id": "probe"}),
+        ("brain", {"user_id": "probe"}),
+        ("sentiment", {"user_id": "probe"}),
+        ("reminders", {"user_id": "probe"}),
+        ("reminders", {"status": "pending", "due_at": {"$lte": now}}),
+        ("feedback", {"user_id": "probe"}),
+        ("email_outbox", {"status": "pending", "next_attempt_at": {"$lte": now}}),
+    ]
+
+def ensure_indexes(db):
+    """Create every registered index. Returns a list of (collection, index name, error) failures."""
+    failures = []
+    for collection_name, models in INDEX_SPECS.items():
+        collection = db[collection_name]
+        for model in models:
+            name = model.document["name"]
+            try:
+                collection.create_indexes([model])
+            except OperationFailure as e:
+                # e.g. duplicate emails blocking the unique index, or an existing index with other options
+                failures.append((collection_name, name, str(e)))
+                print(f"❌ Could not create index {collection_name}.{name}: {e}")
+    if not failures:
+        print("✅ Indexes ensured for all collections")
+    return failures
+
+def _stages(plan):
+    yield plan.get("stage")
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            yield from _stages(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from _stages(child)
+
+def check_query_plans(db):
+    """Explain each hot query; returns the (collection, filter) pairs whose winning plan is a COLLSCAN."""
+    scans = []
+    for collection_name, query in hot_queries():
+        plan = db[collection_name].find(query).explain()["queryPlanner"]["winningPlan"]
+        stages = set(_stages(plan))
+        if "COLLSCAN" in stages:
+            scans.append((collection_name, query))
+            print(f"❌ COLLSCAN: {collection_name} {query}")
+        else:
+            print(f"✅ {collection_name} {query} -> {', '.join(sorted(s for s in stages if s))}")
+    return scans
+
+def main():
+    from pymongo import MongoClient
+    from config import MONGO_URI
+
+    parser = argparse.ArgumentParser(description="Create AIRA indexes and check hot query plans")
+    parser.add_argument("--check", action="store_true", help="fail if any hot query is a collection scan")
+    args = parser.parse_args()
+
+    db = MongoClient(MONGO_URI).get_default_database()
+    failures = ensure_indexes(db)
+    scans = check_query_plans(db) if args.check else []
+    if failures or scans:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
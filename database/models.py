@@ -1,5 +1,5 @@
 from flask_pymongo import PyMongo
-from config import MONGO_URI
+from config import MONGO_URI, AUTO_CREATE_INDEXES, DB_READ_STATS, METRICS_ENABLED, TRACING_ENABLED
 from flask import Flask
 
 mongo = PyMongo()
@@ -17,7 +17,17 @@ reminder_collection = None
 def init_db(app: Flask):  
     """Initialize the database connection"""
     app.config["MONGO_URI"] = MONGO_URI
-    mongo.init_app(app)
+    event_listeners = []
+    if DB_READ_STATS:
+        from database.read_stats import ReadBytesListener
+        event_listeners.append(ReadBytesListener())
+    if METRICS_ENABLED:
+        from database.command_metrics import CommandMetricsListener
+        event_listeners.append(CommandMetricsListener())
+    if TRACING_ENABLED:
+        from database.command_tracing import CommandTracingListener
+        event_listeners.append(CommandTracingListener())
+    mongo.init_app(app, event_listeners=event_listeners)
     print("✅ MongoDB connected successfully!")
     return initialize_collections()  # Return the result of initialize_collections
 
@@ -52,6 +62,10 @@ def initialize_collections():
         feedback_collection = db["feedback"]  
         reminder_collection = db["reminders"]
 
+        if AUTO_CREATE_INDEXES:
+            from database.indexes import ensure_indexes
+            ensure_indexes(db)
+
         # Debugging print statements
         print(f"✅ Collections initialized successfully!")
         print(f"🔍 Available collections: {db.list_collection_names()}") 
@@ -0,0 +1,38 @@
+"""
+Per-request accounting of how much data MongoDB returned.
+
+A pymongo CommandListener adds the BSON size of every read reply to flask.g, and an
+after_request hook exposes the totals as X-DB-Bytes-Read / X-DB-Reads headers and in
+the debug log. Enabled with DB_READ_STATS=1; reads outside a request are ignored.
+"""
+import logging
+import bson
+from flask import g, has_request_context
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+READ_COMMANDS = {"find", "getMore", "aggregate", "findAndModify", "count", "distinct"}
+
+class ReadBytesListener(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        if event.command_name not in READ_COMMANDS or not has_request_context():
+            return
+        g.db_bytes_read = g.get("db_bytes_read", 0) + len(bson.encode(event.reply))
+        g.db_reads = g.get("db_reads", 0) + 1
+
+    def failed(self, event):
+        pass
+
+def add_read_headers(response):
+    if "db_reads" in g:
+        response.headers["X-DB-Bytes-Read"] = str(g.db_bytes_read)
+        response.headers["X-DB-Reads"] = str(g.db_reads)
+        logger.debug(f"DB reads: {g.db_reads} command(s), {g.db_bytes_read} bytes")
+    return response
+
+def init_read_stats(app):
+    app.after_request(add_read_headers)
@@ -0,0 +1,114 @@
+"""
+Projected reads for the brain, chat and journal documents.
+
+These documents grow without bound (assessments, goals, memory_timeline, messages,
+journals), so callers ask for the slice they need instead of the whole document.
+Every accessor takes any user identity accepted by utils.identity.
+"""
+from pymongo import ReturnDocument
+from database import models
+from utils.identity import user_key, user_filter
+
+CHAT_FLAGS = {"typing_flag": 1, "journal_start_flag": 1, "journal_end_flag": 1}
+
+# --- brain -------------------------------------------------------------------
+
+def latest_assessment(user_id):
+    """The most recent assessment entry, or None."""
+    doc = models.brain_collection.find_one(user_filter(user_id), {"assessments": {"$slice": -1}})
+    assessments = (doc or {}).get("assessments") or []
+    return assessments[-1] if assessments else None
+
+def user_name(user_id, default="there"):
+    """Name from the latest assessment's demographics."""
+    assessment = latest_assessment(user_id) or {}
+    return (assessment.get("demographics") or {}).get("name", default)
+
+def latest_memory(user_id):
+    """(latest assessment, latest memory_timeline entry); either may be None."""
+    doc = models.brain_collection.find_one(
+        user_filter(user_id),
+        {"assessments": {"$slice": -1}, "memory_timeline": {"$slice": -1}}
+    )
+    if not doc:
+        return None, None
+    assessments = doc.get("assessments") or []
+    timeline = doc.get("memory_timeline") or []
+    return (assessments[-1] if assessments else None), (timeline[-1] if timeline else None)
+
+def memory_profile(user_id):
+    """Latest assessment plus the full memory timeline (rewritten by the memory card job)."""
+    return models.brain_collection.find_one(
+        user_filter(user_id),
+        {"assessments": {"$slice": -1}, "memory_timeline": 1}
+    )
+
+def story_profile(user_id, with_story=False):
+    """First assessment (for demographics) and goals - all generate_user_story reads - plus the stored story if asked."""
+    projection = {"user_id": 1, "assessments": {"$slice": 1}, "goals": 1}
+    if with_story:
+        projection["story"] = 1
+    return models.brain_collection.find_one(user_filter(user_id), projection)
+
+def goals(user_id):
+    """The user's goals, or None when there is no brain document."""
+    doc = models.brain_collection.find_one(user_filter(user_id), {"goals": 1})
+    return None if doc is None else doc.get("goals", [])
+
+# --- chat --------------------------------------------------------------------
+
+def chat_flags(user_id):
+    """Typing/journal flags without the message list, or None."""
+    return models.chat_collection.find_one({"user_id": user_key(user_id)}, CHAT_FLAGS)
+
+def chat_tail(user_id, count=1):
+    """Flags plus the last `count` messages, or None."""
+    return models.chat_collection.find_one(
+        {"user_id": user_key(user_id)},
+        {**CHAT_FLAGS, "messages": {"$slice": -count}}
+    )
+
+def set_typing_flag_and_tail(user_id, value):
+    """Set typing_flag and return the flags plus the last message in one round trip."""
+    return models.chat_collection.find_one_and_update(
+        {"user_id": user_key(user_id)},
+        {"$set": {"typing_flag": value}},
+        projection={**CHAT_FLAGS, "messages": {"$slice": -1}},
+        return_document=ReturnDocument.AFTER
+    )
+
+def last_message(user_id):
+    doc = chat_tail(user_id)
+    messages = (doc or {}).get("messages") or []
+    return messages[-1] if messages else None
+
+def chat_messages(user_id):
+    """Flags and the full message list (for callers that rewrite it), or None."""
+    return models.chat_collection.find_one({"user_id": user_key(user_id)}, {**CHAT_FLAGS, "messages": 1})
+
+# --- journal -----------------------------------------------------------------
+
+def journals(user_id):
+    """All journal entries, or None when the user has no journal document."""
+    doc = models.journal_collection.find_one({"user_id": user_key(user_id)}, {"journals": 1})
+    return None if doc is None else doc.get("journals", [])
+
+def latest_journal(user_id):
+    """The most recently appended journal entry, or None."""
+    doc = models.journal_collection.find_one({"user_id": user_key(user_id)}, {"journals": {"$slice": -1}})
+    entries = (doc or {}).get("journals") or []
+    return entries[-1] if entries else None
+
+def journal_for_date(user_id, day):
+    """The journal entry for one date (YYYY-MM-DD), or None."""
+    doc = models.journal_collection.find_one(
+        {"user_id": user_key(user_id)},
+        {"journals": {"$elemMatch": {"date": day}}}
+    )
+    entries = (doc or {}).get("journals") or []
+    return entries[0] if entries else None
+
+def has_journal_for_date(user_id, day):
+    return models.journal_collection.count_documents(
+        {"user_id": user_key(user_id), "journals.date": day}, limit=1
+    ) > 0
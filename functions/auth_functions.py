@@ -1,10 +1,6 @@
 import datetime
 import jwt
-from config import JWT_SECRET_KEY,SENDER_EMAIL,PASSWORD
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import os
+from config import JWT_SECRET_KEY
 
 # Token generation and decoding
 def generate_token(user_id, session_id, expiration_delta):
@@ -35,34 +31,3 @@ def verify_jwt_token(token):
     except jwt.InvalidTokenError:
         print("Invalid token")
         return None
-
-def send_welcome_email(email, username):
-    sender_email = SENDER_EMAIL
-    password = PASSWORD
-
-    # Load HTML template from file
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    # print("\n\n base dir ; ", base_dir)
-    file_path = os.path.join(base_dir, "Email_Page", "index.html")
-
-    with open(file_path, "r", encoding="utf-8") as f:
-        html_template = f.read()
-
-    # Replace placeholder with actual username
-    html_content = html_template.replace("{{username}}", username.capitalize())
-
-    # Create email message
-    msg = MIMEMultipart("alternative")
-    msg["Subject"] = "Aira Welcomes You 🌿"
-    msg["From"] = sender_email
-    msg["To"] = email
-
-    msg.attach(MIMEText(html_content, "html"))
-
-    try:
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-            server.login(sender_email, password)
-            server.sendmail(sender_email, email, msg.as_string())
-        # print(f"Welcome email sent to {email}")
-    except Exception as e:
-        print(f"Error sending welcome email: {e}")
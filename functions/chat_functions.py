@@ -1,11 +1,17 @@
 from datetime import datetime
 import time
-from database.models import chat_collection,brain_collection,journal_collection, get_current_time
+from database.models import chat_collection,brain_collection,journal_collection
 import uuid
-from bson.objectid import ObjectId
 from utils.model_utils import create_chain,get_model
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
-from bson.errors import InvalidId
+from database.repository import chat_messages, journal_for_date, has_journal_for_date, memory_profile
+from utils.identity import user_filter
+from utils.llm_cache import cached_llm_call
+from utils.metrics import llm_site, chat_response_seconds
+from utils.tracing import span, traced
+
+# Bump when the memory prompt changes so cached memories are not reused
+MEMORY_PROMPT_VERSION = "1"
 
 def is_first_user_message_today(messages):
     today = datetime.utcnow().date()
@@ -16,6 +22,11 @@ def is_first_user_message_today(messages):
                 return False
     return True
 
+def split_message_chunks(text, drop_empty=False):
+    """Split a reply on the `|||` pause marker into stripped chunks."""
+    chunks = [part.strip() for part in text.split("|||")]
+    return [chunk for chunk in chunks if chunk] if drop_empty else chunks
+
 def check_and_set_journal_start(user_doc, user_id_obj):
     if user_doc.get("journal_start_flag", 0) == 0:
         chat_collection.update_one(
@@ -31,33 +42,21 @@ def is_important_message(text):
 def generate_ai_response(user_input: str, user_id: str) -> dict:
     start_time = time.time()    
     
-    ai_response = create_chain(user_id).invoke(
-        {"input": user_input, "user_id": user_id},
-        config={"configurable": {"session_id": user_id}}
-    )
-    
-    response_time = round(time.time() - start_time, 2)
-    response_id = str(uuid.uuid4())
-    current_time = get_current_time()
-    
-    ai_message = {
-        "role": "AI",
-        "content": ai_response,
-        "created_at": current_time
-    }
+    with llm_site("chat"):
+        with span("chain.setup"):
+            chain = create_chain(user_id)
+        with span("chain.invoke"):
+            ai_response = chain.invoke(
+                {"input": user_input, "user_id": user_id},
+                config={"configurable": {"session_id": user_id}}
+            )
 
-    # ✅ Push message to chat_collection with proper user_id handling
-    try:
-        chat_collection.update_one(
-            {"user_id": ObjectId(user_id)},
-            {"$push": {"messages": ai_message}}
-        )
-    except (InvalidId, TypeError):
-        chat_collection.update_one(
-            {"user_id": user_id},
-            {"$push": {"messages": ai_message}}
-        )
+    elapsed = time.time() - start_time
+    chat_response_seconds.observe(elapsed)
+    response_time = round(elapsed, 2)
+    response_id = str(uuid.uuid4())
 
+    # The caller persists the AI message together with the user's message
     return {
         "role": "AI",
         "response_id": response_id,
@@ -76,18 +75,12 @@ def create_or_update_memory_card(user_id_str):
     user_id = user_id_str
     today_str = datetime.utcnow().date().isoformat()
 
-    # Fetch journal entries
-    user_journals = journal_collection.find_one({"user_id": user_id})
-    user = brain_collection.find_one({"user_id": ObjectId(user_id)})
-
-    if not user_journals or "journals" not in user_journals:
-        print("No journal entries found for user.")
-        return
-
-    today_journal = next((j for j in user_journals["journals"] if j["date"] == today_str), None)
+    # Fetch today's journal entry
+    today_journal = journal_for_date(user_id, today_str)
     if not today_journal:
         print("No journal for today.")
         return
+    user = memory_profile(user_id) or {}
 
     combined_messages = [msg["content"] for msg in today_journal["messages"] if msg.get("role") == "User"]
     if not combined_messages:
@@ -147,10 +140,19 @@ def create_or_update_memory_card(user_id_str):
         Write the key memory insights below, each as a concise, factual statement starting with {user_gender}.
         """)
 
-    try:
+    def compute():
         response = model.invoke([system_prompt, human_prompt])
         if isinstance(response, AIMessage) and response.content.strip():
-            refined_memory = response.content.strip()
+            return response.content.strip()
+        return None
+
+    try:
+        refined_memory = cached_llm_call(
+            "memory_card", MEMORY_PROMPT_VERSION, model,
+            {"gender": user_gender, "existing_memory": existing_memory, "messages": user_text},
+            compute
+        )
+        if refined_memory:
             print("Refined memory generated.")
 
             # Remove any previous entry for today
@@ -165,7 +167,7 @@ def create_or_update_memory_card(user_id_str):
 
             # Update the document with the new timeline
             brain_collection.update_one(
-                {"user_id": ObjectId(user_id)},
+                user_filter(user_id),
                 {"$set": {"memory_timeline": memory_timeline}}
             )
 
@@ -177,11 +179,12 @@ def create_or_update_memory_card(user_id_str):
         print(f"Error during memory generation: {e}")
 
 
+@traced("journal.export")
 def export_journal(user_id):
     today_str = datetime.utcnow().date().isoformat()
     print('📅 Exporting journal for user:', user_id, 'for date:', today_str)
 
-    user_doc = chat_collection.find_one({"user_id": user_id})
+    user_doc = chat_messages(user_id)
     if not user_doc or "messages" not in user_doc:
         return
 
@@ -197,13 +200,11 @@ def export_journal(user_id):
         return  # No messages for today
 
     # Check if a journal already exists for today
-    existing_doc = journal_collection.find_one({"user_id": user_id, "journals.date": today_str})
-
-    if existing_doc:
+    if has_journal_for_date(user_id, today_str):
         # Append messages to the existing journal for today
         journal_collection.update_one(
             {"user_id": user_id, "journals.date": today_str},
-            {"$push": {"journals.$.messages": {"$each": today_messages}}}
+            {"$push": {"journals.$.messages": {"$each": today_messages}}, "$unset": {"motivation": ""}}
         )
     else:
         # Create a new journal entry
@@ -215,12 +216,13 @@ def export_journal(user_id):
         }
         journal_collection.update_one(
             {"user_id": user_id},
-            {"$push": {"journals": journal_entry}},
+            {"$push": {"journals": journal_entry}, "$unset": {"motivation": ""}},
             upsert=True
         )
 
     # Generate memory card based on combined journal data
-    create_or_update_memory_card(str(user_id))
+    with span("journal.memory_card"):
+        create_or_update_memory_card(str(user_id))
 
     # Reset journaling flags and clear chat history
     chat_collection.update_one(
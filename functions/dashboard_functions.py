@@ -0,0 +1,120 @@
+"""
+Everything the app shows on open, fetched concurrently for /api/user/dashboard.
+
+Each section runs on a shared thread pool and is timed. Sections that miss the
+deadline (or fail) come back as null with their status in `timings`, so a slow
+LLM call never holds up the rest of the page. Story and motivation are stored
+(functions/user_functions.py) and additionally served stale-while-revalidate
+from memory: a stale value is returned at once and refreshed in the background,
+and a timed-out first generation still lands in the cache for the next load.
+
+A section already running for a user is joined rather than submitted again, so
+reloads during a slow generation don't pile more work onto the pool. Timed-out
+sections that haven't started yet are cancelled, except the cached ones.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from config import DASHBOARD_WORKERS, DASHBOARD_TIMEOUT_SECONDS, DASHBOARD_STORY_TTL, DASHBOARD_MOTIVATION_TTL
+from database import models
+from database.repository import goals
+from functions.reminder_functions import serialize_reminder, REMINDER_DOCS
+from functions.sentiment_functions import get_sentiment_summary, DEFAULT_STRESS_THRESHOLD
+from utils.identity import user_key, user_object_id
+from utils.swr_cache import StaleWhileRevalidateCache
+from utils.tracing import span, bind_context
+from functions.user_functions import get_user_story, get_daily_motivation
+from utils.user_utils import format_goals
+
+_executor = ThreadPoolExecutor(max_workers=DASHBOARD_WORKERS, thread_name_prefix="dashboard")
+story_cache = StaleWhileRevalidateCache(DASHBOARD_STORY_TTL)
+motivation_cache = StaleWhileRevalidateCache(DASHBOARD_MOTIVATION_TTL)
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+def profile_section(user_id, params):
+    user = models.users_collection.find_one({"_id": user_object_id(user_id)}, {"password": 0})
+    if not user:
+        return None
+    user["user_id"] = str(user.pop("_id"))
+    return user
+
+def goals_section(user_id, params):
+    return format_goals(goals(user_id) or [])
+
+def sentiment_section(user_id, params):
+    return get_sentiment_summary(user_key(user_id), params["days"], params["threshold"])
+
+def reminders_section(user_id, params):
+    cursor = models.reminder_collection.find({"user_id": user_key(user_id), **REMINDER_DOCS}, {"exceptions": 0}).sort("due_at", 1)
+    return [serialize_reminder(reminder) for reminder in cursor]
+
+def story_section(user_id, params):
+    return story_cache.get(user_key(user_id), lambda: get_user_story(user_id))[0]
+
+def motivation_section(user_id, params):
+    return motivation_cache.get(user_key(user_id), lambda: get_daily_motivation(user_id))[0]
+
+SECTIONS = {
+    "profile": profile_section,
+    "goals": goals_section,
+    "sentiment_summary": sentiment_section,
+    "reminders": reminders_section,
+    "story": story_section,
+    "motivation": motivation_section,
+}
+
+# Their results outlive the request that started them
+CACHED_SECTIONS = {"story", "motivation"}
+
+def _submit(name, section, user_id, params):
+    """The running future for this user's section, or a newly submitted one."""
+    key = (name, user_key(user_id), tuple(sorted(params.items())))
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        if future is not None:
+            return future
+        future = _in_flight[key] = _executor.submit(bind_context(_timed), section, user_id, params)
+
+    def forget(done):
+        with _in_flight_lock:
+            if _in_flight.get(key) is done:
+                del _in_flight[key]
+
+    future.add_done_callback(forget)
+    return future
+
+def _timed(section, user_id, params):
+    started = time.perf_counter()
+    with span(f"dashboard.{section.__name__}"):
+        value = section(user_id, params)
+    return value, round((time.perf_counter() - started) * 1000, 1)
+
+def build_dashboard(user_id, days=30, threshold=DEFAULT_STRESS_THRESHOLD, timeout=DASHBOARD_TIMEOUT_SECONDS):
+    started = time.perf_counter()
+    params = {"days": days, "threshold": threshold}
+    futures = {name: _submit(name, section, user_id, params) for name, section in SECTIONS.items()}
+    done, _ = wait(futures.values(), timeout=timeout)
+
+    dashboard, timings = {}, {}
+    for name, future in futures.items():
+        dashboard[name] = None
+        if future not in done or future.cancelled():
+            # Cached sections are left running and store their result for the next load
+            if name not in CACHED_SECTIONS:
+                future.cancel()
+            timings[name] = {"status": "timeout", "ms": round(timeout * 1000, 1)}
+            continue
+        try:
+            dashboard[name], ms = future.result()
+            timings[name] = {"status": "ok", "ms": ms}
+        except Exception as e:
+            print(f"❌ Dashboard section {name} failed: {e}")
+            timings[name] = {"status": "error", "error": str(e)}
+
+    # The streak lives on the profile document; no separate read needed
+    dashboard["streak"] = dashboard["profile"].get("streak", 0) if dashboard["profile"] else None
+    dashboard["partial"] = any(t["status"] != "ok" for t in timings.values())
+    dashboard["timings"] = timings
+    dashboard["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return dashboard
@@ -0,0 +1,227 @@
+"""
+Durable outbox for transactional email.
+
+Requests only insert a document into the email_outbox collection; a background
+sender per worker claims due messages atomically, sends them in batches over one
+persistent SMTP connection and retries failures with exponential backoff. Messages
+that keep failing end up with status "failed" for inspection.
+
+Point SMTP_HOST/SMTP_PORT at a local stand-in (e.g. `python -m aiosmtpd -n -l localhost:8025`
+with SMTP_USE_SSL=0) to exercise it without a real mail server.
+"""
+import os
+import re
+import smtplib
+import socket
+import threading
+from datetime import datetime, timedelta
+from email.mime.image import MIMEImage
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from pymongo import ReturnDocument
+from config import (
+    SENDER_EMAIL,
+    PASSWORD,
+    SMTP_HOST,
+    SMTP_PORT,
+    SMTP_USE_SSL,
+    EMAIL_OUTBOX_BATCH,
+    EMAIL_OUTBOX_MAX_ATTEMPTS,
+    EMAIL_OUTBOX_POLL_SECONDS,
+    WELCOME_EMAIL_INLINE_IMAGES
+)
+from database.models import get_collection
+
+EMAIL_PAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Email_Page")
+REMOTE_IMAGE_PATTERN = re.compile(r'https://github\.com/Upendra2003/Aira-Images/blob/main/images/([^"\'?]+)\?raw=true')
+RETRY_BASE_SECONDS = 30
+SEND_LEASE = timedelta(minutes=5)
+
+def get_outbox_collection():
+    return get_collection("email_outbox")
+
+class WelcomeTemplate:
+    """The welcome page read and split once, with its inline image parts prebuilt."""
+
+    def __init__(self, inline_images=False):
+        with open(os.path.join(EMAIL_PAGE_DIR, "index.html"), "r", encoding="utf-8") as f:
+            html = f.read()
+
+        self.images = []
+        if inline_images:
+            html = REMOTE_IMAGE_PATTERN.sub(self._inline_image, html)
+        self.parts = html.split("{{username}}")
+
+    def _inline_image(self, match):
+        filename = match.group(1).replace("%20", " ")
+        path = os.path.join(EMAIL_PAGE_DIR, "images", filename)
+        if not os.path.exists(path):
+            return match.group(0)
+        content_id = f"img{len(self.images)}"
+        with open(path, "rb") as f:
+            self.images.append((content_id, f.read()))
+        return f"cid:{content_id}"
+
+    def render(self, email, username):
+        html_content = username.capitalize().join(self.parts)
+
+        msg = MIMEMultipart("related" if self.images else "alternative")
+        msg["Subject"] = "Aira Welcomes You 🌿"
+        msg["From"] = SENDER_EMAIL
+        msg["To"] = email
+        msg.attach(MIMEText(html_content, "html"))
+        for content_id, data in self.images:
+            image = MIMEImage(data)
+            image.add_header("Content-ID", f"<{content_id}>")
+            image.add_header("Content-Disposition", "inline")
+            msg.attach(image)
+        return msg
+
+_template = None
+
+def get_welcome_template():
+    global _template
+    if _template is None:
+        _template = WelcomeTemplate(inline_images=WELCOME_EMAIL_INLINE_IMAGES)
+    return _template
+
+class SMTPConnection:
+    """A single persistent SMTP connection, re-opened only when the server dropped it."""
+
+    def __init__(self):
+        self.server = None
+
+    def get(self):
+        if self.server is not None:
+            try:
+                if self.server.noop()[0] == 250:
+                    return self.server
+            except (smtplib.SMTPException, OSError):
+                pass
+            self.close()
+
+        if SMTP_USE_SSL:
+            server = smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT, timeout=30)
+        else:
+            server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=30)
+        if SENDER_EMAIL and PASSWORD:
+            server.login(SENDER_EMAIL, PASSWORD)
+        self.server = server
+        return server
+
+    def close(self):
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+        self.server = None
+
+def enqueue_welcome_email(email, username):
+    """Record a welcome email to be sent by the background sender."""
+    now = datetime.utcnow()
+    get_outbox_collection().insert_one({
+        "kind": "welcome",
+        "to": email,
+        "username": username,
+        "status": "pending",
+        "attempts": 0,
+        "next_attempt_at": now,
+        "created_at": now
+    })
+    sender.wake()
+
+def claim_batch(limit, worker_id):
+    """Atomically claim up to `limit` due messages (including ones whose sender died mid-send)."""
+    outbox = get_outbox_collection()
+    claimed = []
+    for _ in range(limit):
+        now = datetime.utcnow()
+        doc = outbox.find_one_and_update(
+            {"$or": [
+                {"status": "pending", "next_attempt_at": {"$lte": now}},
+                {"status": "sending", "locked_until": {"$lt": now}}
+            ]},
+            {
+                "$set": {"status": "sending", "locked_until": now + SEND_LEASE, "claimed_by": worker_id},
+                "$inc": {"attempts": 1}
+            },
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+        if not doc:
+            break
+        claimed.append(doc)
+    return claimed
+
+def mark_failed_attempt(doc, error):
+    """Schedule a retry with exponential backoff, or give up after the last attempt."""
+    attempts = doc.get("attempts", 1)
+    update = {"last_error": str(error)[:500], "locked_until": None}
+    if attempts >= EMAIL_OUTBOX_MAX_ATTEMPTS:
+        update["status"] = "failed"
+        print(f"❌ Giving up on email to {doc.get('to')} after {attempts} attempts: {error}")
+    else:
+        update["status"] = "pending"
+        update["next_attempt_at"] = datetime.utcnow() + timedelta(seconds=RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    get_outbox_collection().update_one({"_id": doc["_id"]}, {"$set": update})
+
+def flush_outbox(connection, worker_id="manual", limit=None):
+    """Send one batch of due messages. Returns the number of messages handled."""
+    batch = claim_batch(limit or EMAIL_OUTBOX_BATCH, worker_id)
+    if not batch:
+        return 0
+
+    outbox = get_outbox_collection()
+    template = get_welcome_template()
+    for doc in batch:
+        try:
+            msg = template.render(doc["to"], doc.get("username") or "friend")
+            connection.get().sendmail(SENDER_EMAIL, doc["to"], msg.as_string())
+            outbox.update_one(
+                {"_id": doc["_id"]},
+                {"$set": {"status": "sent", "sent_at": datetime.utcnow(), "locked_until": None}}
+            )
+        except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError) as e:
+            connection.close()
+            mark_failed_attempt(doc, e)
+        except Exception as e:
+            mark_failed_attempt(doc, e)
+    return len(batch)
+
+class OutboxSender:
+    """Background thread per worker process that drains the outbox."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.pid = None
+        self.lock = threading.Lock()
+
+    def wake(self):
+        self.ensure_started()
+        self.event.set()
+
+    def ensure_started(self):
+        if self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+        threading.Thread(target=self._run, name="email-outbox", daemon=True).start()
+
+    def _run(self):
+        connection = SMTPConnection()
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        while True:
+            try:
+                if flush_outbox(connection, worker_id):
+                    continue
+            except Exception as e:
+                print(f"❌ Email outbox error: {e}")
+            # Idle: drop the connection rather than hold it open between bursts
+            if not self.event.wait(EMAIL_OUTBOX_POLL_SECONDS):
+                connection.close()
+            self.event.clear()
+
+sender = OutboxSender()
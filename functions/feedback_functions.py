@@ -1,6 +1,6 @@
 import logging
 from flask import jsonify
-from bson import ObjectId
+from utils.identity import user_key, user_filter
 from datetime import datetime
 from database.models import chat_collection
 
@@ -29,10 +29,10 @@ def validate_feedback_data(data):
 
 def get_user_feedback(feedback_collection, user_id):
     """Fetch or initialize user feedback document."""
-    user_feedback = feedback_collection.find_one({"_id": ObjectId(user_id)})
+    user_feedback = feedback_collection.find_one(user_filter(user_id, keyed_by_id=True))
     if not user_feedback:
         user_feedback = {
-            "_id": ObjectId(user_id), 
+            "user_id": user_key(user_id),
             "feedback": []
         }
     
@@ -67,9 +67,11 @@ def handle_comment(user_feedback, response_id, comment):
 def update_user_feedback(feedback_collection, user_id, user_feedback):
     """Update or insert user feedback in the database."""
     try:
+        fields = {k: v for k, v in user_feedback.items() if k != "_id"}
+        fields["user_id"] = user_key(user_id)
         feedback_collection.update_one(
-            {"_id": ObjectId(user_id)},
-            {"$set": user_feedback},
+            user_filter(user_id, keyed_by_id=True),
+            {"$set": fields},
             upsert=True
         )
         return True, None
@@ -81,7 +83,7 @@ def get_remembered_messages(user_id, response_id):
     """Retrieve user message and AI response from chat-based message data."""
 
     chat_data = chat_collection.find_one({
-        "user_id": str(user_id),
+        "user_id": user_key(user_id),
         "messages": {
             "$elemMatch": {
                 "role": "AI",
@@ -125,7 +127,7 @@ def insert_daily_feedback(collection, user_id, rating, comment):
 
         # Optional: prevent multiple feedbacks per day
         collection.update_one(
-            {"_id": ObjectId(user_id)},
+            user_filter(user_id, keyed_by_id=True),
             {
                 "$pull": {"daily_feedbacks": {"date": today_str}}  # Remove existing feedback for the day
             }
@@ -133,8 +135,8 @@ def insert_daily_feedback(collection, user_id, rating, comment):
 
         # Add new one
         collection.update_one(
-            {"_id": ObjectId(user_id)},
-            {"$push": {"daily_feedbacks": daily_feedback_entry}},
+            user_filter(user_id, keyed_by_id=True),
+            {"$set": {"user_id": user_key(user_id)}, "$push": {"daily_feedbacks": daily_feedback_entry}},
             upsert=True
         )
 
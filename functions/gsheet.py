@@ -1,27 +1,26 @@
-import gspread
-from google.oauth2.service_account import Credentials
-import os
-import json
-
-def append_to_google_sheet(data_dict):
-    # Define the scope
-    scope = ["https://spreadsheets.google.com/feeds", 
-             "https://www.googleapis.com/auth/spreadsheets",
-             "https://www.googleapis.com/auth/drive"]
-
-    # Load credentials from environment variable
-    creds_json = os.getenv("GCP_SERVICE_ACCOUNT_JSON")
-    creds_dict = json.loads(creds_json)
-    credentials = Credentials.from_service_account_info(creds_dict, scopes=scope)
+"""
+Buffered export of assessment rows to the AIRA_Assessments Google Sheet.
 
-    # Authorize client
-    client = gspread.authorize(credentials)
+Requests only put a formatted row on an in-process queue. A background worker
+flushes it in batches with `append_rows`, retries with backoff, and writes rows
+that still fail to a local NDJSON dead-letter file (see replay_dead_letters).
+Rows still queued or in flight when the process exits are dead-lettered too.
+The transport is pluggable so the exporter can run against a fake sheet.
+"""
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from config import GSHEET_BATCH_SIZE, GSHEET_FLUSH_SECONDS, GSHEET_MAX_ATTEMPTS, GSHEET_DEAD_LETTER_PATH
 
-    # Open your sheet
-    sheet = client.open("AIRA_Assessments").sheet1
+SCOPE = ["https://spreadsheets.google.com/feeds",
+         "https://www.googleapis.com/auth/spreadsheets",
+         "https://www.googleapis.com/auth/drive"]
 
-    # Format data
-    row_data = [
+def format_row(data_dict):
+    return [
         data_dict["name"],
         data_dict["age"],
         data_dict["gender"],
@@ -35,5 +34,176 @@ def append_to_google_sheet(data_dict):
         *data_dict["reflections"]["questions"]
     ]
 
-    # Append the row
-    sheet.append_row(row_data)
+class GspreadTransport:
+    """Appends rows with gspread; the authorized worksheet is cached until a call fails."""
+
+    def __init__(self, spreadsheet_name="AIRA_Assessments"):
+        self.spreadsheet_name = spreadsheet_name
+        self.sheet = None
+
+    def _worksheet(self):
+        if self.sheet is None:
+            import gspread
+            from google.oauth2.service_account import Credentials
+
+            creds_dict = json.loads(os.getenv("GCP_SERVICE_ACCOUNT_JSON"))
+            credentials = Credentials.from_service_account_info(creds_dict, scopes=SCOPE)
+            self.sheet = gspread.authorize(credentials).open(self.spreadsheet_name).sheet1
+        return self.sheet
+
+    def append_rows(self, rows):
+        try:
+            self._worksheet().append_rows(rows)
+        except Exception:
+            # Re-authorize on the next attempt in case the token or handle went stale
+            self.sheet = None
+            raise
+
+class InMemorySheetTransport:
+    """Fake sheet for tests and local runs; can be told to fail the first N calls."""
+
+    def __init__(self, fail_times=0):
+        self.rows = []
+        self.calls = 0
+        self.fail_times = fail_times
+
+    def append_rows(self, rows):
+        self.calls += 1
+        if self.calls <= self.fail_times:
+            raise ConnectionError("simulated sheet failure")
+        self.rows.extend(rows)
+
+class SheetExporter:
+    def __init__(self, transport, batch_size=GSHEET_BATCH_SIZE, flush_seconds=GSHEET_FLUSH_SECONDS,
+                 max_attempts=GSHEET_MAX_ATTEMPTS, dead_letter_path=GSHEET_DEAD_LETTER_PATH, retry_base=1.0):
+        self.transport = transport
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_attempts = max_attempts
+        self.dead_letter_path = dead_letter_path
+        self.retry_base = retry_base
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.pid = None
+        self.in_flight = []
+        self.exit_hook = False
+
+    def enqueue(self, row):
+        self.ensure_started()
+        self.queue.put(row)
+
+    def ensure_started(self):
+        if self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+            if not self.exit_hook:
+                atexit.register(self.dead_letter_pending)
+                self.exit_hook = True
+        threading.Thread(target=self._run, name="gsheet-exporter", daemon=True).start()
+
+    def _drain(self, limit):
+        rows = []
+        while len(rows) < limit:
+            try:
+                rows.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def _next_batch(self, timeout):
+        """Wait up to `timeout` for a first row, then take whatever else is already queued."""
+        try:
+            batch = [self.queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        return batch + self._drain(self.batch_size - 1)
+
+    def _run(self):
+        while True:
+            batch = self._next_batch(self.flush_seconds)
+            if not batch:
+                continue
+            self.in_flight = batch
+            try:
+                if len(batch) < self.batch_size:
+                    # Give a burst a moment to fill the batch before paying for an API call
+                    time.sleep(1.0)
+                    batch += self._drain(self.batch_size - len(batch))
+                self.send(batch)
+            except Exception as e:
+                # Keep the worker alive: ensure_started won't replace it in this process
+                print(f"❌ Google Sheets export dropped {len(batch)} assessment row(s): {e}")
+            finally:
+                self.in_flight = []
+
+    def send(self, rows):
+        """Append rows with retries; returns True on success, dead-letters them otherwise."""
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self.transport.append_rows(rows)
+                return True
+            except Exception as e:
+                print(f"⚠️ Google Sheets append failed (attempt {attempt}/{self.max_attempts}): {e}")
+                if attempt < self.max_attempts:
+                    time.sleep(self.retry_base * 2 ** (attempt - 1))
+        self.dead_letter(rows)
+        return False
+
+    def dead_letter(self, rows):
+        directory = os.path.dirname(self.dead_letter_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self.lock, open(self.dead_letter_path, "a", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps({"row": row, "failed_at": time.time()}, default=str) + "\n")
+        print(f"❌ {len(rows)} assessment row(s) written to {self.dead_letter_path}")
+
+    def flush(self):
+        """Synchronously send everything queued (tests, shutdown)."""
+        while True:
+            batch = self._drain(self.batch_size)
+            if not batch:
+                return
+            self.send(batch)
+
+    def dead_letter_pending(self):
+        """At exit: write queued and in-flight rows to the dead-letter file instead of losing them."""
+        rows = self.in_flight + self._drain(self.queue.qsize() + 1)
+        if rows:
+            try:
+                self.dead_letter(rows)
+            except Exception as e:
+                print(f"❌ Lost {len(rows)} assessment row(s) at shutdown: {e}")
+
+    def replay_dead_letters(self):
+        """Re-send dead-lettered rows; rows that fail again are written back."""
+        if not os.path.exists(self.dead_letter_path):
+            return 0
+        with self.lock:
+            pending_path = self.dead_letter_path + ".replaying"
+            os.replace(self.dead_letter_path, pending_path)
+        with open(pending_path, encoding="utf-8") as f:
+            rows = [json.loads(line)["row"] for line in f if line.strip()]
+        for start in range(0, len(rows), self.batch_size):
+            self.send(rows[start:start + self.batch_size])
+        os.remove(pending_path)
+        return len(rows)
+
+_exporter = None
+
+def get_exporter():
+    global _exporter
+    if _exporter is None:
+        _exporter = SheetExporter(GspreadTransport())
+    return _exporter
+
+def set_transport(transport):
+    """Swap the sheet transport (e.g. InMemorySheetTransport in tests)."""
+    get_exporter().transport = transport
+
+def enqueue_assessment_row(data_dict):
+    """Queue one assessment for the background Google Sheets export."""
+    get_exporter().enqueue(format_row(data_dict))
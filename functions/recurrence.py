@@ -0,0 +1,134 @@
+"""
+A small RRULE subset for recurring reminders.
+
+Supported: FREQ=DAILY|WEEKLY|MONTHLY, INTERVAL, BYDAY (weekly only), COUNT and
+UNTIL, e.g. "FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH;COUNT=10". Occurrences are naive
+IST wall-clock datetimes (a 09:00 reminder stays at 09:00) and are only ever
+produced lazily by generators, one at a time, for the window being looked at.
+"""
+import calendar
+from datetime import datetime, timedelta
+
+WEEKDAYS = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY")
+
+def parse_rrule(text):
+    """Parse an RRULE string into a dict; raises ValueError for anything outside the subset."""
+    if not text or not isinstance(text, str):
+        raise ValueError("Empty recurrence rule")
+    text = text.strip()
+    if text.upper().startswith("RRULE:"):
+        text = text[6:]
+
+    rule = {"freq": None, "interval": 1, "byday": None, "count": None, "until": None}
+    for part in filter(None, text.split(";")):
+        if "=" not in part:
+            raise ValueError(f"Malformed rule part: {part}")
+        key, value = (s.strip().upper() for s in part.split("=", 1))
+        if key == "FREQ":
+            if value not in FREQUENCIES:
+                raise ValueError(f"Unsupported FREQ: {value}")
+            rule["freq"] = value
+        elif key == "INTERVAL":
+            rule["interval"] = int(value)
+            if rule["interval"] < 1:
+                raise ValueError("INTERVAL must be positive")
+        elif key == "BYDAY":
+            days = value.split(",")
+            if any(day not in WEEKDAYS for day in days):
+                raise ValueError(f"Unsupported BYDAY: {value}")
+            rule["byday"] = sorted({WEEKDAYS.index(day) for day in days})
+        elif key == "COUNT":
+            rule["count"] = int(value)
+            if rule["count"] < 1:
+                raise ValueError("COUNT must be positive")
+        elif key == "UNTIL":
+            fmt = "%Y%m%dT%H%M%S" if "T" in value else "%Y%m%d"
+            until = datetime.strptime(value.rstrip("Z"), fmt)
+            rule["until"] = until if "T" in value else until.replace(hour=23, minute=59, second=59)
+        else:
+            raise ValueError(f"Unsupported rule part: {key}")
+
+    if rule["freq"] is None:
+        raise ValueError("FREQ is required")
+    if rule["byday"] and rule["freq"] != "WEEKLY":
+        raise ValueError("BYDAY is only supported with FREQ=WEEKLY")
+    if rule["count"] and rule["until"]:
+        raise ValueError("COUNT and UNTIL are mutually exclusive")
+    return rule
+
+def _add_months(dt, months):
+    """Same day and time `months` later, or None when that month is too short."""
+    month_index = dt.month - 1 + months
+    year, month = dt.year + month_index // 12, month_index % 12 + 1
+    if dt.day > calendar.monthrange(year, month)[1]:
+        return None
+    return dt.replace(year=year, month=month)
+
+def _periods(rule, dtstart, skip):
+    """Candidate occurrences for period `skip` onwards (a period is INTERVAL days/weeks/months)."""
+    interval = rule["interval"]
+    period = skip
+    while True:
+        if rule["freq"] == "DAILY":
+            yield dtstart + timedelta(days=period * interval)
+        elif rule["freq"] == "WEEKLY":
+            if rule["byday"]:
+                week_start = dtstart - timedelta(days=dtstart.weekday()) + timedelta(weeks=period * interval)
+                for weekday in rule["byday"]:
+                    candidate = week_start + timedelta(days=weekday)
+                    if candidate >= dtstart:
+                        yield candidate
+            else:
+                yield dtstart + timedelta(weeks=period * interval)
+        else:
+            candidate = _add_months(dtstart, period * interval)
+            if candidate is not None:
+                yield candidate
+        period += 1
+
+def _first_period(rule, dtstart, start):
+    """Index of the first period that can contain `start`; only safe to skip ahead without COUNT."""
+    if start is None or start <= dtstart or rule["count"]:
+        return 0
+    if rule["freq"] == "DAILY":
+        return max(0, (start - dtstart).days // rule["interval"])
+    if rule["freq"] == "WEEKLY":
+        return max(0, (start - dtstart).days // 7 // rule["interval"] - 1)
+    months = (start.year - dtstart.year) * 12 + start.month - dtstart.month
+    return max(0, months // rule["interval"] - 1)
+
+def iter_series(rule, dtstart, start=None):
+    """Every occurrence of the rule from dtstart (or from `start`), lazily, honouring COUNT/UNTIL."""
+    produced = 0
+    for occurrence in _periods(rule, dtstart, _first_period(rule, dtstart, start)):
+        if rule["until"] and occurrence > rule["until"]:
+            return
+        produced += 1
+        if start is None or occurrence >= start:
+            yield occurrence
+        if rule["count"] and produced >= rule["count"]:
+            return
+
+def iter_occurrences(rule, dtstart, exceptions=(), start=None, end=None):
+    """
+    (occurrence, fire_time) pairs between start and end (inclusive). Occurrences marked
+    done are skipped and ones rescheduled through `not_done` fire at their new time.
+    """
+    overrides = {}
+    for exception in exceptions:
+        overrides[exception["occurrence"]] = exception
+    for occurrence in iter_series(rule, dtstart, start):
+        if end is not None and occurrence > end:
+            return
+        exception = overrides.get(occurrence.strftime("%Y-%m-%d %H:%M:%S"))
+        if exception is None:
+            yield occurrence, occurrence
+        elif exception.get("status") == "not_done":
+            yield occurrence, datetime.strptime(exception["scheduled_time"], "%Y-%m-%d %H:%M:%S")
+
+def next_occurrence(rule, dtstart, after, exceptions=()):
+    """The first (occurrence, fire_time) strictly after `after`, or None when the series is over."""
+    for occurrence, fire_time in iter_occurrences(rule, dtstart, exceptions, start=after + timedelta(seconds=1)):
+        return occurrence, fire_time
+    return None
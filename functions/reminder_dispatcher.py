@@ -0,0 +1,143 @@
+"""
+Delivery of due reminders.
+
+Each scheduler tick claims due reminders one at a time with find_one_and_update on
+the (status, due_at) index, so any number of workers can dispatch concurrently
+without double-sending and without scanning the pending backlog. A claim is a lease:
+if the worker dies mid-delivery the reminder becomes claimable again once
+`locked_until` passes; failed deliveries wait in "retrying" on the same field with
+exponential backoff. Delivery goes through a channel looked up by name;
+register_channel() adds real transports alongside the stand-ins below.
+"""
+import logging
+import os
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from config import REMINDER_DISPATCH_BATCH, REMINDER_DISPATCH_WORKERS, REMINDER_MAX_ATTEMPTS
+from database import models
+from utils.identity import is_whatsapp_user
+from functions.reminder_functions import advance_recurring
+from utils.tracing import bind_context, traced
+
+logger = logging.getLogger(__name__)
+
+CLAIM_LEASE = timedelta(minutes=2)
+RETRY_BASE_SECONDS = 60
+
+CHANNELS = {}
+
+def register_channel(name):
+    """Decorator registering `send(reminder)`; it should raise to signal a failed delivery."""
+    def decorator(send):
+        CHANNELS[name] = send
+        return send
+    return decorator
+
+@register_channel("push")
+def send_push(reminder):
+    logger.info(f"🔔 [push] {reminder['user_id']}: {reminder.get('generated_reminder')}")
+
+@register_channel("whatsapp")
+def send_whatsapp(reminder):
+    logger.info(f"💬 [whatsapp] {reminder['user_id']}: {reminder.get('generated_reminder')}")
+
+@register_channel("email")
+def send_email(reminder):
+    logger.info(f"📧 [email] {reminder['user_id']}: {reminder.get('generated_reminder')}")
+
+def channel_for(reminder):
+    if reminder.get("channel"):
+        return reminder["channel"]
+    return "whatsapp" if is_whatsapp_user(reminder.get("user_id")) else "push"
+
+def get_reminder_collection():
+    return models.reminder_collection
+
+def claim_due_reminder(worker_id, now=None):
+    """Atomically take one due (or abandoned) reminder, or None when nothing is due."""
+    now = now or datetime.utcnow()
+    return get_reminder_collection().find_one_and_update(
+        {"$or": [
+            {"status": "pending", "due_at": {"$lte": now}},
+            {"status": {"$in": ["delivering", "retrying"]}, "locked_until": {"$lt": now}}
+        ]},
+        {
+            "$set": {"status": "delivering", "locked_until": now + CLAIM_LEASE, "claimed_by": worker_id},
+            "$inc": {"attempts": 1}
+        },
+        sort=[("due_at", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+def finish(reminder, fields):
+    """Close out the claimed occurrence; recurring reminders move on to their next one."""
+    update = advance_recurring(reminder, skip_past=True) if reminder.get("recurrence") else None
+    if update is None:
+        update = {"$set": {"locked_until": None, **fields}}
+    else:
+        update["$set"].update({k: v for k, v in fields.items() if k != "status"})
+    get_reminder_collection().update_one({"_id": reminder["_id"], "status": "delivering"}, update)
+
+def complete_delivery(reminder):
+    finish(reminder, {"status": "delivered", "delivered_at": datetime.utcnow()})
+
+def fail_delivery(reminder, error):
+    """Retry later with exponential backoff, or mark failed after the last attempt."""
+    attempts = reminder.get("attempts", 1)
+    if attempts >= REMINDER_MAX_ATTEMPTS:
+        logger.error(f"Giving up on reminder {reminder['_id']} after {attempts} attempts: {error}")
+        finish(reminder, {"status": "failed", "last_error": str(error)[:500]})
+        return
+    # due_at stays the user's time; the retry waits on locked_until instead
+    update = {
+        "status": "retrying",
+        "last_error": str(error)[:500],
+        "locked_until": datetime.utcnow() + timedelta(seconds=RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    }
+    get_reminder_collection().update_one({"_id": reminder["_id"], "status": "delivering"}, {"$set": update})
+
+def deliver(reminder):
+    name = channel_for(reminder)
+    try:
+        send = CHANNELS[name]
+    except KeyError:
+        fail_delivery(reminder, f"Unknown channel {name}")
+        return False
+    try:
+        send(reminder)
+    except Exception as e:
+        fail_delivery(reminder, e)
+        return False
+    complete_delivery(reminder)
+    return True
+
+def dispatch_due_reminders(limit=REMINDER_DISPATCH_BATCH, workers=REMINDER_DISPATCH_WORKERS):
+    """Claim and deliver up to `limit` due reminders. Returns (claimed, delivered)."""
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    claimed = []
+    while len(claimed) < limit:
+        reminder = claim_due_reminder(worker_id)
+        if reminder is None:
+            break
+        claimed.append(reminder)
+    if not claimed:
+        return 0, 0
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="reminder") as executor:
+        delivered = sum(executor.map(bind_context(deliver), claimed))
+    return len(claimed), delivered
+
+@traced("scheduler.reminder_dispatch")
+def run_reminder_dispatch():
+    """Scheduler job: keep draining full batches so a backlog clears within one tick."""
+    try:
+        while True:
+            claimed, delivered = dispatch_due_reminders()
+            if claimed:
+                print(f"🔔 Dispatched {delivered}/{claimed} due reminders")
+            if claimed < REMINDER_DISPATCH_BATCH:
+                break
+    except Exception as e:
+        print(f"❌ Reminder dispatch error: {e}")
@@ -0,0 +1,189 @@
+"""
+Reminder documents: one document per reminder in the reminders collection.
+
+    {
+        "_id": ObjectId,
+        "user_id": "<canonical user key>",
+        "generated_reminder": "Drink water",
+        "scheduled_time": "2025-01-31 09:00:00",   # IST wall time, as sent by the app
+        "due_at": datetime,                        # the same instant in UTC (naive)
+        "status": "pending" | "delivering" | "retrying" | "delivered" | "failed" | "expired",
+        "created_at": "2025-01-30 18:12:04"        # IST
+    }
+
+`status` tracks delivery by the dispatcher (functions/reminder_dispatcher.py);
+"expired" marks reminders migrated from the legacy arrays long after they were
+due, which are never dispatched. Marking a reminder done deletes it.
+
+Until scripts/migrate_reminders.py has run everywhere the collection also holds
+legacy per-user documents ({"user_id", "reminders": [...]}); reads filter them
+out with REMINDER_DOCS.
+
+Recurring reminders additionally carry `recurrence` (an RRULE, see
+functions/recurrence.py), `dtstart`, the series `occurrence` that scheduled_time
+currently stands for, and per-occurrence `exceptions` ({"occurrence", "status":
+"done"} or {"occurrence", "status": "not_done", "scheduled_time"}). Only the next
+occurrence is ever stored; the dispatcher advances it after each delivery.
+"""
+import logging
+from datetime import datetime, timedelta
+import pytz
+from bson import ObjectId
+from functions.recurrence import parse_rrule, iter_occurrences, next_occurrence
+
+logger = logging.getLogger(__name__)
+
+# Timezones
+utc_tz = pytz.UTC
+ist_tz = pytz.timezone('Asia/Kolkata')
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+PUBLIC_FIELDS = ("generated_reminder", "scheduled_time", "status", "created_at")
+MAX_WINDOW_OCCURRENCES = 500
+# Excludes legacy per-user array documents not yet split by the migration
+REMINDER_DOCS = {"reminders": {"$exists": False}}
+SERIES_FIELDS = ("recurrence", "dtstart", "occurrence", "exceptions", "scheduled_time", "due_at")
+
+def to_ist(dt):
+    if isinstance(dt, str):
+        try:
+            dt = datetime.fromisoformat(dt.replace('Z', '+00:00'))
+        except ValueError:
+            try:
+                dt = datetime.strptime(dt, TIME_FORMAT)
+            except ValueError:
+                logger.error(f"Invalid datetime string: {dt}")
+                return None
+    if dt.tzinfo is None:
+        dt = utc_tz.localize(dt)
+    return dt.astimezone(ist_tz)
+
+def to_utc(dt):
+    if isinstance(dt, str):
+        try:
+            dt = datetime.fromisoformat(dt.replace('Z', '+00:00'))
+        except ValueError:
+            try:
+                dt = datetime.strptime(dt, TIME_FORMAT)
+            except ValueError:
+                logger.error(f"Invalid datetime string: {dt}")
+                return None
+    if dt.tzinfo is None:
+        dt = ist_tz.localize(dt)
+    return dt.astimezone(utc_tz)
+
+def format_ist_string(dt):
+    if isinstance(dt, datetime):
+        dt = dt.astimezone(ist_tz)
+        return dt.strftime(TIME_FORMAT)
+    return dt
+
+def due_at_for(scheduled_time):
+    """Naive UTC datetime for an IST scheduled_time string, or None if it does not parse."""
+    dt = to_utc(scheduled_time)
+    return dt.replace(tzinfo=None) if dt else None
+
+def parse_ist(value):
+    """Naive IST datetime from a "YYYY-MM-DD HH:MM:SS" string, or None."""
+    try:
+        return datetime.strptime(value, TIME_FORMAT)
+    except (TypeError, ValueError):
+        return None
+
+def new_reminder_doc(user_id, title, scheduled_time, reminder_id=None, created_at=None, recurrence=None):
+    """
+    Build a reminder document, or None when scheduled_time does not parse. Raises
+    ValueError for an invalid recurrence rule or one that never occurs.
+    """
+    due_at = due_at_for(scheduled_time)
+    if due_at is None:
+        return None
+    doc = {
+        "_id": reminder_id or ObjectId(),
+        "user_id": user_id,
+        "generated_reminder": title,
+        "scheduled_time": scheduled_time,
+        "due_at": due_at,
+        "status": "pending",
+        "attempts": 0,
+        "created_at": created_at or format_ist_string(datetime.now(ist_tz))
+    }
+    if recurrence:
+        rule = parse_rrule(recurrence)
+        dtstart = parse_ist(scheduled_time)
+        if dtstart is None:
+            raise ValueError("Recurring reminders need scheduled_time as YYYY-MM-DD HH:MM:SS")
+        first = next_occurrence(rule, dtstart, dtstart - timedelta(seconds=1))
+        if first is None:
+            raise ValueError("Recurrence rule has no occurrences")
+        first_time = first[0].strftime(TIME_FORMAT)
+        doc.update({
+            "recurrence": recurrence.strip(),
+            "dtstart": scheduled_time,
+            "occurrence": first_time,
+            "exceptions": [],
+            "scheduled_time": first_time,
+            "due_at": due_at_for(first_time)
+        })
+    return doc
+
+def advance_recurring(doc, exceptions=None, skip_past=False):
+    """
+    Update moving a recurring reminder past its current occurrence, or None when
+    the series is over. With skip_past, occurrences already missed (e.g. while the
+    dispatcher was down) are skipped rather than fired back to back. Exceptions for
+    occurrences left behind are dropped.
+    """
+    exceptions = doc.get("exceptions", []) if exceptions is None else exceptions
+    rule = parse_rrule(doc["recurrence"])
+    after = parse_ist(doc["occurrence"])
+    if skip_past:
+        after = max(after, datetime.now(ist_tz).replace(tzinfo=None))
+    following = next_occurrence(rule, parse_ist(doc["dtstart"]), after, exceptions)
+    if following is None:
+        return None
+    occurrence, fire_time = (dt.strftime(TIME_FORMAT) for dt in following)
+    return {
+        "$set": {
+            "occurrence": occurrence,
+            "scheduled_time": fire_time,
+            "due_at": due_at_for(fire_time),
+            "status": "pending",
+            "attempts": 0,
+            "locked_until": None
+        },
+        "$pull": {"exceptions": {"occurrence": {"$lt": occurrence}}}
+    }
+
+def occurrences_in_window(doc, start, end):
+    """Lazily expand a recurring reminder between two naive IST datetimes (capped)."""
+    rule = parse_rrule(doc["recurrence"])
+    expanded = iter_occurrences(rule, parse_ist(doc["dtstart"]), doc.get("exceptions", []), start, end)
+    for index, (occurrence, fire_time) in enumerate(expanded):
+        if index >= MAX_WINDOW_OCCURRENCES:
+            return
+        yield {"occurrence": occurrence.strftime(TIME_FORMAT), "scheduled_time": fire_time.strftime(TIME_FORMAT)}
+
+def reschedule_fields(scheduled_time):
+    """$set fields that move a reminder to a new time and re-arm its delivery."""
+    due_at = due_at_for(scheduled_time)
+    if due_at is None:
+        return None
+    return {"scheduled_time": scheduled_time, "due_at": due_at, "status": "pending", "attempts": 0}
+
+def serialize_reminder(doc, now=None, window=None):
+    """
+    API shape: string _id plus the public fields and `is_due`. Recurring reminders
+    also get their rule and, when a (start, end) IST window is given, its occurrences.
+    """
+    now = now or datetime.utcnow()
+    reminder = {"_id": str(doc["_id"])}
+    reminder.update({field: doc.get(field) for field in PUBLIC_FIELDS})
+    due_at = doc.get("due_at")
+    reminder["is_due"] = bool(due_at and due_at <= now and doc.get("status") != "failed")
+    if doc.get("recurrence"):
+        reminder["recurrence"] = doc["recurrence"]
+        reminder["occurrence"] = doc.get("occurrence")
+        if window:
+            reminder["occurrences"] = list(occurrences_in_window(doc, *window))
+    return reminder
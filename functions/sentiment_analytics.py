@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+
+def build_score_series(sentiments, days=None, now=None):
+    """Daily mental_score series on a continuous calendar index (missing days are NaN)."""
+    records = [(s.get("date"), s.get("mental_score")) for s in sentiments if s.get("date")]
+    if not records:
+        return pd.Series(dtype="float64")
+
+    frame = pd.DataFrame(records, columns=["date", "mental_score"])
+    frame["date"] = pd.to_datetime(frame["date"], errors="coerce")
+    frame["mental_score"] = pd.to_numeric(frame["mental_score"], errors="coerce")
+    frame = frame.dropna(subset=["date"])
+    series = frame.groupby("date")["mental_score"].mean().sort_index()
+    if series.empty:
+        return series
+
+    end = pd.Timestamp((now or pd.Timestamp.now()).date()) if days else series.index[-1]
+    start = end - pd.Timedelta(days=days) if days else series.index[0]
+    series = series[(series.index >= start) & (series.index <= end)]
+    if series.empty:
+        return series
+    return series.reindex(pd.date_range(series.index[0], series.index[-1], freq="D"))
+
+def classify_trend(delta):
+    """Same bands as the /summary trend."""
+    if delta > 5:
+        return "improving"
+    if delta < -5:
+        return "declining"
+    if delta > 2:
+        return "slightly_improving"
+    if delta < -2:
+        return "slightly_declining"
+    return "stable"
+
+def _json_values(values, decimals=2):
+    """Round a float array and turn NaN into None for JSON output."""
+    rounded = np.round(np.asarray(values, dtype="float64"), decimals)
+    return [None if np.isnan(v) else float(v) for v in rounded]
+
+def compute_analytics(sentiments, days=None, span=7, volatility_window=7, threshold=70, z_threshold=2.5, change_threshold=1.5, now=None):
+    """
+    Vectorized analytics over the daily mental_score series.
+
+    - ewma: exponentially weighted trend (span in days, gaps ignored)
+    - volatility: rolling standard deviation over `volatility_window` observed days
+    - below_streak: consecutive days with a score below `threshold`
+    - anomaly: score deviates more than `z_threshold` sigmas from the previous day's EWMA
+    - change_point: level shift between the trailing and leading `volatility_window` means
+      larger than `change_threshold` pooled standard deviations
+    """
+    series = build_score_series(sentiments, days=days, now=now)
+    observed = series.notna()
+    if not observed.any():
+        return {
+            "summary": {
+                "observed_days": 0,
+                "ewma": None,
+                "trend": "stable",
+                "trend_delta": None,
+                "volatility": None,
+                "current_below_streak": 0,
+                "longest_below_streak": 0,
+                "anomaly_dates": [],
+                "change_points": []
+            },
+            "series": []
+        }
+
+    ewma = series.ewm(span=span, ignore_na=True).mean()
+    volatility = series.rolling(volatility_window, min_periods=min(2, volatility_window)).std()
+
+    # Streaks below threshold: reset the running count whenever a day is not below
+    below = (series < threshold) & observed
+    streak = below.astype("int64").groupby((~below).cumsum()).cumsum()
+
+    # Anomalies: residual against yesterday's EWMA, scaled by recent residual spread
+    residual = series - ewma.shift(1)
+    residual_std = residual.rolling(volatility_window * 2, min_periods=min(3, volatility_window * 2)).std().shift(1)
+    zscore = residual / residual_std.replace(0, np.nan)
+    anomaly = (zscore.abs() > z_threshold).fillna(False)
+
+    # Change points: trailing vs leading window means, kept only at the local peak of the shift
+    trailing = series.rolling(volatility_window, min_periods=min(3, volatility_window))
+    leading = series[::-1].rolling(volatility_window, min_periods=min(3, volatility_window))
+    leading_mean = leading.mean()[::-1].shift(-1)
+    leading_var = leading.var()[::-1].shift(-1)
+    shift = (leading_mean - trailing.mean()).abs()
+    pooled_std = np.sqrt((trailing.var() + leading_var) / 2)
+    peak = shift.rolling(volatility_window, center=True, min_periods=1).max()
+    change_point = ((shift > change_threshold * pooled_std) & (shift == peak)).fillna(False)
+
+    observed_ewma = ewma[observed]
+    lookback = observed_ewma.iloc[-min(len(observed_ewma), span + 1)]
+    trend_delta = float(observed_ewma.iloc[-1] - lookback)
+    latest_volatility = volatility[observed].iloc[-1]
+
+    dates = series.index.strftime("%Y-%m-%d")
+    return {
+        "summary": {
+            "observed_days": int(observed.sum()),
+            "ewma": round(float(observed_ewma.iloc[-1]), 1),
+            "trend": classify_trend(trend_delta),
+            "trend_delta": round(trend_delta, 1),
+            "volatility": None if np.isnan(latest_volatility) else round(float(latest_volatility), 1),
+            "current_below_streak": int(streak.iloc[-1]),
+            "longest_below_streak": int(streak.max()),
+            "anomaly_dates": list(dates[anomaly.to_numpy()]),
+            "change_points": list(dates[change_point.to_numpy()])
+        },
+        "series": [
+            {
+                "date": date,
+                "mental_score": score,
+                "ewma": smooth,
+                "volatility": vol,
+                "below_streak": int(run),
+                "anomaly": bool(flag),
+                "change_point": bool(cp)
+            }
+            for date, score, smooth, vol, run, flag, cp in zip(
+                dates,
+                _json_values(series),
+                _json_values(ewma),
+                _json_values(volatility),
+                streak.to_numpy(),
+                anomaly.to_numpy(),
+                change_point.to_numpy()
+            )
+        ]
+    }
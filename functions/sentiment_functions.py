@@ -3,12 +3,19 @@ from nltk.corpus import stopwords
 from nltk.tokenize import word_tokenize, sent_tokenize
 from afinn import Afinn
 from collections import defaultdict
-import json
-import re
 from utils.model_utils import get_model
+from utils.structured_output import invoke_json, parse_json_output
+from utils.llm_cache import cached_llm_call
+from utils.tracing import bind_context, traced
 from database.models import sentiment_collection
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from pymongo import ReturnDocument
+from config import SENTIMENT_WORKERS, SENTIMENT_RETENTION_DAYS, SENTIMENT_STATS_REFRESH_SECONDS
+import os
 import random
+import threading
+import time
 
 # Download NLTK data
 nltk.download('punkt')
@@ -28,24 +35,9 @@ emotional_states = [
     "None"
 ]
 
-def extract_json_from_text(text):
-    """Extract valid JSON from model response."""
-    json_pattern = r'({[\s\S]*})'
-    matches = re.findall(json_pattern, text)
-    for match in matches:
-        try:
-            data = json.loads(match)
-            if isinstance(data, dict) and all(k in data for k in ["mental_score", "emotional_state", "reflection_text", "suggestions"]):
-                return match
-        except json.JSONDecodeError:
-            continue
-    try:
-        data = json.loads(text)
-        if isinstance(data, dict):
-            return text
-    except json.JSONDecodeError:
-        pass
-    return None
+SENTIMENT_REQUIRED_KEYS = ("mental_score", "emotional_state", "reflection_text", "suggestions")
+# Bump when the analysis prompt changes so cached results are not reused
+SENTIMENT_PROMPT_VERSION = "1"
 
 def analyze_single_message(message, model, previous_scores=None):
     """Analyze a single user message for mental wellness indicators."""
@@ -105,10 +97,13 @@ def analyze_single_message(message, model, previous_scores=None):
     }}
     """
     try:
-        response = model.invoke(prompt)
-        json_str = extract_json_from_text(response.content)
-        if json_str:
-            data = json.loads(json_str)
+        data = cached_llm_call(
+            "sentiment", SENTIMENT_PROMPT_VERSION, model,
+            {"message": message, "previous_score": previous_scores[-1] if previous_scores else None},
+            lambda: invoke_json(model, prompt, SENTIMENT_REQUIRED_KEYS, site="sentiment"),
+            rate_limited=False
+        )
+        if data:
             # Validate mental_score
             if not isinstance(data.get("mental_score"), (int, float)) or not (0 <= data["mental_score"] <= 100):
                 data["mental_score"] = max(0, min(100, 80 + sentiment_score))
@@ -140,20 +135,74 @@ def analyze_single_message(message, model, previous_scores=None):
             "suggestions": ["Keep sharing your thoughts to help me support you better!"]
         }
 
-def already_analyzed(user_id, date):
-    """Check if the given date was already analyzed for this user."""
-    try:
-        user_doc = sentiment_collection.find_one({"user_id": str(user_id)})
-        if not user_doc:
-            return False
-        return any(s.get("date") == date for s in user_doc.get("sentiments", []))
-    except Exception as e:
-        print(f"Error checking if already analyzed: {e}")
-        return True
+def state_key(state):
+    """Make an emotional state safe to use as a MongoDB field name."""
+    return str(state or "None").replace(".", "_").replace("$", "_")
+
+def dominant_state(state_counts):
+    """Return the most frequent emotional state from a {state: count} map."""
+    if not state_counts:
+        return "None"
+    return max(state_counts.items(), key=lambda x: x[1])[0]
+
+def aggregate_message_analyses(message_analyses, message_count):
+    """Combine per-message analyses into one daily sentiment entry (without date)."""
+    scores = [analysis["mental_score"] for analysis in message_analyses]
+    avg_score = sum(scores) / len(scores) if scores else 80
+    # Scale to ensure 0–100 range
+    mental_score = max(0, min(100, avg_score))
+
+    # Determine dominant emotional state
+    emotional_states_count = defaultdict(int)
+    for analysis in message_analyses:
+        emotional_states_count[state_key(analysis["emotional_state"])] += 1
+    dominant = dominant_state(emotional_states_count)
+
+    # Combine reflections
+    reflection_texts = [analysis["reflection_text"] for analysis in message_analyses]
+    reflection_text = " ".join(reflection_texts[:2])  # Limit to 2 for brevity
+
+    # Collect supporting texts (up to 3)
+    supporting_texts = []
+    for analysis in message_analyses:
+        supporting_texts.extend(analysis["supporting_text"])
+        if len(supporting_texts) >= 3:
+            break
+    supporting_texts = supporting_texts[:3]
+
+    # Collect suggestions (up to 3, prioritize unique ones)
+    suggestions = []
+    for analysis in message_analyses:
+        for suggestion in analysis["suggestions"]:
+            if suggestion not in suggestions and len(suggestions) < 3:
+                suggestions.append(suggestion)
 
-def process_daily_messages(journals, user_id):
-    """Process and analyze daily messages one at a time, aggregating scores."""
+    # Add slight variation to default scores
+    if dominant == "None" and abs(mental_score - 80) < 0.1:
+        variation = random.uniform(-2, 2)
+        mental_score = 80 + variation
+
+    return {
+        "mental_score": mental_score,
+        "emotional_state": dominant,
+        "reflection_text": reflection_text or "Today seems steady. Keep nurturing your well-being! 🌱",
+        "supporting_text": supporting_texts,
+        "suggestions": suggestions or ["Keep sharing your thoughts to help me support you better!"],
+        "message_count": message_count,
+        # Running aggregate used by the per-message scorer
+        "score_sum": sum(scores),
+        "scored_count": len(scores),
+        "state_counts": dict(emotional_states_count),
+    }
+
+def process_daily_messages(journals, user_id, force=False):
+    """
+    Process and analyze daily messages one at a time, aggregating scores.
+
+    With force=True every day is re-analyzed, even if already stored or scored per message.
+    """
     day_data = defaultdict(list)
+    day_messages = defaultdict(list)
     user_id_str = str(user_id)
 
     # Aggregate messages by day from journals
@@ -168,6 +217,7 @@ def process_daily_messages(journals, user_id):
                 content = msg.get("content", "").strip()
                 if content:
                     day_data[date].append(content)
+                    day_messages[date].append(msg)
             except Exception as e:
                 print(f"Error processing message: {e}")
 
@@ -180,9 +230,11 @@ def process_daily_messages(journals, user_id):
 
     # Get previous scores for context
     previous_scores = []
+    existing_days = {}
     try:
         user_doc = sentiment_collection.find_one({"user_id": user_id_str})
         if user_doc and "sentiments" in user_doc:
+            existing_days = {s.get("date"): s for s in user_doc["sentiments"]}
             sentiments = sorted(user_doc["sentiments"], key=lambda x: x.get("date", ""))[-7:]
             previous_scores = [s.get("mental_score", 80) for s in sentiments]
     except Exception as e:
@@ -190,7 +242,7 @@ def process_daily_messages(journals, user_id):
 
     # Get today's date
     today = datetime.now().strftime("%Y-%m-%d")
-    cutoff_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+    cutoff_date = (datetime.now() - timedelta(days=SENTIMENT_RETENTION_DAYS)).strftime("%Y-%m-%d")
 
     # Ensure user document exists
     sentiment_collection.update_one(
@@ -202,11 +254,17 @@ def process_daily_messages(journals, user_id):
     # Process each day's messages
     for day, messages in day_data.items():
         try:
-            if day < today and already_analyzed(user_id_str, day):
+            if not force and day < today and day in existing_days:
                 continue
             if not messages:
                 continue
 
+            # Skip days the per-message scorer already covered in full
+            scored_ids = {m.get("message_id") for m in existing_days.get(day, {}).get("message_scores", [])}
+            message_ids = [m.get("message_id") for m in day_messages[day]]
+            if not force and all(message_ids) and set(message_ids) <= scored_ids:
+                continue
+
             # Analyze each message individually
             message_analyses = []
             for message in messages:
@@ -215,52 +273,16 @@ def process_daily_messages(journals, user_id):
 
             # Aggregate scores
             if message_analyses:
-                scores = [analysis["mental_score"] for analysis in message_analyses]
-                avg_score = sum(scores) / len(scores) if scores else 80
-                # Scale to ensure 0–100 range
-                mental_score = max(0, min(100, avg_score))
-
-                # Determine dominant emotional state
-                emotional_states_count = defaultdict(int)
-                for analysis in message_analyses:
-                    state = analysis["emotional_state"]
-                    emotional_states_count[state] += 1
-                dominant_state = max(emotional_states_count.items(), key=lambda x: x[1])[0] if emotional_states_count else "None"
-
-                # Combine reflections
-                reflection_texts = [analysis["reflection_text"] for analysis in message_analyses]
-                reflection_text = " ".join(reflection_texts[:2])  # Limit to 2 for brevity
-
-                # Collect supporting texts (up to 3)
-                supporting_texts = []
-                for analysis in message_analyses:
-                    supporting_texts.extend(analysis["supporting_text"])
-                    if len(supporting_texts) >= 3:
-                        break
-                supporting_texts = supporting_texts[:3]
-                encrypted_supporting_texts = [text for text in supporting_texts]
-
-                # Collect suggestions (up to 3, prioritize unique ones)
-                suggestions = []
-                for analysis in message_analyses:
-                    for suggestion in analysis["suggestions"]:
-                        if suggestion not in suggestions and len(suggestions) < 3:
-                            suggestions.append(suggestion)
-
-                # Add slight variation to default scores
-                if dominant_state == "None" and abs(mental_score - 80) < 0.1:
-                    variation = random.uniform(-2, 2)
-                    mental_score = 80 + variation
-
-                sentiment_data = {
-                    "date": day,
-                    "mental_score": mental_score,
-                    "emotional_state": dominant_state,
-                    "reflection_text": reflection_text or "Today seems steady. Keep nurturing your well-being! 🌱",
-                    "supporting_text": encrypted_supporting_texts,
-                    "suggestions": suggestions or ["Keep sharing your thoughts to help me support you better!"],
-                    "message_count": len(messages)
-                }
+                sentiment_data = {"date": day, **aggregate_message_analyses(message_analyses, len(messages))}
+                sentiment_data["message_scores"] = [
+                    {
+                        "message_id": msg.get("message_id"),
+                        "created_at": msg.get("created_at"),
+                        "mental_score": analysis["mental_score"],
+                        "emotional_state": state_key(analysis["emotional_state"])
+                    }
+                    for msg, analysis in zip(day_messages[day], message_analyses)
+                ]
 
                 # Remove existing sentiment for this day and update
                 sentiment_collection.update_one(
@@ -269,13 +291,324 @@ def process_daily_messages(journals, user_id):
                 )
                 sentiment_collection.update_one(
                     {"user_id": user_id_str},
-                    {"$push": {"sentiments": sentiment_data}}
+                    {"$push": {"sentiments": {"$each": [sentiment_data], "$sort": {"date": 1}}}}
                 )
         except Exception as e:
             print(f"Error processing day {day}: {e}")
 
-    # Remove sentiments older than 30 days
+    # Remove sentiments older than the retention window
     sentiment_collection.update_one(
         {"user_id": user_id_str},
         {"$pull": {"sentiments": {"date": {"$lt": cutoff_date}}}}
-    )
\ No newline at end of file
+    )
+    refresh_sentiment_stats(user_id_str)
+
+# Background per-message scoring
+_scoring_executor = ThreadPoolExecutor(max_workers=SENTIMENT_WORKERS, thread_name_prefix="sentiment")
+
+def schedule_message_scoring(user_id, message):
+    """Queue a stored user chat message for sentiment scoring off the request thread."""
+    if not message or not message.get("content", "").strip():
+        return None
+    return _scoring_executor.submit(bind_context(score_message), str(user_id), dict(message))
+
+@traced("sentiment.score_message")
+def score_message(user_id_str, message):
+    """Analyze one user message and fold it into that day's running sentiment aggregate."""
+    try:
+        day = message["created_at"][:10]
+        user_doc = sentiment_collection.find_one(
+            {"user_id": user_id_str},
+            {"sentiments": {"$slice": -7}}
+        )
+        previous = sorted((user_doc or {}).get("sentiments", []), key=lambda x: x.get("date", ""))
+        previous_scores = [s.get("mental_score", 80) for s in previous if s.get("date") != day]
+
+        current = next((s for s in previous if s.get("date") == day), None)
+
+        analysis = analyze_single_message(message["content"], get_model(), previous_scores)
+        record_message_sentiment(user_id_str, day, message, analysis, current)
+    except Exception as e:
+        print(f"Error scoring message for user {user_id_str}: {e}")
+
+def seed_running_sums(user_id_str, day, entry):
+    """
+    Give a daily entry written before running sums existed a score_sum/scored_count
+    matching its stored mean, once; the $exists guard makes concurrent scorers no-ops.
+    """
+    count = entry.get("message_count", 1)
+    sentiment_collection.update_one(
+        {"user_id": user_id_str, "sentiments": {"$elemMatch": {"date": day, "scored_count": {"$exists": False}}}},
+        {"$set": {
+            "sentiments.$.score_sum": entry.get("mental_score", 80) * count,
+            "sentiments.$.scored_count": count
+        }}
+    )
+
+def record_message_sentiment(user_id_str, day, message, analysis, current=None):
+    """
+    Store a per-message score inline on the daily entry and update its running aggregate.
+
+    Sums, counts and suggestions change only through $inc/$push/$addToSet, so
+    concurrent scorers never overwrite each other. The derived mean and state are
+    then written only by the scorer whose update bumped the entry to its latest
+    `version`; a scorer that lost the race leaves them to the later one.
+    `current` is the day's entry as already read by the caller, if any.
+    """
+    score = max(0, min(100, float(analysis["mental_score"])))
+    state = state_key(analysis.get("emotional_state"))
+    message_score = {
+        "message_id": message.get("message_id"),
+        "created_at": message.get("created_at"),
+        "mental_score": score,
+        "emotional_state": state
+    }
+    # $each needs arrays; the model sometimes returns a bare string
+    supporting = analysis.get("supporting_text") or []
+    supporting = [supporting] if isinstance(supporting, str) else list(supporting)
+    suggestions = analysis.get("suggestions") or []
+    suggestions = [suggestions] if isinstance(suggestions, str) else list(suggestions)
+
+    sentiment_collection.update_one(
+        {"user_id": user_id_str},
+        {"$setOnInsert": {"sentiments": []}},
+        upsert=True
+    )
+    if current and "scored_count" not in current:
+        seed_running_sums(user_id_str, day, current)
+
+    for _ in range(2):
+        entry_doc = sentiment_collection.find_one_and_update(
+            {"user_id": user_id_str, "sentiments.date": day},
+            {
+                "$inc": {
+                    "sentiments.$.score_sum": score,
+                    "sentiments.$.scored_count": 1,
+                    "sentiments.$.message_count": 1,
+                    f"sentiments.$.state_counts.{state}": 1,
+                    "sentiments.$.version": 1
+                },
+                "$push": {
+                    "sentiments.$.message_scores": message_score,
+                    "sentiments.$.supporting_text": {"$each": supporting, "$slice": -3}
+                },
+                "$addToSet": {"sentiments.$.suggestions": {"$each": suggestions}}
+            },
+            projection={"sentiments.$": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if entry_doc:
+            entry = entry_doc["sentiments"][0]
+            sentiment_collection.update_one(
+                {"user_id": user_id_str, "sentiments": {"$elemMatch": {"date": day, "version": entry["version"]}}},
+                {
+                    "$set": {
+                        "sentiments.$.mental_score": entry["score_sum"] / entry["scored_count"],
+                        "sentiments.$.emotional_state": dominant_state(entry.get("state_counts")),
+                        "sentiments.$.reflection_text": analysis.get("reflection_text") or entry.get("reflection_text", "")
+                    },
+                    "$push": {"sentiments.$.suggestions": {"$each": [], "$slice": -3}}
+                }
+            )
+            schedule_stats_refresh(user_id_str)
+            return
+
+        # First scored message of the day - guarded so concurrent scorers can't add the day twice
+        new_entry = {
+            "date": day,
+            **aggregate_message_analyses([analysis], 1),
+            "mental_score": score,
+            "message_scores": [message_score],
+            "version": 1
+        }
+        result = sentiment_collection.update_one(
+            {"user_id": user_id_str, "sentiments.date": {"$ne": day}},
+            {"$push": {"sentiments": {"$each": [new_entry], "$sort": {"date": 1}}}}
+        )
+        if result.modified_count:
+            schedule_stats_refresh(user_id_str)
+            return
+
+# Materialized summary statistics
+SENTIMENT_WINDOWS = (7, 30, 90)
+DEFAULT_STRESS_THRESHOLD = 70.0
+
+def window_stats(sentiments, threshold=DEFAULT_STRESS_THRESHOLD):
+    """Summary inputs (sums, histogram, trend slices) for date-sorted daily sentiments."""
+    scores = [s.get("mental_score", 80) for s in sentiments]
+    stress_types = {}
+    for s in sentiments:
+        if s.get("mental_score", 80) < threshold:
+            stress_type = s.get("emotional_state", "None")
+            if stress_type != "None":
+                stress_types[stress_type] = stress_types.get(stress_type, 0) + 1
+
+    trend_len = min(7, len(scores) // 2) if len(scores) >= 7 else 0
+    return {
+        "days": len(scores),
+        "score_sum": sum(scores),
+        "below_threshold_days": sum(1 for score in scores if score < threshold),
+        "stress_types": stress_types,
+        "first_week_sum": sum(scores[:trend_len]),
+        "last_week_sum": sum(scores[len(scores) - trend_len:]) if trend_len else 0,
+        "trend_len": trend_len,
+        "last_scores": scores[-2:]
+    }
+
+def summary_from_stats(stats, threshold=DEFAULT_STRESS_THRESHOLD):
+    """Build the /summary payload from precomputed window stats."""
+    if not stats or not stats.get("days"):
+        return {
+            "average_score": 80,
+            "stress_types": {},
+            "trend": "stable",
+            "below_threshold_days": 0,
+            "total_days": 0
+        }
+
+    trend = "stable"
+    if stats["trend_len"]:
+        diff = (stats["last_week_sum"] - stats["first_week_sum"]) / stats["trend_len"]
+        if diff > 5:
+            trend = "improving"
+        elif diff < -5:
+            trend = "declining"
+        elif diff > 2:
+            trend = "slightly_improving"
+        elif diff < -2:
+            trend = "slightly_declining"
+
+    last_scores = stats.get("last_scores", [])
+    recent_change = last_scores[-1] - last_scores[-2] if len(last_scores) >= 2 else None
+
+    stress_types = stats.get("stress_types", {})
+    primary_stress = max(stress_types.items(), key=lambda x: x[1])[0] if stress_types else None
+
+    return {
+        "average_score": round(stats["score_sum"] / stats["days"], 1),
+        "stress_types": stress_types,
+        "trend": trend,
+        "below_threshold_days": stats["below_threshold_days"],
+        "total_days": stats["days"],
+        "threshold": threshold,
+        "recent_change": round(recent_change, 1) if recent_change is not None else None,
+        "primary_stress_type": primary_stress
+    }
+
+def filter_recent(sentiments, days_back, now=None):
+    """Return sentiments dated within the last `days_back` days, sorted by date."""
+    cutoff_date = ((now or datetime.now()) - timedelta(days=days_back)).strftime("%Y-%m-%d")
+    recent = [s for s in sentiments if s.get("date", "") >= cutoff_date]
+    recent.sort(key=lambda x: x.get("date", ""))
+    return recent
+
+def refresh_sentiment_stats(user_id_str):
+    """
+    Recompute the materialized window stats after a day's sentiment is (re)written.
+
+    Every writer pushes with $sort, so the array is already date-ordered. Documents
+    from before that have no stats yet and are sorted once, on their first refresh.
+    """
+    try:
+        sentiment_collection.update_one(
+            {"user_id": user_id_str, "stats": {"$exists": False}},
+            {"$push": {"sentiments": {"$each": [], "$sort": {"date": 1}}}}
+        )
+        user_doc = sentiment_collection.find_one({"user_id": user_id_str}, {"sentiments": 1})
+        sentiments = (user_doc or {}).get("sentiments", [])
+
+        now = datetime.now()
+        stats = {
+            "as_of": now.strftime("%Y-%m-%d"),
+            "total_days": len(sentiments),
+            "windows": {str(days): window_stats(filter_recent(sentiments, days, now)) for days in SENTIMENT_WINDOWS}
+        }
+        sentiment_collection.update_one(
+            {"user_id": user_id_str},
+            {"$set": {"stats": stats}, "$unset": {"summary_cache": ""}}
+        )
+        return stats
+    except Exception as e:
+        print(f"Error refreshing sentiment stats for user {user_id_str}: {e}")
+        return None
+
+class StatsRefresher:
+    """
+    Coalesces stats refreshes requested by the per-message scorer: a user's stats
+    are recomputed at most once per interval, however many messages were scored.
+    """
+
+    def __init__(self, interval_seconds):
+        self.interval_seconds = interval_seconds
+        self.due = {}
+        self.lock = threading.Lock()
+        self.pid = None
+
+    def request(self, user_id_str):
+        if self.interval_seconds <= 0:
+            refresh_sentiment_stats(user_id_str)
+            return
+        self.ensure_started()
+        with self.lock:
+            self.due.setdefault(user_id_str, time.monotonic() + self.interval_seconds)
+
+    def ensure_started(self):
+        if self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+            # Requests inherited from the parent process belong to its thread
+            self.due.clear()
+        threading.Thread(target=self._run, name="sentiment-stats", daemon=True).start()
+
+    def _run(self):
+        while True:
+            time.sleep(1)
+            now = time.monotonic()
+            with self.lock:
+                ready = [user for user, due in self.due.items() if due <= now]
+                for user in ready:
+                    del self.due[user]
+            for user in ready:
+                refresh_sentiment_stats(user)
+
+stats_refresher = StatsRefresher(SENTIMENT_STATS_REFRESH_SECONDS)
+
+def schedule_stats_refresh(user_id_str):
+    stats_refresher.request(user_id_str)
+
+def get_sentiment_summary(user_id_str, days_back=30, threshold=DEFAULT_STRESS_THRESHOLD):
+    """Summary payload for /summary, served from the materialized stats or the per-window cache."""
+    cache_key = f"{days_back}_{threshold:g}".replace(".", "_")
+    today = datetime.now().strftime("%Y-%m-%d")
+
+    user_doc = sentiment_collection.find_one(
+        {"user_id": user_id_str},
+        {"_id": 0, "stats": 1, f"summary_cache.{cache_key}": 1}
+    )
+    if not user_doc:
+        return summary_from_stats(None)
+
+    # Materialized windows cover the default threshold
+    if days_back in SENTIMENT_WINDOWS and threshold == DEFAULT_STRESS_THRESHOLD:
+        stats = user_doc.get("stats")
+        if not stats or stats.get("as_of") != today:
+            stats = refresh_sentiment_stats(user_id_str)
+        if stats:
+            return summary_from_stats(stats["windows"].get(str(days_back)), threshold)
+
+    cached = user_doc.get("summary_cache", {}).get(cache_key)
+    if cached and cached.get("as_of") == today:
+        return cached["summary"]
+
+    # Ad-hoc window or threshold: compute once and cache until the next rewrite
+    user_doc = sentiment_collection.find_one({"user_id": user_id_str}, {"_id": 0, "sentiments": 1})
+    sentiments = filter_recent((user_doc or {}).get('sentiments', []), days_back)
+    summary = summary_from_stats(window_stats(sentiments, threshold), threshold)
+    sentiment_collection.update_one(
+        {"user_id": user_id_str},
+        {"$set": {f"summary_cache.{cache_key}": {"as_of": today, "summary": summary}}}
+    )
+    return summary
@@ -0,0 +1,70 @@
+"""
+Stored story and daily motivation.
+
+The user story lives on the brain document as {"text", "fingerprint",
+"generated_at"} where the fingerprint hashes the inputs it was written from
+(demographics, goals and the prompt version); it is regenerated only when that
+hash changes. The daily motivation lives on the journal document as {"text",
+"date", "generated_at"}, is generated at most once per IST day and is dropped by
+export_journal so a new journal gets a fresh message.
+"""
+import hashlib
+import json
+from database import models
+from database.models import get_current_time
+from database.repository import story_profile
+from utils.identity import user_filter, user_key
+from utils.user_utils import (
+    STORY_PROMPT_VERSION, story_inputs, fallback_user_story, fallback_motivation,
+    generate_user_story, generate_motivational_message_from_chat_history
+)
+
+# Enough recent journals to cover the last 10 messages the prompt uses
+MOTIVATION_JOURNALS = 5
+
+def story_fingerprint(user_data):
+    demographics, goals = story_inputs(user_data)
+    payload = json.dumps([STORY_PROMPT_VERSION, demographics, goals], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def get_user_story(user_id):
+    """The stored story, regenerated when its inputs changed. None when there is no brain document."""
+    user = story_profile(user_id, with_story=True)
+    if not user:
+        return None
+    fingerprint = story_fingerprint(user)
+    stored = user.get("story") or {}
+    if stored.get("fingerprint") == fingerprint and stored.get("text"):
+        return stored["text"]
+
+    story = generate_user_story(user, fallback=False)
+    if not story:
+        # Not persisted, so the next request tries again
+        return fallback_user_story(user)
+    models.brain_collection.update_one(
+        user_filter(user_id),
+        {"$set": {"story": {"text": story, "fingerprint": fingerprint, "generated_at": get_current_time()}}}
+    )
+    return story
+
+def get_daily_motivation(user_id):
+    """Today's motivation, generated on the first request of the day. None when there is no journal document."""
+    key = user_key(user_id)
+    doc = models.journal_collection.find_one({"user_id": key}, {"motivation": 1})
+    if doc is None:
+        return None
+    today = get_current_time()[:10]
+    stored = doc.get("motivation") or {}
+    if stored.get("date") == today and stored.get("text"):
+        return stored["text"]
+
+    recent = models.journal_collection.find_one({"user_id": key}, {"journals": {"$slice": -MOTIVATION_JOURNALS}})
+    journal_data = {"journals": (recent or {}).get("journals", [])}
+    motivation = generate_motivational_message_from_chat_history(journal_data, fallback=False)
+    if not motivation:
+        return fallback_motivation(journal_data)
+    models.journal_collection.update_one(
+        {"user_id": key},
+        {"$set": {"motivation": {"text": motivation, "date": today, "generated_at": get_current_time()}}}
+    )
+    return motivation
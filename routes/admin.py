@@ -0,0 +1,84 @@
+"""
+Profiles and memory introspection for operators.
+
+Registered only when ADMIN_SECRET is set (app.py), and every request must carry
+a matching Admin-Secret header: tracemalloc and object counts are expensive in
+a production worker.
+"""
+from flask import Blueprint, jsonify, request, send_file
+from utils.profiler import is_admin_request, list_profiles, profile_path, PROFILE_ID
+from utils.memory import (
+    memory_report, start_tracemalloc, stop_tracemalloc, take_snapshot, compare_snapshots, tracemalloc_status
+)
+import os
+
+MAX_TRACEMALLOC_FRAMES = 25
+
+admin_bp = Blueprint("admin", __name__, url_prefix="/api/admin")
+
+@admin_bp.before_request
+def require_admin_secret():
+    if not is_admin_request():
+        return jsonify({"error": "Unauthorized"}), 401
+
+@admin_bp.route("/profiles", methods=["GET"])
+def get_profiles():
+    return jsonify({"profiles": list_profiles()}), 200
+
+@admin_bp.route("/profiles/<profile_id>", methods=["GET"])
+def download_profile(profile_id):
+    """The raw pstats file; ?format=txt for the text summary."""
+    extension = "txt" if request.args.get("format") == "txt" else "prof"
+    if not PROFILE_ID.match(profile_id):
+        return jsonify({"error": "Invalid profile id"}), 400
+    path = profile_path(profile_id, extension)
+    if not os.path.isfile(path):
+        return jsonify({"error": "Profile not found"}), 404
+    return send_file(
+        os.path.abspath(path),
+        mimetype="text/plain" if extension == "txt" else "application/octet-stream",
+        as_attachment=True,
+        download_name=f"{profile_id}.{extension}"
+    )
+
+@admin_bp.route("/memory", methods=["GET"])
+def get_memory():
+    """RSS, gc and cache sizes of the worker that serves the request; ?objects=1 counts gc objects."""
+    return jsonify(memory_report(count_objects=request.args.get("objects") == "1")), 200
+
+@admin_bp.route("/memory/tracemalloc", methods=["POST"])
+def toggle_tracemalloc():
+    data = request.get_json(silent=True) or {}
+    if data.get("enabled", True):
+        try:
+            frames = int(data.get("frames", 1))
+        except (TypeError, ValueError):
+            return jsonify({"error": "frames must be an integer"}), 400
+        start_tracemalloc(min(max(frames, 1), MAX_TRACEMALLOC_FRAMES))
+    else:
+        stop_tracemalloc()
+    return jsonify(tracemalloc_status()), 200
+
+@admin_bp.route("/memory/snapshots", methods=["POST"])
+def create_snapshot():
+    try:
+        snapshot_id = take_snapshot()
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 409
+    return jsonify({"snapshot_id": snapshot_id}), 201
+
+@admin_bp.route("/memory/snapshots/diff", methods=["GET"])
+def diff_snapshots():
+    """Top allocation growth between ?from= and ?to= (default: the current, unstored state)."""
+    older_id = request.args.get("from")
+    if not older_id:
+        return jsonify({"error": "from is required"}), 400
+    newer_id = request.args.get("to")
+    top = request.args.get("top", 20, type=int)
+    try:
+        diff = compare_snapshots(older_id, newer_id, top)
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 409
+    except KeyError:
+        return jsonify({"error": "Unknown snapshot id"}), 404
+    return jsonify({"from": older_id, "to": newer_id or "now", "top": diff}), 200
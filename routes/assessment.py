@@ -2,8 +2,9 @@ from flask import Blueprint, request, jsonify
 from datetime import datetime
 from bson.objectid import ObjectId
 from utils.user_utils import get_user_id
+from utils.identity import user_key, user_filter
 from database.models import brain_collection, users_collection
-from functions.gsheet import append_to_google_sheet
+from functions.gsheet import enqueue_assessment_row
 
 assessment_bp = Blueprint("assessment", __name__, url_prefix="/api/assessment")
 
@@ -14,9 +15,9 @@ def store_assessment(user_id, answers, score, demographics):
         "timestamp": datetime.utcnow()
     }
     brain_collection.update_one(
-    {"user_id": ObjectId(user_id)},
+    user_filter(user_id),
     {
-        "$setOnInsert": {"demographics": demographics},
+        "$setOnInsert": {"user_id": user_key(user_id), "demographics": demographics},
         "$push": {"assessments": assessment_data}
     },
     upsert=True
@@ -92,8 +93,8 @@ def mental_health_assessment():
 
     # Store in brain collection
     brain_collection.update_one(
-        {"user_id": ObjectId(user_id)},
-        {"$push": {"assessments": assessment_data}},
+        user_filter(user_id),
+        {"$setOnInsert": {"user_id": user_key(user_id)}, "$push": {"assessments": assessment_data}},
         upsert=True
     )
 
@@ -103,8 +104,8 @@ def mental_health_assessment():
         {"$set": {"assessment_flag": 1}}
     )
 
-    # Call Google Sheets logger
-    append_to_google_sheet({
+    # Queue the row for the background Google Sheets export
+    enqueue_assessment_row({
         **demographics,
         "assessment": {
             "answers": scored_answers,
@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
+from utils.passwords import hash_password, verify_password, needs_rehash, PasswordHasherBusy
 import uuid
 from datetime import datetime, timedelta
 from database.models import users_collection, get_current_time, sessions_collection
@@ -7,8 +7,9 @@ from functions.auth_functions import (
     generate_token, 
     decode_token, 
     verify_jwt_token,
-    send_welcome_email,
 )
+from functions.email_outbox import enqueue_welcome_email
+from utils.auth_middleware import revocation_filter
 
 auth_bp = Blueprint("auth", __name__, url_prefix="/api/auth")
 
@@ -23,7 +24,10 @@ def register():
         return jsonify({"error": "All fields are required"}), 400
     if users_collection.find_one({"email": email}):
         return jsonify({"error": "User already exists"}), 409
-    hashed_password = generate_password_hash(password)
+    try:
+        hashed_password = hash_password(password)
+    except PasswordHasherBusy:
+        return jsonify({"error": "Server busy, please try again"}), 503
     current_time=get_current_time()
     user_data = {
         "username": username,
@@ -32,7 +36,7 @@ def register():
         "created_at": current_time
     }
     result = users_collection.insert_one(user_data)
-    send_welcome_email(email, username)  # Send email after registration
+    enqueue_welcome_email(email, username)  # Sent in the background by the outbox
     return jsonify({"username": username,"email": email, "message": "User registered successfully"}), 201
 
 #Login Route
@@ -48,8 +52,22 @@ def login():
 
     # Find user in users_collection
     user = users_collection.find_one({"email": email})
-    if not user or not check_password_hash(user["password"], password):
-        return jsonify({"error": "Invalid credentials"}), 401
+    try:
+        if not user or not verify_password(user["password"], password):
+            return jsonify({"error": "Invalid credentials"}), 401
+    except PasswordHasherBusy:
+        return jsonify({"error": "Server busy, please try again"}), 503
+
+    # Upgrade hashes made with an older algorithm or cost while we have the plaintext;
+    # best effort, the password is already verified
+    if needs_rehash(user["password"]):
+        try:
+            users_collection.update_one(
+                {"_id": user["_id"], "password": user["password"]},
+                {"$set": {"password": hash_password(password)}}
+            )
+        except PasswordHasherBusy:
+            print(f"⚠️ Skipped password rehash for user {user['_id']}: hashing pool busy")
 
     # Create new session
     session_id = str(uuid.uuid4())
@@ -92,7 +110,10 @@ def reset_password():
         return jsonify({"error": "User not found"}), 404
 
     # Update password
-    hashed_password = generate_password_hash(new_password)
+    try:
+        hashed_password = hash_password(new_password)
+    except PasswordHasherBusy:
+        return jsonify({"error": "Server busy, please try again"}), 503
     users_collection.update_one(
         {"email": email},
         {"$set": {"password": hashed_password}}
@@ -101,7 +122,7 @@ def reset_password():
     # Invalidate all existing sessions for security
     sessions_collection.update_many(
         {"user_id": str(user["_id"]), "active": True},
-        {"$set": {"active": False}}
+        {"$set": {"active": False, "revoked_at": datetime.utcnow()}}
     )
 
     return jsonify({"message": "Password reset successfully"}), 200
@@ -130,5 +151,10 @@ def logout():
     if not decoded_token:
         return jsonify({"error": "Invalid token"}), 401
     session_id = decoded_token.get("session_id")
-    sessions_collection.delete_one({"session_id": session_id})
+    # Keep the session as a revocation record so every worker's filter picks it up
+    sessions_collection.update_one(
+        {"session_id": session_id},
+        {"$set": {"active": False, "revoked_at": datetime.utcnow()}}
+    )
+    revocation_filter.revoke(session_id)
     return jsonify({"message": "Logout successful"}), 200
\ No newline at end of file
@@ -1,19 +1,31 @@
 from flask import Blueprint, request, jsonify
-from database.models import chat_collection, brain_collection, get_current_time, journal_collection
+from database.models import chat_collection, get_current_time
+from database.repository import (
+    chat_flags,
+    chat_messages,
+    set_typing_flag_and_tail,
+    latest_memory,
+    latest_journal,
+    journals,
+    user_name
+)
 from utils.user_utils import get_user_id
+from utils.identity import user_key, user_object_id
 from functions.chat_functions import (
     is_first_user_message_today,
     check_and_set_journal_start,
     is_important_message,
     generate_ai_response,
-    export_journal
+    export_journal,
+    split_message_chunks
 )
+from functions.sentiment_functions import schedule_message_scoring
 import uuid
 from datetime import datetime 
 import pytz
-from bson.objectid import ObjectId
 from twilio.twiml.messaging_response import MessagingResponse
 from config import SYSTEM_SECRET
+from utils.tracing import span
 
 chat_bp = Blueprint("chat", __name__, url_prefix="/api/chat")
 
@@ -27,21 +39,19 @@ def chat():
     if not user_id_str:
         return jsonify({"error": "Unauthorized"}), 401
     
-    try:
-        user_id_obj = user_id_str
-    except:
-        return jsonify({"error": "Invalid user ID"}), 400
+    user_id_obj = user_key(user_id_str)
     
-    user_doc = chat_collection.find_one({"user_id": user_id_obj})
-    if not user_doc:
-        user_doc = {
-            "user_id": user_id_obj,
-            "messages": [],
-            "typing_flag": 0,
-            "journal_start_flag": 0,
-            "journal_end_flag": 0
-        }
-        chat_collection.insert_one(user_doc)
+    with span("chat.load"):
+        user_doc = chat_messages(user_id_obj)
+        if not user_doc:
+            user_doc = {
+                "user_id": user_id_obj,
+                "messages": [],
+                "typing_flag": 0,
+                "journal_start_flag": 0,
+                "journal_end_flag": 0
+            }
+            chat_collection.insert_one(user_doc)
 
     messages = user_doc["messages"]
     typing_flag = user_doc.get("typing_flag", 0)
@@ -60,6 +70,7 @@ def chat():
     key_data_flag = 1 if is_important_message(user_input) else 0
     user_message = {
         "role": "User",
+        "message_id": str(uuid.uuid4()),
         "content": user_input,
         "created_at": current_time,
         "key_data_flag": key_data_flag
@@ -74,9 +85,10 @@ def chat():
         )
 
     # Generate AI response
-    response_data = generate_ai_response(user_input, user_id_obj)
+    with span("chat.generate"):
+        response_data = generate_ai_response(user_input, user_id_obj)
     ai_response = response_data.get("message", "").strip()
-    message_chunks = [part.strip() for part in ai_response.split("|||")]
+    message_chunks = split_message_chunks(ai_response)
     response_id = response_data.get("response_id", "").strip()
     
     ai_message = {
@@ -88,7 +100,9 @@ def chat():
     }
     messages.append(ai_message)
 
-    chat_collection.update_one({"user_id": user_id_obj}, {"$set": {"messages": messages}})
+    with span("chat.persist", message_count=len(messages)):
+        chat_collection.update_one({"user_id": user_id_obj}, {"$set": {"messages": messages}})
+        schedule_message_scoring(user_id_obj, user_message)
     
     return jsonify({
         "role": "AI",
@@ -113,9 +127,9 @@ def whatsapp_chat():
     if not user_input:
         return "No message", 200
 
-    user_id_obj = from_number
+    user_id_obj = user_key(from_number)
 
-    user_doc = chat_collection.find_one({"user_id": user_id_obj})
+    user_doc = chat_messages(user_id_obj)
     if not user_doc:
         user_doc = {
             "user_id": user_id_obj,
@@ -135,6 +149,7 @@ def whatsapp_chat():
     key_data_flag = 1 if is_important_message(user_input) else 0
     user_message = {
         "role": "User",
+        "message_id": str(uuid.uuid4()),
         "content": user_input,
         "created_at": current_time,
         "key_data_flag": key_data_flag
@@ -144,7 +159,7 @@ def whatsapp_chat():
     # Generate AI response
     response_data = generate_ai_response(user_input, user_id_obj)
     ai_response = response_data.get("message", "").strip()
-    message_chunks = [part.strip() for part in ai_response.split("|||") if part.strip()]
+    message_chunks = split_message_chunks(ai_response, drop_empty=True)
 
     ai_message = {
         "role": "AI",
@@ -156,6 +171,7 @@ def whatsapp_chat():
     messages.append(ai_message)
 
     chat_collection.update_one({"user_id": user_id_obj}, {"$set": {"messages": messages}})
+    schedule_message_scoring(user_id_obj, user_message)
 
     # Send each chunk as a separate WhatsApp message
     twilio_resp = MessagingResponse()
@@ -185,12 +201,7 @@ def check_typing_flag():
         return jsonify({"error": "Missing or invalid token"}), 401
 
     user_id_obj = get_user_id(auth_header)
-    chat_collection.update_one(
-        {"user_id": user_id_obj},
-        {"$set": {"typing_flag": 1}}
-    )
-    
-    user_doc = chat_collection.find_one({"user_id": user_id_obj})
+    user_doc = set_typing_flag_and_tail(user_id_obj, 1)
 
     if not user_doc or user_doc.get("typing_flag") != 1:
         return jsonify({"message": "No action needed"}), 200
@@ -243,7 +254,7 @@ def end_journal():
 
     # If scheduler is calling this
     if system_secret == SYSTEM_SECRET and user_id:
-        user_doc = chat_collection.find_one({"user_id": user_id})
+        user_doc = chat_flags(user_id)
         if not user_doc:
             return jsonify({"error": "User not found"}), 404
 
@@ -264,7 +275,7 @@ def end_journal():
         return jsonify({"error": "Missing or invalid token"}), 401
 
     user_id = get_user_id(auth_header)
-    user_doc = chat_collection.find_one({"user_id": user_id})
+    user_doc = chat_flags(user_id)
 
     if not user_doc:
         return jsonify({"error": "User not found"}), 404
@@ -287,13 +298,8 @@ def get_journals():
         return jsonify({"error": "Missing or invalid token"}), 401
 
     user_id = get_user_id(auth_header)
-    journal_doc = journal_collection.find_one({"user_id": user_id})
-
-    if not journal_doc or not journal_doc.get("journals"):
-        return jsonify({"journals": []})
-
-    journals = journal_doc["journals"]
-    return jsonify({"journals": journals})
+    entries = journals(user_id)
+    return jsonify({"journals": entries or []})
 
 @chat_bp.route('/should_initiate_message', methods=['POST'])
 def should_initiate_message():
@@ -302,21 +308,17 @@ def should_initiate_message():
         return jsonify({"error": "Missing or invalid token"}), 401
 
     user_id = get_user_id(auth_header)
-    user = brain_collection.find_one({"user_id": ObjectId(user_id)})
+    assessment, memory_entry = latest_memory(user_id)
 
-    if not user or not user.get("memory_timeline"):
+    if not memory_entry:
         return jsonify({"should_initiate": False})
 
-    latest_memory = user["memory_timeline"][-1]
-    last_msg_date = latest_memory.get("date")
-    last_msg_time = latest_memory.get("last_message_time")
-    memory = latest_memory.get("memory", "")
+    last_msg_date = memory_entry.get("date")
+    last_msg_time = memory_entry.get("last_message_time")
+    memory = memory_entry.get("memory", "")
 
     # ✅ Updated: Get name from demographics inside assessments[]
-    try:
-        name = user.get("assessments", [])[-1]["demographics"].get("name", "there")
-    except (IndexError, AttributeError):
-        name = "there"
+    name = ((assessment or {}).get("demographics") or {}).get("name", "there")
 
     try:
         last_interaction = datetime.strptime(f"{last_msg_date} {last_msg_time}", "%Y-%m-%d %H:%M:%S")
@@ -338,15 +340,11 @@ def should_initiate_message():
         else:
             greeting = "It's late, hope you're getting some rest"
 
-        ejournal_doc = journal_collection.find_one(
-            {"user_id": user_id},
-            sort=[("journals.exported_at", -1)]
-        )
+        journal_entry = latest_journal(user_id)
 
         recent_message = None
-        if ejournal_doc and ejournal_doc.get("journals"):
-            latest_journal = ejournal_doc["journals"][-1]
-            for msg in reversed(latest_journal.get("messages", [])):
+        if journal_entry:
+            for msg in reversed(journal_entry.get("messages", [])):
                 if msg["role"] == "User":
                     recent_message = msg["content"]
                     break
@@ -355,7 +353,7 @@ def should_initiate_message():
             recent_message = "something you shared last time."
 
         message = f"Hey {name}, it’s been a while since we last talked. ||| I remember you said: \"{recent_message}\". ||| I’ve been thinking about you and wondering how you’ve been feeling since then. ||| Whenever you’re ready, I’m here to listen—whether you want to pick up where we left off or talk about something new."
-        message_parts = [part.strip() for part in message.split("|||")]
+        message_parts = split_message_chunks(message)
 
         current_time_str = now.strftime("%Y-%m-%d %H:%M:%S")
         chat_collection.update_one(
@@ -393,18 +391,11 @@ def welcome_back():
     if not user_id_str:
         return jsonify({"error": "Unauthorized"}), 401
 
-    try:
-        user_id_obj = ObjectId(user_id_str)
-    except:
+    if user_object_id(user_id_str) is None:
         return jsonify({"error": "Invalid user ID"}), 400
 
-    user = brain_collection.find_one({"user_id": user_id_obj})
-
     # ✅ Get name from updated schema
-    try:
-        name = user.get("assessments", [])[-1]["demographics"].get("name", "there")
-    except (IndexError, AttributeError):
-        name = "there"
+    name = user_name(user_id_str)
 
     # 🕒 Determine time-based greeting
     now = get_current_time(return_str=False)
@@ -437,7 +428,7 @@ def welcome_back():
 
     current_time = get_current_time()
     response_id = str(uuid.uuid4())
-    message_chunks = [part.strip() for part in message.split("|||")]
+    message_chunks = split_message_chunks(message)
 
     ai_message = {
         "role": "AI",
@@ -471,7 +462,7 @@ def get_messages():
     if not user_id_str:
         return jsonify({"error": "Unauthorized"}), 401
 
-    user_doc = chat_collection.find_one({"user_id": user_id_str})
+    user_doc = chat_messages(user_id_str)
     if not user_doc:
         return jsonify({"messages": []})
 
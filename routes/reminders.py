@@ -3,49 +3,20 @@ from database.models import reminder_collection
 from bson import ObjectId
 from datetime import datetime, timedelta
 import logging
-import pytz
+from utils.identity import user_key
+from functions.reminder_functions import (
+    REMINDER_DOCS,
+    new_reminder_doc,
+    reschedule_fields,
+    serialize_reminder,
+    parse_ist,
+    advance_recurring,
+    SERIES_FIELDS
+)
 
 reminder_bp = Blueprint("reminder", __name__, url_prefix="/api/reminder")
 logger = logging.getLogger(__name__)
 
-# Timezones
-utc_tz = pytz.UTC
-ist_tz = pytz.timezone('Asia/Kolkata')
-
-def to_ist(dt):
-    if isinstance(dt, str):
-        try:
-            dt = datetime.fromisoformat(dt.replace('Z', '+00:00'))
-        except ValueError:
-            try:
-                dt = datetime.strptime(dt, "%Y-%m-%d %H:%M:%S")
-            except ValueError:
-                logger.error(f"Invalid datetime string: {dt}")
-                return None
-    if dt.tzinfo is None:
-        dt = utc_tz.localize(dt)
-    return dt.astimezone(ist_tz)
-
-def to_utc(dt):
-    if isinstance(dt, str):
-        try:
-            dt = datetime.fromisoformat(dt.replace('Z', '+00:00'))
-        except ValueError:
-            try:
-                dt = datetime.strptime(dt, "%Y-%m-%d %H:%M:%S")
-            except ValueError:
-                logger.error(f"Invalid datetime string: {dt}")
-                return None
-    if dt.tzinfo is None:
-        dt = ist_tz.localize(dt)
-    return dt.astimezone(utc_tz)
-
-def format_ist_string(dt):
-    if isinstance(dt, datetime):
-        dt = dt.astimezone(ist_tz)
-        return dt.strftime("%Y-%m-%d %H:%M:%S")
-    return dt
-
 @reminder_bp.route("/add_reminder", methods=["POST"])
 def add_reminder():
     try:
@@ -57,28 +28,17 @@ def add_reminder():
         if not all([user_id, title, scheduled_time]):
             return jsonify({"error": "Missing required fields"}), 400
 
-        ist_dt = to_ist(scheduled_time)
-        if not ist_dt:
+        try:
+            new_reminder = new_reminder_doc(user_key(user_id), title, scheduled_time, recurrence=data.get("recurrence"))
+        except ValueError as e:
+            return jsonify({"error": f"Invalid recurrence: {e}"}), 400
+        if not new_reminder:
             return jsonify({"error": "Invalid scheduled_time format. Use YYYY-MM-DD HH:MM:SS"}), 400
-        # print(f"IST DateTime: {ist_dt}")
-        # print(f"Scheduled Time: {scheduled_time}")
-        now_ist = datetime.now(ist_tz)
-        new_reminder = {
-            "_id": ObjectId(),
-            "generated_reminder": title,
-            "scheduled_time": scheduled_time,
-            "status": "pending",
-            "created_at": format_ist_string(now_ist)
-        }
-
-        result = reminder_collection.update_one(
-            {"user_id": user_id},
-            {"$push": {"reminders": new_reminder}},
-            upsert=True
-        )
-
-        if result.modified_count > 0 or result.upserted_id:
-            return jsonify({"message": "Reminder added", "reminder": new_reminder}), 201
+
+        result = reminder_collection.insert_one(new_reminder)
+
+        if result.inserted_id:
+            return jsonify({"message": "Reminder added", "reminder": serialize_reminder(new_reminder)}), 201
         else:
             return jsonify({"error": "Failed to add reminder"}), 500
 
@@ -92,30 +52,57 @@ def get_all_reminders():
     if not user_id:
         return jsonify({"error": "Missing user_id"}), 400
 
-    now = datetime.now(ist_tz)
-    user = reminder_collection.find_one({"user_id": user_id})
-
-    if not user:
-        return jsonify({"reminders": []}), 200
-
-    reminders = []
-    for reminder in user.get("reminders", []):
-        try:
-            scheduled_str = reminder.get("scheduled_time")
-            scheduled_dt = datetime.strptime(scheduled_str, "%Y-%m-%d %H:%M:%S")
-            is_due = scheduled_dt <= now and reminder.get("status") == "pending"
-        except Exception as e:
-            logger.warning(f"Could not parse scheduled_time: {scheduled_str}")
-            is_due = False
-
-        reminder_copy = reminder.copy()
-        reminder_copy["_id"] = str(reminder_copy["_id"])
-        reminder_copy["is_due"] = is_due
-        reminders.append(reminder_copy)
-
-    reminders.sort(key=lambda x: x.get("scheduled_time", ""))
+    # Optional IST window in which recurring reminders are expanded into occurrences
+    window = None
+    if request.args.get("from") or request.args.get("to"):
+        window = (parse_ist(request.args.get("from")), parse_ist(request.args.get("to")))
+        if None in window:
+            return jsonify({"error": "Invalid window. Use from/to as YYYY-MM-DD HH:MM:SS"}), 400
+
+    now = datetime.utcnow()
+    cursor = reminder_collection.find(
+        {"user_id": user_key(user_id), **REMINDER_DOCS}, {"exceptions": 0} if not window else None
+    )
+    reminders = [serialize_reminder(reminder, now, window) for reminder in cursor.sort("due_at", 1)]
     return jsonify({"reminders": reminders}), 200
 
+def update_recurring_occurrence(reminder, reminder_filter, status, data):
+    """done/not_done on a recurring reminder only affect one occurrence, never the series."""
+    occurrence = data.get("occurrence") or reminder["occurrence"]
+    if parse_ist(occurrence) is None:
+        return jsonify({"error": "Invalid occurrence format"}), 400
+    is_current = occurrence == reminder["occurrence"]
+
+    if status == "done":
+        if is_current:
+            update = advance_recurring(reminder)
+            if update is None:
+                reminder_collection.delete_one(reminder_filter)
+                return jsonify({"message": "Reminder deleted"}), 200
+            reminder_collection.update_one(reminder_filter, update)
+            return jsonify({"message": "Occurrence done", "next_time": update["$set"]["scheduled_time"]}), 200
+        exception = {"occurrence": occurrence, "status": "done"}
+        update = {"$push": {"exceptions": exception}}
+    else:
+        new_time = data.get("scheduled_time")
+        if not new_time:
+            return jsonify({"error": "Missing scheduled_time"}), 400
+        moved = parse_ist(new_time)
+        if moved is None:
+            return jsonify({"error": "Invalid time format"}), 400
+        new_time = (moved + timedelta(hours=1)).strftime("%Y-%m-%d %H:%M:%S")
+        exception = {"occurrence": occurrence, "status": "not_done", "scheduled_time": new_time}
+        update = {"$push": {"exceptions": exception}}
+        if is_current:
+            update["$set"] = {**reschedule_fields(new_time), "occurrence": occurrence}
+
+    # Replace any earlier exception for the same occurrence
+    reminder_collection.update_one(reminder_filter, {"$pull": {"exceptions": {"occurrence": occurrence}}})
+    reminder_collection.update_one(reminder_filter, update)
+    if status == "done":
+        return jsonify({"message": "Occurrence done"}), 200
+    return jsonify({"message": "Reminder rescheduled", "new_time": new_time}), 200
+
 @reminder_bp.route("/update_reminder", methods=["POST"])
 def update_reminder():
     try:
@@ -129,29 +116,23 @@ def update_reminder():
         if not user_id or not reminder_id:
             return jsonify({"error": "Missing user_id or reminder_id"}), 400
 
-        reminder_oid = ObjectId(reminder_id)
-
-        # Fetch user document
-        user_doc = reminder_collection.find_one({"user_id": user_id})
-        if not user_doc:
-            return jsonify({"error": "User not found"}), 404
+        reminder_filter = {"_id": ObjectId(reminder_id), "user_id": user_key(user_id)}
 
-        # Find the reminder index
-        reminders = user_doc.get("reminders", [])
-        index = next((i for i, r in enumerate(reminders) if r["_id"] == reminder_oid), -1)
-
-        if index == -1:
-            return jsonify({"error": "Reminder not found"}), 404
+        if status in ("done", "not_done"):
+            reminder = reminder_collection.find_one(
+                reminder_filter, {"recurrence": 1, "dtstart": 1, "occurrence": 1, "exceptions": 1}
+            )
+            if not reminder:
+                return jsonify({"error": "Reminder not found"}), 404
+            if reminder.get("recurrence"):
+                return update_recurring_occurrence(reminder, reminder_filter, status, data)
 
         # DELETE reminder
         if status == "done":
-            result = reminder_collection.update_one(
-                {"user_id": user_id},
-                {"$pull": {"reminders": {"_id": reminder_oid}}}
-            )
-            if result.modified_count:
+            result = reminder_collection.delete_one(reminder_filter)
+            if result.deleted_count:
                 return jsonify({"message": "Reminder deleted"}), 200
-            return jsonify({"error": "Reminder not deleted"}), 404
+            return jsonify({"error": "Reminder not found"}), 404
 
         # RESCHEDULE reminder
         if status == "not_done":
@@ -163,38 +144,48 @@ def update_reminder():
             except Exception:
                 return jsonify({"error": "Invalid time format"}), 400
 
-            update_path = f"reminders.{index}"
-            update_fields = {
-                f"{update_path}.scheduled_time": new_time,
-                f"{update_path}.status": "pending"
-            }
+            update_fields = reschedule_fields(new_time)
             if new_title:
-                update_fields[f"{update_path}.generated_reminder"] = new_title
+                update_fields["generated_reminder"] = new_title
 
-            result = reminder_collection.update_one({"user_id": user_id}, {"$set": update_fields})
-            if result.modified_count:
+            result = reminder_collection.update_one(reminder_filter, {"$set": update_fields})
+            if result.matched_count:
                 return jsonify({"message": "Reminder rescheduled", "new_time": new_time}), 200
-            return jsonify({"error": "Reminder not updated"}), 404
+            return jsonify({"error": "Reminder not found"}), 404
 
         # GENERIC UPDATE
         update_fields = {}
-        update_path = f"reminders.{index}"
         if new_title:
-            update_fields[f"{update_path}.generated_reminder"] = new_title
-        if new_time:
-            try:
-                datetime.strptime(new_time, "%Y-%m-%d %H:%M:%S")
-                update_fields[f"{update_path}.scheduled_time"] = new_time
-            except Exception:
-                return jsonify({"error": "Invalid time format"}), 400
+            update_fields["generated_reminder"] = new_title
+        new_rule = data.get("recurrence")
+        if new_time or new_rule:
+            if new_time:
+                try:
+                    datetime.strptime(new_time, "%Y-%m-%d %H:%M:%S")
+                except Exception:
+                    return jsonify({"error": "Invalid time format"}), 400
+            current = reminder_collection.find_one(reminder_filter, {"recurrence": 1, "dtstart": 1, "scheduled_time": 1})
+            if not current:
+                return jsonify({"error": "Reminder not found"}), 404
+            rule = new_rule or current.get("recurrence")
+            if rule:
+                # Editing the time or rule of a recurring reminder restarts the series
+                try:
+                    series = new_reminder_doc(None, None, new_time or current.get("dtstart") or current["scheduled_time"], recurrence=rule)
+                except ValueError as e:
+                    return jsonify({"error": f"Invalid recurrence: {e}"}), 400
+                update_fields.update({field: series[field] for field in SERIES_FIELDS})
+                update_fields.update({"status": "pending", "attempts": 0})
+            else:
+                update_fields.update(reschedule_fields(new_time))
 
         if not update_fields:
             return jsonify({"error": "Nothing to update"}), 400
 
-        result = reminder_collection.update_one({"user_id": user_id}, {"$set": update_fields})
-        if result.modified_count:
+        result = reminder_collection.update_one(reminder_filter, {"$set": update_fields})
+        if result.matched_count:
             return jsonify({"message": "Reminder updated"}), 200
-        return jsonify({"error": "Reminder not updated"}), 404
+        return jsonify({"error": "Reminder not found"}), 404
 
     except Exception as e:
         logger.exception("Error updating reminder")
@@ -215,17 +206,13 @@ def delete_reminder():
         if not user_id or not reminder_id:
             return jsonify({"error": "Missing required fields (user_id, reminder_id)"}), 400
 
-        # Delete the reminder from the array
-        result = reminder_collection.update_one(
-            {"user_id": user_id},
-            {"$pull": {"reminders": {"_id": ObjectId(reminder_id)}}}
-        )
+        result = reminder_collection.delete_one({"_id": ObjectId(reminder_id), "user_id": user_key(user_id)})
 
-        if result.modified_count > 0:
+        if result.deleted_count > 0:
             return jsonify({"message": "Reminder deleted successfully"}), 200
         else:
             return jsonify({"error": "Reminder not found"}), 404
 
     except Exception as e:
         logger.error(f"Error deleting reminder: {str(e)}")
-        return jsonify({"error": "An error occurred while deleting the reminder"}), 500
\ No newline at end of file
+        return jsonify({"error": "An error occurred while deleting the reminder"}), 500
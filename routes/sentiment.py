@@ -1,13 +1,25 @@
 from flask import Blueprint, request, jsonify
-from functions.sentiment_functions import process_daily_messages
+from functions.sentiment_functions import (
+    process_daily_messages,
+    filter_recent,
+    get_sentiment_summary as build_sentiment_summary
+)
+from functions.sentiment_analytics import compute_analytics
 from database.models import get_collection
 from bson import ObjectId
 from database.models import sentiment_collection, journal_collection
 from datetime import datetime, timedelta
 from utils.user_utils import get_user_id
+from config import SENTIMENT_RETENTION_DAYS
 
 sentiment_bp = Blueprint("sentiment", __name__, url_prefix="/api/sentiment")
 
+def number_arg(name, default, kind=int):
+    """Query parameter converted with `kind`; None when it is present but not a number."""
+    if name not in request.args:
+        return default
+    return request.args.get(name, type=kind)
+
 @sentiment_bp.route('/analyze', methods=['GET'])
 def analyze():
     auth_header = request.headers.get("Authorization")
@@ -51,17 +63,23 @@ def get_sentiments():
         if not user_id:
             return jsonify({"error": "Invalid user authentication"}), 401
         
-        days_back = int(request.args.get('days', 30))
+        days_back = number_arg('days', 30)
+        if days_back is None or days_back < 1:
+            return jsonify({"error": "days must be an integer of at least 1"}), 400
         data_format = request.args.get('format', 'chart')
         
-        cutoff_date = (datetime.now() - timedelta(days=days_back)).strftime("%Y-%m-%d")
-        
-        user_doc = sentiment_collection.find_one({"user_id": str(user_id)})
+        # Documents with stats are sorted by date (see refresh_sentiment_stats), so the
+        # last days_back + 1 entries cover the window; older ones are read whole
+        user_doc = sentiment_collection.find_one(
+            {"user_id": str(user_id)},
+            {"_id": 0, "stats.as_of": 1, "sentiments": {"$slice": -(days_back + 1)}}
+        )
+        if user_doc and 'stats' not in user_doc:
+            user_doc = sentiment_collection.find_one({"user_id": str(user_id)}, {"_id": 0, "sentiments": 1})
         if not user_doc or 'sentiments' not in user_doc:
             return jsonify({"data": []}), 200
         
-        sentiments = [s for s in user_doc.get('sentiments', []) if s.get('date', '') >= cutoff_date]
-        sentiments.sort(key=lambda x: x.get('date', ''))
+        sentiments = filter_recent(user_doc.get('sentiments', []), days_back)
         
         if data_format == 'chart':
             chart_data = [
@@ -92,8 +110,8 @@ def get_sentiment_summary():
     
     Query parameters:
     - user_id: required, the id of the user
-    - days: optional, number of days to look back (default: 30)
-    - threshold: optional, score threshold for counting stress types (default: 70)
+    - days: optional, number of days to look back (default: 30, at most SENTIMENT_RETENTION_DAYS)
+    - threshold: optional, score threshold for counting stress types, 0-100 rounded to a whole number (default: 70)
     
     Returns:
     - average_score: Average mental score over the period
@@ -111,79 +129,68 @@ def get_sentiment_summary():
         if not user_id:
             return jsonify({"error": "Invalid user authentication"}), 401
         
-        days_back = int(request.args.get('days', 30))
-        threshold = float(request.args.get('threshold', 70))
-        
-        cutoff_date = (datetime.now() - timedelta(days=days_back)).strftime("%Y-%m-%d")
-        
-        user_doc = sentiment_collection.find_one({"user_id": str(user_id)})
-        if not user_doc or 'sentiments' not in user_doc:
-            return jsonify({
-                "average_score": 80,
-                "stress_types": {},
-                "trend": "stable",
-                "below_threshold_days": 0,
-                "total_days": 0
-            }), 200
-        
-        sentiments = [s for s in user_doc.get('sentiments', []) if s.get('date', '') >= cutoff_date]
-        sentiments.sort(key=lambda x: x.get('date', ''))
-        
-        if not sentiments:
-            return jsonify({
-                "average_score": 80,
-                "stress_types": {},
-                "trend": "stable",
-                "below_threshold_days": 0,
-                "total_days": 0
-            }), 200
-        
-        scores = [s.get('mental_score', 80) for s in sentiments]
-        average_score = sum(scores) / len(scores) if scores else 80
-        below_threshold_days = sum(1 for score in scores if score < threshold)
-        
-        stress_types = {}
-        for s in sentiments:
-            if s.get('mental_score', 80) < threshold:
-                stress_type = s.get('emotional_state', 'None')
-                if stress_type != 'None':
-                    stress_types[stress_type] = stress_types.get(stress_type, 0) + 1
-        
-        trend = "stable"
-        if len(scores) >= 7:
-            first_week = scores[:min(7, len(scores)//2)]
-            last_week = scores[-min(7, len(scores)//2):]
-            first_avg = sum(first_week) / len(first_week)
-            last_avg = sum(last_week) / len(last_week)
-            diff = last_avg - first_avg
-            if diff > 5:
-                trend = "improving"
-            elif diff < -5:
-                trend = "declining"
-            elif diff > 2:
-                trend = "slightly_improving"
-            elif diff < -2:
-                trend = "slightly_declining"
-        
-        recent_change = None
-        if len(scores) >= 2:
-            recent_change = scores[-1] - scores[-2]
-        
-        primary_stress = None
-        if stress_types:
-            primary_stress = max(stress_types.items(), key=lambda x: x[1])[0]
-        
-        return jsonify({
-            "average_score": round(average_score, 1),
-            "stress_types": stress_types,
-            "trend": trend,
-            "below_threshold_days": below_threshold_days,
-            "total_days": len(scores),
-            "threshold": threshold,
-            "recent_change": round(recent_change, 1) if recent_change is not None else None,
-            "primary_stress_type": primary_stress
-        }), 200
+        days_back = number_arg('days', 30)
+        threshold = number_arg('threshold', 70, float)
+        if days_back is None or days_back < 1:
+            return jsonify({"error": "days must be an integer of at least 1"}), 400
+        if threshold is None or not 0 <= threshold <= 100:
+            return jsonify({"error": "threshold must be a number between 0 and 100"}), 400
+        # Each (days, threshold) pair may be cached on the user's document, so keep the set small
+        days_back = min(days_back, SENTIMENT_RETENTION_DAYS)
+        threshold = float(round(threshold))
+        summary = build_sentiment_summary(str(user_id), days_back, threshold)
+        return jsonify(summary), 200
             
     except Exception as e:
         print(f"Error retrieving sentiment summary: {e}")
-        return jsonify({"error": "Failed to retrieve sentiment summary", "details": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": "Failed to retrieve sentiment summary", "details": str(e)}), 500
+
+@sentiment_bp.route('/analytics', methods=['GET'])
+def get_sentiment_analytics():
+    """
+    Trend analytics over the stored daily mental scores.
+
+    Query parameters:
+    - days: optional, number of days to look back (default: all stored days)
+    - span: optional, EWMA span in days (default: 7)
+    - window: optional, rolling window for volatility and change points (default: 7)
+    - threshold: optional, score threshold for low-mood streaks (default: 70)
+    - z: optional, z-score above which a day is flagged as an anomaly (default: 2.5)
+
+    Returns:
+    - summary: latest EWMA, trend, volatility, streaks, anomaly dates and change points
+    - series: per-day values with the same fields
+    """
+    try:
+        auth_header = request.headers.get("Authorization")
+        if not auth_header or not auth_header.startswith("Bearer "):
+            return jsonify({"error": "Missing or invalid token"}), 401
+
+        user_id = get_user_id(auth_header)
+        if not user_id:
+            return jsonify({"error": "Invalid user authentication"}), 401
+
+        days_back = request.args.get('days', type=int)
+        span = request.args.get('span', 7, type=int)
+        window = request.args.get('window', 7, type=int)
+        if (days_back is not None and days_back < 1) or span < 1 or window < 1:
+            return jsonify({"error": "days, span and window must be at least 1"}), 400
+
+        user_doc = sentiment_collection.find_one({"user_id": str(user_id)}, {"_id": 0, "sentiments": 1})
+        sentiments = (user_doc or {}).get('sentiments', [])
+
+        # A span or window longer than the series only adds empty leading days
+        longest = days_back if days_back is not None else max(len(sentiments), 1)
+        analytics = compute_analytics(
+            sentiments,
+            days=days_back,
+            span=min(span, longest),
+            volatility_window=min(window, longest),
+            threshold=request.args.get('threshold', 70, type=float),
+            z_threshold=request.args.get('z', 2.5, type=float)
+        )
+        return jsonify(analytics), 200
+
+    except Exception as e:
+        print(f"Error computing sentiment analytics: {e}")
+        return jsonify({"error": "Failed to compute sentiment analytics", "details": str(e)}), 500
@@ -1,13 +1,13 @@
 from flask import Blueprint, request, jsonify
 from database.models import get_database
 from bson import ObjectId
-from werkzeug.security import generate_password_hash
-from routes.auth import verify_jwt_token
+from utils.passwords import hash_password, PasswordHasherBusy
+from utils.user_utils import get_user_id
+from utils.identity import user_object_id
 import logging
-from utils.user_utils import generate_user_story
 from database.models import get_collection
-from database.models import journal_collection
-from utils.user_utils import generate_motivational_message_from_chat_history
+from functions.user_functions import get_user_story, get_daily_motivation
+from functions.dashboard_functions import build_dashboard
 
 logger = logging.getLogger(__name__)
 
@@ -20,8 +20,7 @@ def get_profile():
     if not auth_header or not auth_header.startswith("Bearer "):
         return jsonify({"error": "Missing or invalid token"}), 401
     
-    token = auth_header.split(" ")[1]
-    user_id = verify_jwt_token(token)
+    user_id = get_user_id(auth_header)
     if not user_id:
         return jsonify({"error": "Unauthorized. Please log in."}), 401
 
@@ -42,6 +41,33 @@ def get_profile():
     logger.info(f"Profile retrieved for user {user_id}")
     return jsonify({"profile": user}), 200
 
+@user_bp.route("/dashboard", methods=["GET"])
+def get_dashboard():
+    """
+    Profile, streak, goals, sentiment summary, reminders, story and motivation in one call.
+
+    Query parameters (passed to the sentiment summary):
+    - days: optional, number of days to look back (default: 30)
+    - threshold: optional, score threshold for stress days (default: 70)
+
+    Sections are fetched concurrently; any that are slow or fail are null and
+    `partial` is true. `timings` reports each section's status and milliseconds.
+    """
+    auth_header = request.headers.get("Authorization")
+    if not auth_header or not auth_header.startswith("Bearer "):
+        return jsonify({"error": "Missing or invalid token"}), 401
+
+    user_id = get_user_id(auth_header)
+    if not user_id:
+        return jsonify({"error": "Unauthorized. Please log in."}), 401
+
+    dashboard = build_dashboard(
+        user_id,
+        days=request.args.get("days", 30, type=int),
+        threshold=request.args.get("threshold", 70, type=float)
+    )
+    return jsonify(dashboard), 200
+
 @user_bp.route("/update", methods=["PUT"])
 def update_profile():
     """Update user profile safely."""
@@ -49,8 +75,7 @@ def update_profile():
     if not auth_header or not auth_header.startswith("Bearer "):
         return jsonify({"error": "Missing or invalid token"}), 401
     
-    token = auth_header.split(" ")[1]
-    user_id = verify_jwt_token(token)
+    user_id = get_user_id(auth_header)
     if not user_id:
         return jsonify({"error": "Unauthorized. Please log in."}), 401
 
@@ -78,12 +103,14 @@ def update_profile():
 
         # Handle password update
         if new_password:
-            update_data["password"] = generate_password_hash(new_password)
+            update_data["password"] = hash_password(new_password)
 
         result = users_collection.update_one(
             {"_id": ObjectId(user_id)},
             {"$set": update_data}
         )
+    except PasswordHasherBusy:
+        return jsonify({"error": "Server busy, please try again"}), 503
     except Exception as e:
         logger.error(f"Database error while updating profile: {e}")
         return jsonify({"error": "Database error", "details": str(e)}), 500
@@ -98,34 +125,25 @@ def update_profile():
 def generate_story():
     user_id = request.args.get("user_id")
     # print("\n user : ", user_id)
-    brain_collection = get_collection("brain")
 
-    try:
-        user_object_id = ObjectId(user_id)
-    except Exception as e:
-        logger.error(f"Invalid user_id format: {str(e)}")
+    if user_object_id(user_id) is None:
+        logger.error(f"Invalid user_id format: {user_id}")
         return jsonify({"error": "Invalid user_id format"}), 400
 
-    # Find the user and their goals
-    user = brain_collection.find_one({"user_id": user_object_id})
-    if not user:
+    # Stored story, regenerated only when demographics or goals changed
+    story = get_user_story(user_id)
+    if story is None:
         return jsonify({"error": "User not found in AIRA's Brain"}), 404
-    
-    # print("\n user : ", user)
 
-
-    story = generate_user_story(user)
     return jsonify({"story": story})
 
 @user_bp.route('/send_motivation', methods=['GET'])
 def send_motivation():
     user_id = request.args.get("user_id")
-    user_chat_history = journal_collection.find_one({"user_id": user_id})
-    if not user_chat_history:
+    motivation = get_daily_motivation(user_id)
+    if motivation is None:
         return jsonify({"message": "No chat history found"}), 404
 
-    motivation = generate_motivational_message_from_chat_history(user_chat_history)
-
     return jsonify({
         "message": motivation
     })
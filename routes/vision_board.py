@@ -3,7 +3,9 @@ import logging
 from database.models import get_collection
 from datetime import datetime
 import uuid
-from bson import ObjectId
+from database.repository import goals
+from utils.user_utils import format_goals
+from utils.identity import user_filter, user_object_id
 
 logger = logging.getLogger(__name__)
 
@@ -21,16 +23,14 @@ def add_custom_goal():
 
     brain_collection = get_collection("brain")
 
-    try:
-        user_object_id = ObjectId(user_id)
-    except Exception as e:
+    if user_object_id(user_id) is None:
         return jsonify({"error": "Invalid user_id format"}), 400
 
-    user = brain_collection.find_one({"user_id": user_object_id})
-    if not user:
+    current_goals = goals(user_id)
+    if current_goals is None:
         return jsonify({"error": "User not found in AIRA's Brain"}), 404
 
-    existing_goals = [g["data"].strip().lower() for g in user.get("goals", []) if g["data"]]
+    existing_goals = [g["data"].strip().lower() for g in current_goals if g["data"]]
     if goal_text.strip().lower() in existing_goals:
         return jsonify({"message": "Goal already exists."}), 200
 
@@ -47,7 +47,7 @@ def add_custom_goal():
     }
 
     brain_collection.update_one(
-        {"user_id": user_object_id},
+        user_filter(user_id),
         {"$push": {"goals": new_goal}}
     )
 
@@ -61,26 +61,13 @@ def get_goals():
     if not user_id:
         return jsonify({"error": "Missing user_id parameter"}), 400
 
-    brain_collection = get_collection("brain")
-
-    user = brain_collection.find_one({"user_id": ObjectId(user_id)})
+    user_goals = goals(user_id)
 
-    if not user:
+    if user_goals is None:
         return jsonify({"error": "User not found in AIRA's Brain"}), 404
 
-    # Get goals or an empty list if none exist
-    goals = user.get("goals", [])
-
     # Format the goals for frontend consumption
-    formatted_goals = [
-        {
-            "id": goal.get("goal_id"),
-            "text": goal.get("data"),
-            "timestamp": goal.get("timestamp").isoformat() if goal.get("timestamp") else None,
-            "value": goal.get("value")  # Include the value field
-        }
-        for goal in goals
-    ]
+    formatted_goals = format_goals(user_goals)
 
     return jsonify({
         "message": "Goals retrieved successfully",
@@ -101,7 +88,7 @@ def delete_goal():
 
     # Find and update the user's document by pulling the goal with matching response_id
     result = brain_collection.update_one(
-        {"user_id": ObjectId(user_id)},
+        user_filter(user_id),
         {"$pull": {"goals": {"goal_id": goal_id}}}
     )
 
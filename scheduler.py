@@ -2,9 +2,13 @@ from apscheduler.schedulers.background import BackgroundScheduler
 from database.models import get_database
 from datetime import datetime,timedelta,timezone
 import requests
-from config import SYSTEM_SECRET
+from config import SYSTEM_SECRET, REMINDER_DISPATCH_SECONDS
 from zoneinfo import ZoneInfo
+from utils.metrics import timed_job
+from utils.tracing import traced, traceparent_headers
 
+@timed_job("check_inactive_chats")
+@traced("scheduler.check_inactive_chats")
 def check_inactive_chats():
     try:
         db = get_database()
@@ -36,7 +40,7 @@ def check_inactive_chats():
                 try:
                     response = requests.post(
                         'http://127.0.0.1:5000/api/chat/end_journal',
-                        headers={"System-Secret": SYSTEM_SECRET, "User-ID": user_id}
+                        headers={"System-Secret": SYSTEM_SECRET, "User-ID": user_id, **traceparent_headers()}
                     )
 
                     if response.ok:
@@ -54,5 +58,8 @@ def check_inactive_chats():
 def start_scheduler():
     scheduler = BackgroundScheduler()
     scheduler.add_job(check_inactive_chats, 'interval', minutes=10)
+
+    from functions.reminder_dispatcher import run_reminder_dispatch
+    scheduler.add_job(timed_job("reminder_dispatch")(run_reminder_dispatch), 'interval', seconds=REMINDER_DISPATCH_SECONDS, max_instances=1, coalesce=True)
     scheduler.start()
     print("✅ Background Scheduler started.")
@@ -0,0 +1,150 @@
+"""
+Recompute daily sentiment for every user, e.g. after a prompt or model change.
+
+User ids are streamed from the journal collection in _id order and processed on a
+thread pool (the work is LLM-bound, and threads share the process-wide LLM rate
+limiter). Progress is checkpointed to the backfill_checkpoints collection, so
+re-running with the same --run-id resumes after the last fully processed user.
+
+Usage (from the repo root):
+    python -m scripts.backfill_sentiment --run-id prompt-v2 --workers 4 --force
+    python -m scripts.backfill_sentiment --run-id prompt-v2 --rpm 120
+"""
+import argparse
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from flask import Flask
+from database.models import init_db
+
+CHECKPOINT_EVERY = 25
+
+def load_checkpoint(checkpoints, run_id):
+    state = checkpoints.find_one({"_id": run_id})
+    if state:
+        print(f"↩️ Resuming run {run_id} after {state.get('last_journal_id')} ({state.get('processed', 0)} users done)")
+        return state
+    state = {
+        "_id": run_id,
+        "last_journal_id": None,
+        "processed": 0,
+        "failed": 0,
+        "status": "running",
+        "started_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
+    }
+    checkpoints.insert_one(state)
+    return state
+
+def backfill_user(journal_collection, journal_doc_id, user_id, force):
+    from functions.sentiment_functions import process_daily_messages
+
+    journal_doc = journal_collection.find_one({"_id": journal_doc_id}, {"journals": 1})
+    journals = (journal_doc or {}).get("journals", [])
+    if journals:
+        process_daily_messages(journals, user_id, force=force)
+
+def run(run_id, workers, force, limit=None):
+    from database.models import journal_collection, get_collection
+    import functions.sentiment_functions  # noqa: F401 - import once before the pool starts
+
+    checkpoints = get_collection("backfill_checkpoints")
+    state = load_checkpoint(checkpoints, run_id)
+    if state.get("status") == "completed":
+        print(f"✅ Run {run_id} already completed.")
+        return
+
+    query = {"_id": {"$gt": state["last_journal_id"]}} if state.get("last_journal_id") else {}
+    cursor = journal_collection.find(query, {"user_id": 1}).sort("_id", 1).batch_size(500)
+
+    processed = state.get("processed", 0)
+    failed = state.get("failed", 0)
+    started = time.time()
+    done_this_run = 0
+
+    # Submission order, so the checkpoint only advances past users whose whole prefix finished
+    submitted = deque()
+    finished = set()
+    watermark = state.get("last_journal_id")
+    in_flight = {}
+
+    def save_checkpoint(status="running"):
+        checkpoints.update_one(
+            {"_id": run_id},
+            {"$set": {
+                "last_journal_id": watermark,
+                "processed": processed,
+                "failed": failed,
+                "status": status,
+                "updated_at": datetime.utcnow()
+            }}
+        )
+
+    def drain(block_until):
+        nonlocal processed, failed, watermark, done_this_run
+        done, _ = wait(list(in_flight), return_when=block_until)
+        for future in done:
+            doc_id, user_id = in_flight.pop(future)
+            try:
+                future.result()
+                processed += 1
+            except Exception as e:
+                failed += 1
+                checkpoints.update_one({"_id": run_id}, {"$addToSet": {"failed_user_ids": str(user_id)}})
+                print(f"❌ Backfill failed for user {user_id}: {e}")
+            finished.add(doc_id)
+            done_this_run += 1
+        while submitted and submitted[0] in finished:
+            watermark = submitted.popleft()
+            finished.discard(watermark)
+        if done_this_run and done_this_run % CHECKPOINT_EVERY == 0:
+            save_checkpoint()
+            elapsed = max(time.time() - started, 1e-6)
+            print(f"⏳ {processed} done, {failed} failed, {done_this_run / elapsed * 60:.1f} users/min")
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="backfill") as executor:
+        for journal_doc in cursor:
+            if limit is not None and done_this_run + len(in_flight) >= limit:
+                break
+            user_id = journal_doc.get("user_id")
+            if user_id is None:
+                continue
+            future = executor.submit(backfill_user, journal_collection, journal_doc["_id"], user_id, force)
+            in_flight[future] = (journal_doc["_id"], user_id)
+            submitted.append(journal_doc["_id"])
+            if len(in_flight) >= workers * 2:
+                drain(FIRST_COMPLETED)
+        while in_flight:
+            drain(FIRST_COMPLETED)
+
+    exhausted = limit is None or done_this_run < limit
+    save_checkpoint("completed" if exhausted else "running")
+    elapsed = max(time.time() - started, 1e-6)
+    print(
+        f"✅ Backfill {run_id}: {done_this_run} users this run in {elapsed:.1f}s "
+        f"({done_this_run / elapsed * 60:.1f} users/min), {processed} total, {failed} failed"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute sentiment for all users")
+    parser.add_argument("--run-id", default=datetime.utcnow().strftime("sentiment-%Y%m%d"),
+                        help="checkpoint id; re-use it to resume an interrupted run")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--force", action="store_true", help="re-analyze days that already have a sentiment")
+    parser.add_argument("--limit", type=int, default=None, help="stop after this many users (resumable)")
+    parser.add_argument("--rpm", type=int, default=None, help="override LLM_RATE_LIMIT_PER_MIN for this run")
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    if not init_db(app):
+        raise SystemExit("❌ Database initialization failed")
+
+    if args.rpm is not None:
+        from utils.rate_limit import llm_rate_limiter
+        llm_rate_limiter.set_rate(args.rpm)
+
+    run(args.run_id, args.workers, args.force, args.limit)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Split the legacy per-user reminder arrays into one document per reminder.
+
+Each array element becomes its own document (keeping its _id, so reminder ids
+held by the app stay valid) with a UTC due_at computed from scheduled_time.
+Inserts are upserts on _id and the array entries are pulled only after their
+documents exist, so the script can run against live traffic and be re-run.
+
+The legacy model never delivered reminders, so nothing records which ones were
+already seen. Reminders due more than EXPIRE_AFTER ago are migrated as
+"expired": still listed (and re-armed by a reschedule) but never claimed by the
+dispatcher, which would otherwise send every user's whole history at once.
+
+Usage (from the repo root):
+    python -m scripts.migrate_reminders
+"""
+from datetime import datetime, timedelta
+from flask import Flask
+from database.models import init_db
+from utils.identity import user_key
+
+EXPIRE_AFTER = timedelta(minutes=15)
+
+def migrate_user_doc(collection, doc, now=None):
+    """Move one array document's reminders out. Returns (moved, skipped)."""
+    from functions.reminder_functions import new_reminder_doc
+
+    expire_before = (now or datetime.utcnow()) - EXPIRE_AFTER
+    moved, skipped, done_ids = 0, 0, []
+    for reminder in doc.get("reminders", []):
+        new_doc = new_reminder_doc(
+            user_key(doc["user_id"]),
+            reminder.get("generated_reminder"),
+            reminder.get("scheduled_time"),
+            reminder_id=reminder["_id"],
+            created_at=reminder.get("created_at")
+        )
+        if new_doc is None:
+            skipped += 1
+            print(f"⚠️ Unparseable scheduled_time {reminder.get('scheduled_time')!r} for reminder {reminder['_id']}, left in place")
+            continue
+        if new_doc["due_at"] < expire_before:
+            new_doc["status"] = "expired"
+        collection.update_one({"_id": new_doc["_id"]}, {"$setOnInsert": new_doc}, upsert=True)
+        done_ids.append(reminder["_id"])
+        moved += 1
+
+    if done_ids:
+        collection.update_one({"_id": doc["_id"]}, {"$pull": {"reminders": {"_id": {"$in": done_ids}}}})
+    collection.delete_one({"_id": doc["_id"], "reminders": {"$size": 0}})
+    return moved, skipped
+
+def run(collection):
+    users = moved = skipped = 0
+    for doc in collection.find({"reminders": {"$exists": True}}, batch_size=200):
+        doc_moved, doc_skipped = migrate_user_doc(collection, doc)
+        users += 1
+        moved += doc_moved
+        skipped += doc_skipped
+    print(f"✅ Migrated {moved} reminders for {users} users ({skipped} skipped)")
+
+def main():
+    app = Flask(__name__)
+    if not init_db(app):
+        raise SystemExit("❌ Database initialization failed")
+
+    from database.models import reminder_collection
+    run(reminder_collection)
+
+if __name__ == "__main__":
+    main()
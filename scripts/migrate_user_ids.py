@@ -0,0 +1,94 @@
+"""
+Move every collection onto the canonical string user key (see utils/identity.py).
+
+Rewrites `user_id` values still stored as ObjectId (brain, and any stragglers
+elsewhere) to their hex string, and gives feedback documents - historically keyed
+by the user's ObjectId in `_id` - an explicit `user_id`. Each update is guarded on
+the old value, so the script is safe to run while the app serves traffic with
+USER_ID_LEGACY_READS=1 and can simply be re-run after an interruption. Once
+--check reports nothing left, deploy with USER_ID_LEGACY_READS=0.
+
+Usage (from the repo root):
+    python -m scripts.migrate_user_ids
+    python -m scripts.migrate_user_ids --check
+"""
+import argparse
+import time
+from flask import Flask
+from database.models import init_db
+from utils.identity import user_key
+
+USER_COLLECTIONS = ["brain", "chat", "journal", "sentiment", "reminders", "feedback"]
+BATCH_SIZE = 500
+
+def pending_queries(collection_name):
+    queries = [{"user_id": {"$type": "objectId"}}]
+    if collection_name == "feedback":
+        queries.append({"user_id": {"$exists": False}, "_id": {"$type": "objectId"}})
+    return queries
+
+def count_pending(db):
+    return {
+        name: sum(db[name].count_documents(query) for query in pending_queries(name))
+        for name in USER_COLLECTIONS
+    }
+
+def migrate_collection(collection, name, batch_size=BATCH_SIZE):
+    """Rewrite legacy keys in batches. Returns (migrated, conflicts)."""
+    migrated = conflicts = 0
+    for query in pending_queries(name):
+        legacy_field = "_id" if "_id" in query else "user_id"
+        while True:
+            batch = list(collection.find(query, {legacy_field: 1}).limit(batch_size))
+            if not batch:
+                break
+            progressed = False
+            for doc in batch:
+                key = user_key(doc[legacy_field])
+                if collection.count_documents({"user_id": key, "_id": {"$ne": doc["_id"]}}, limit=1):
+                    # A document was already created under the new key; needs a manual merge
+                    conflicts += 1
+                    print(f"⚠️ {name}: {doc['_id']} and an existing document both belong to {key}, skipped")
+                    continue
+                guard = {"_id": doc["_id"], "user_id": doc[legacy_field]} if legacy_field == "user_id" \
+                    else {"_id": doc["_id"], "user_id": {"$exists": False}}
+                result = collection.update_one(guard, {"$set": {"user_id": key}})
+                migrated += result.modified_count
+                progressed = True
+            if not progressed:
+                # Only conflicts left in this query
+                break
+    return migrated, conflicts
+
+def run(db):
+    started = time.time()
+    total_conflicts = 0
+    for name in USER_COLLECTIONS:
+        migrated, conflicts = migrate_collection(db[name], name)
+        total_conflicts += conflicts
+        print(f"✅ {name}: {migrated} migrated, {conflicts} conflicts")
+    print(f"✅ User id migration finished in {time.time() - started:.1f}s")
+    if total_conflicts:
+        print("⚠️ Resolve the conflicts above before turning USER_ID_LEGACY_READS off")
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate user ids to canonical string keys")
+    parser.add_argument("--check", action="store_true", help="only count documents still on legacy keys")
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    if not init_db(app):
+        raise SystemExit("❌ Database initialization failed")
+
+    from database.models import get_database
+    db = get_database()
+    if not args.check:
+        run(db)
+    pending = count_pending(db)
+    for name, count in pending.items():
+        print(f"{'⚠️' if count else '✅'} {name}: {count} document(s) on legacy keys")
+    if any(pending.values()):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
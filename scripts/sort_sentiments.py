@@ -0,0 +1,34 @@
+"""
+Sort the daily sentiment arrays written before writers kept them date-ordered.
+
+/api/sentiment reads only the trailing entries of a sorted array, and falls
+back to reading the whole array for documents without materialized stats.
+Those documents are sorted on their first stats refresh; this refreshes all of
+them up front so reads take the sliced path. Re-running skips documents that
+already have stats.
+
+Usage (from the repo root):
+    python -m scripts.sort_sentiments
+"""
+from flask import Flask
+from database.models import init_db
+
+def run(collection):
+    from functions.sentiment_functions import refresh_sentiment_stats
+
+    sorted_docs = 0
+    for doc in collection.find({"stats": {"$exists": False}}, {"user_id": 1}, batch_size=200):
+        refresh_sentiment_stats(doc["user_id"])
+        sorted_docs += 1
+    print(f"✅ Sorted sentiments for {sorted_docs} users")
+
+def main():
+    app = Flask(__name__)
+    if not init_db(app):
+        raise SystemExit("❌ Database initialization failed")
+
+    from database.models import sentiment_collection
+    run(sentiment_collection)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import jwt
+from flask import g, request
+from config import JWT_SECRET_KEY, AUTH_TOKEN_CACHE_SIZE, REVOCATION_REFRESH_SECONDS
+
+logger = logging.getLogger(__name__)
+
+class VerifiedTokenCache:
+    """LRU of already-verified tokens keyed by the sha256 of the whole token."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(token):
+        # The whole token: a matching signature segment alone proves nothing about the rest
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token):
+        key = self.key(token)
+        with self.lock:
+            payload = self.entries.get(key)
+            if payload is None:
+                return None
+            exp = payload.get("exp")
+            if exp is not None and exp <= time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return payload
+
+    def put(self, token, payload):
+        key = self.key(token)
+        with self.lock:
+            self.entries[key] = payload
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
+
+class RevocationFilter:
+    """
+    In-memory set of revoked session ids, refreshed incrementally from the sessions collection.
+
+    Membership checks never touch MongoDB; a background thread pulls sessions revoked
+    since the last refresh and drops entries once their session would have expired anyway.
+    The first load in each worker runs before it serves a request.
+    """
+
+    OVERLAP = timedelta(seconds=5)
+
+    def __init__(self, refresh_seconds):
+        self.refresh_seconds = refresh_seconds
+        self.revoked = {}
+        self.watermark = None
+        self.lock = threading.Lock()
+        self.start_lock = threading.Lock()
+        self.pid = None
+
+    def revoke(self, session_id, expires_at=None):
+        """Record a revocation made by this worker without waiting for the next refresh."""
+        with self.lock:
+            self.revoked[session_id] = expires_at or datetime.utcnow() + timedelta(days=7)
+
+    def is_revoked(self, session_id):
+        return session_id in self.revoked
+
+    def refresh(self):
+        from database.models import sessions_collection
+
+        now = datetime.utcnow()
+        if self.watermark is None:
+            query = {"active": False, "expires_at": {"$gt": now}}
+        else:
+            # Overlap the window a little so writes committed out of order are not missed
+            query = {"revoked_at": {"$gt": self.watermark - self.OVERLAP}}
+
+        latest = self.watermark
+        fetched = {}
+        for session in sessions_collection.find(query, {"session_id": 1, "expires_at": 1, "revoked_at": 1}):
+            fetched[session["session_id"]] = session.get("expires_at")
+            revoked_at = session.get("revoked_at")
+            if revoked_at and (latest is None or revoked_at > latest):
+                latest = revoked_at
+
+        with self.lock:
+            self.revoked.update(fetched)
+            for session_id, expires_at in list(self.revoked.items()):
+                if expires_at and expires_at <= now:
+                    del self.revoked[session_id]
+        self.watermark = latest or now
+
+    def _refresh_logged(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.error(f"Session revocation refresh failed: {e}")
+
+    def _run(self):
+        while True:
+            time.sleep(self.refresh_seconds)
+            self._refresh_logged()
+
+    def ensure_started(self):
+        """Load revocations and start the refresher once per worker process (safe after a gunicorn fork)."""
+        if self.pid == os.getpid():
+            return
+        with self.start_lock:
+            if self.pid == os.getpid():
+                return
+            # Synchronously, so logged-out tokens aren't accepted until the thread's first pass
+            self._refresh_logged()
+            self.pid = os.getpid()
+        threading.Thread(target=self._run, name="revocation-refresh", daemon=True).start()
+
+    def __len__(self):
+        return len(self.revoked)
+
+token_cache = VerifiedTokenCache(AUTH_TOKEN_CACHE_SIZE)
+revocation_filter = RevocationFilter(REVOCATION_REFRESH_SECONDS)
+
+def decode_bearer_token(token):
+    """Verify a JWT once and serve repeats from the LRU. Returns the payload or None."""
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
+    try:
+        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=["HS256"])
+    except jwt.ExpiredSignatureError:
+        return None
+    except jwt.InvalidTokenError:
+        return None
+    token_cache.put(token, payload)
+    return payload
+
+def authenticate_request():
+    """before_request hook: decode the bearer token once and expose it on flask.g."""
+    revocation_filter.ensure_started()
+    g.auth_checked = True
+    g.user_id = None
+    g.session_id = None
+    g.token_payload = None
+
+    auth_header = request.headers.get("Authorization")
+    if not auth_header or not auth_header.startswith("Bearer "):
+        return
+    parts = auth_header.split(" ")
+    if len(parts) < 2 or not parts[1]:
+        return
+
+    payload = decode_bearer_token(parts[1])
+    if not payload or revocation_filter.is_revoked(payload.get("session_id")):
+        return
+    g.token_payload = payload
+    g.user_id = payload.get("user_id")
+    g.session_id = payload.get("session_id")
+
+def init_auth(app):
+    app.before_request(authenticate_request)
@@ -0,0 +1,46 @@
+"""
+Canonical user identity.
+
+Every collection stores the owning user as one string key in `user_id`:
+the hex string of `users._id` for app users, or the Twilio sender
+("whatsapp:+91...") for WhatsApp users. Only `users` itself is keyed by ObjectId.
+
+While USER_ID_LEGACY_READS is on (during `python -m scripts.migrate_user_ids`),
+user_filter() also matches brain/feedback documents still keyed by ObjectId.
+"""
+from bson import ObjectId
+from config import USER_ID_LEGACY_READS
+
+WHATSAPP_PREFIX = "whatsapp:"
+
+def user_key(user_id):
+    """Canonical string key for an ObjectId, its hex string or a WhatsApp sender. None if empty."""
+    if user_id is None:
+        return None
+    key = str(user_id).strip()
+    return key or None
+
+def is_app_user(key):
+    return isinstance(key, str) and len(key) == 24 and ObjectId.is_valid(key)
+
+def is_whatsapp_user(key):
+    return isinstance(key, str) and key.startswith(WHATSAPP_PREFIX)
+
+def user_object_id(user_id):
+    """`users._id` for an app user key, or None for WhatsApp senders and malformed ids."""
+    key = user_key(user_id)
+    return ObjectId(key) if is_app_user(key) else None
+
+def user_filter(user_id, keyed_by_id=False):
+    """
+    Query for a user's document. Normally a single equality on `user_id`; with legacy
+    reads enabled it also matches the old ObjectId key (in `_id` when keyed_by_id).
+    Upserts must $setOnInsert the key themselves: an $in/$or filter is not copied
+    into the inserted document.
+    """
+    key = user_key(user_id)
+    if not USER_ID_LEGACY_READS or not is_app_user(key):
+        return {"user_id": key}
+    if keyed_by_id:
+        return {"$or": [{"user_id": key}, {"_id": ObjectId(key)}]}
+    return {"user_id": {"$in": [key, ObjectId(key)]}}
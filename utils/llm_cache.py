@@ -0,0 +1,160 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from config import LLM_CACHE_ENABLED, LLM_CACHE_PATH, LLM_CACHE_TTL, LLM_CACHE_MAX_MB
+from utils.rate_limit import llm_rate_limiter
+from utils.metrics import llm_site
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+_stats_lock = threading.Lock()
+_cache_stats = defaultdict(lambda: defaultdict(int))
+_writes_since_evict = 0
+EVICT_EVERY = 100
+
+def _connection():
+    """Per-thread SQLite connection; WAL lets every gunicorn worker share the file."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        directory = os.path.dirname(LLM_CACHE_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(LLM_CACHE_PATH, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                site TEXT NOT NULL,
+                value TEXT NOT NULL,
+                tokens INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_access ON llm_cache (last_access)")
+        _local.conn = conn
+    return conn
+
+def normalize_input(payload):
+    """Canonical text for a prompt input: sorted JSON for structures, collapsed whitespace for text."""
+    if not isinstance(payload, str):
+        payload = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return re.sub(r"\s+", " ", payload).strip()
+
+def model_name_of(model):
+    return getattr(model, "model_name", None) or getattr(model, "model", None) or type(model).__name__
+
+def cache_key(model_name, site, template_version, payload):
+    """Content address: model, prompt template version and normalized input."""
+    material = "\x1f".join([str(model_name), site, str(template_version), normalize_input(payload)])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+def estimate_tokens(*texts):
+    """Rough token count (~4 characters per token) when the provider reports no usage."""
+    return sum(len(t) for t in texts if t) // 4
+
+def cache_get(key):
+    now = time.time()
+    row = _connection().execute(
+        "SELECT value, tokens FROM llm_cache WHERE key = ? AND expires_at > ?", (key, now)
+    ).fetchone()
+    if row is None:
+        return None
+    _connection().execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+    return json.loads(row[0]), row[1]
+
+def cache_set(key, site, value, tokens, ttl=None):
+    global _writes_since_evict
+    now = time.time()
+    encoded = json.dumps(value, ensure_ascii=False)
+    _connection().execute(
+        "INSERT OR REPLACE INTO llm_cache (key, site, value, tokens, size, created_at, expires_at, last_access) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (key, site, encoded, tokens, len(encoded), now, now + (ttl or LLM_CACHE_TTL), now)
+    )
+    _writes_since_evict += 1
+    if _writes_since_evict >= EVICT_EVERY:
+        _writes_since_evict = 0
+        evict()
+
+def evict(max_bytes=None):
+    """Drop expired entries, then least recently used ones until the cache fits its size budget."""
+    max_bytes = max_bytes if max_bytes is not None else LLM_CACHE_MAX_MB * 1024 * 1024
+    conn = _connection()
+    conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),))
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+    if total <= max_bytes:
+        return 0
+    removed = 0
+    for key, size in conn.execute("SELECT key, size FROM llm_cache ORDER BY last_access").fetchall():
+        if total <= max_bytes:
+            break
+        conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+        total -= size
+        removed += 1
+    return removed
+
+def _record(site, outcome, tokens=0):
+    with _stats_lock:
+        _cache_stats[site][outcome] += 1
+        if outcome == "hits":
+            _cache_stats[site]["tokens_saved"] += tokens
+
+def get_cache_stats():
+    """Per-site hits, misses, hit rate and (estimated) tokens saved in this process."""
+    with _stats_lock:
+        stats = {site: dict(counts) for site, counts in _cache_stats.items()}
+    for counts in stats.values():
+        lookups = counts.get("hits", 0) + counts.get("misses", 0)
+        counts["hit_rate"] = round(counts.get("hits", 0) / lookups, 4) if lookups else None
+    return stats
+
+def cached_llm_call(site, template_version, model, payload, compute, ttl=None, rate_limited=True):
+    """
+    Return compute() for a deterministic LLM task, memoized by content address.
+
+    Misses wait on the shared LLM rate limiter before calling the model; pass
+    rate_limited=False when compute takes a token per model request itself
+    (invoke_json, which may make several).
+    `payload` must capture everything the prompt depends on. None results (failed
+    calls) are not cached. Cache errors never break the call itself.
+    """
+    if not LLM_CACHE_ENABLED:
+        if rate_limited:
+            llm_rate_limiter.acquire()
+        with llm_site(site):
+            return compute()
+
+    key = cache_key(model_name_of(model), site, template_version, payload)
+    try:
+        hit = cache_get(key)
+    except sqlite3.Error as e:
+        logger.warning(f"LLM cache read failed for {site}: {e}")
+        hit = None
+    if hit is not None:
+        value, tokens = hit
+        _record(site, "hits", tokens)
+        return value
+
+    _record(site, "misses")
+    if rate_limited:
+        llm_rate_limiter.acquire()
+    with llm_site(site):
+        value = compute()
+    if value is not None:
+        try:
+            tokens = estimate_tokens(normalize_input(payload), json.dumps(value, ensure_ascii=False))
+            cache_set(key, site, value, tokens, ttl)
+        except (sqlite3.Error, TypeError) as e:
+            logger.warning(f"LLM cache write failed for {site}: {e}")
+    return value
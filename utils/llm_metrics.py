@@ -0,0 +1,66 @@
+"""
+LangChain callback feeding LLM latency and token usage into utils.metrics (and
+an llm.call span into the current trace).
+
+Attached to each chat model at construction, so every invoke/stream through the
+model is counted - including the chat chain and bound (JSON mode) models. The
+call site label comes from utils.metrics.llm_site(), set by cached_llm_call and
+the chat handler.
+"""
+import threading
+import time
+from langchain_core.callbacks import BaseCallbackHandler
+from utils.metrics import llm_call_seconds, llm_tokens, current_llm_site
+from utils.tracing import record_span
+
+def _usage(response):
+    """(prompt_tokens, completion_tokens) from provider output or message metadata, else (None, None)."""
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage:
+        return usage.get("prompt_tokens"), usage.get("completion_tokens")
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if metadata:
+                return metadata.get("input_tokens"), metadata.get("output_tokens")
+    return None, None
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    def __init__(self, model_name):
+        self.model_name = model_name
+        self.started = {}
+        self.lock = threading.Lock()
+
+    def _start(self, run_id):
+        with self.lock:
+            self.started[run_id] = (time.perf_counter(), current_llm_site())
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def _finish(self, run_id, outcome):
+        with self.lock:
+            started = self.started.pop(run_id, None)
+        if started is None:
+            return None
+        began, site = started
+        elapsed = time.perf_counter() - began
+        llm_call_seconds.observe(elapsed, site=site, model=self.model_name, outcome=outcome)
+        record_span("llm.call", elapsed, outcome, llm_site=site, llm_model=self.model_name)
+        return site
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        site = self._finish(run_id, "ok")
+        if site is None:
+            return
+        prompt_tokens, completion_tokens = _usage(response)
+        if prompt_tokens is not None:
+            llm_tokens.observe(prompt_tokens, site=site, model=self.model_name, kind="prompt")
+        if completion_tokens is not None:
+            llm_tokens.observe(completion_tokens, site=site, model=self.model_name, kind="completion")
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, "error")
@@ -0,0 +1,134 @@
+"""
+SQLite store of recorded model calls for the record/replay providers.
+
+Each chat call is stored with its prompt, response, token usage and latency
+under three keys of decreasing precision:
+
+    exact  - model + full prompt + call options
+    loose  - model + call site + last user message
+    site   - model + call site
+
+Chat prompts embed the current time and "last talked N minutes ago", so an
+exact match rarely survives between a recording and a replay; replay falls
+back to the loose key and then cycles through everything recorded for the
+site. Embeddings are stored per text.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from config import LLM_RECORDINGS_PATH
+
+_local = threading.local()
+_counter_lock = threading.Lock()
+_counters = defaultdict(int)
+_stats = defaultdict(lambda: defaultdict(int))
+
+def _connection():
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        directory = os.path.dirname(LLM_RECORDINGS_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(LLM_RECORDINGS_PATH, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS chat_recordings (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                model TEXT NOT NULL,
+                site TEXT NOT NULL,
+                exact_key TEXT NOT NULL,
+                loose_key TEXT NOT NULL,
+                prompt TEXT NOT NULL,
+                response TEXT NOT NULL,
+                usage TEXT,
+                latency_ms REAL NOT NULL,
+                recorded_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS chat_recordings_exact ON chat_recordings (exact_key)")
+        conn.execute("CREATE INDEX IF NOT EXISTS chat_recordings_loose ON chat_recordings (loose_key)")
+        conn.execute("CREATE INDEX IF NOT EXISTS chat_recordings_site ON chat_recordings (model, site)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS embedding_recordings (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                vector TEXT NOT NULL,
+                latency_ms REAL NOT NULL
+            )
+        """)
+        _local.conn = conn
+    return conn
+
+def _hash(*parts):
+    return hashlib.sha256("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+def serialize_messages(messages):
+    return [{"type": getattr(m, "type", "human"), "content": getattr(m, "content", str(m))} for m in messages]
+
+def chat_keys(model, site, messages, options):
+    """(exact_key, loose_key) for a call; `messages` as returned by serialize_messages."""
+    exact = _hash(model, json.dumps(messages, sort_keys=True), json.dumps(options, sort_keys=True, default=str))
+    last_user = next((m["content"] for m in reversed(messages) if m["type"] == "human"), "")
+    return exact, _hash(model, site, last_user)
+
+def record_chat(model, site, messages, options, response, usage, latency_ms):
+    exact, loose = chat_keys(model, site, messages, options)
+    _connection().execute(
+        "INSERT INTO chat_recordings (model, site, exact_key, loose_key, prompt, response, usage, latency_ms, recorded_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (model, site, exact, loose, json.dumps(messages, ensure_ascii=False), response,
+         json.dumps(usage) if usage else None, latency_ms, time.time())
+    )
+
+def _next(level, key, count):
+    """Cycle deterministically through the `count` recordings that share a key."""
+    with _counter_lock:
+        index = _counters[(level, key)] % count
+        _counters[(level, key)] += 1
+    return index
+
+def find_chat(model, site, messages, options):
+    """(response, usage, latency_ms, match_level) for the best recorded match, or None."""
+    exact, loose = chat_keys(model, site, messages, options)
+    lookups = (
+        ("exact", exact, "exact_key = ?", (exact,)),
+        ("loose", loose, "loose_key = ?", (loose,)),
+        ("site", f"{model}|{site}", "model = ? AND site = ?", (model, site)),
+    )
+    conn = _connection()
+    for level, key, where, params in lookups:
+        count = conn.execute(f"SELECT COUNT(*) FROM chat_recordings WHERE {where}", params).fetchone()[0]
+        if not count:
+            continue
+        # Fetch only the row this call cycles to; a site can have thousands of recordings
+        row = conn.execute(
+            f"SELECT response, usage, latency_ms FROM chat_recordings WHERE {where} ORDER BY id LIMIT 1 OFFSET ?",
+            (*params, _next(level, key, count))
+        ).fetchone()
+        if row:
+            response, usage, latency_ms = row
+            _stats[site][level] += 1
+            return response, json.loads(usage) if usage else None, latency_ms, level
+    _stats[site]["miss"] += 1
+    return None
+
+def record_embedding(model, text, vector, latency_ms):
+    _connection().execute(
+        "INSERT OR REPLACE INTO embedding_recordings (key, model, vector, latency_ms) VALUES (?, ?, ?, ?)",
+        (_hash(model, text), model, json.dumps(vector), latency_ms)
+    )
+
+def find_embedding(model, text):
+    """(vector, latency_ms) or None."""
+    row = _connection().execute(
+        "SELECT vector, latency_ms FROM embedding_recordings WHERE key = ?", (_hash(model, text),)
+    ).fetchone()
+    return (json.loads(row[0]), row[1]) if row else None
+
+def get_replay_stats():
+    """Per-site counts of replay matches by level (exact, loose, site) and misses."""
+    return {site: dict(levels) for site, levels in _stats.items()}
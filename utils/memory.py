@@ -0,0 +1,226 @@
+"""
+Memory introspection for the current worker process.
+
+Reports RSS (psutil), garbage-collector state and the size of the in-process
+caches that grow with traffic. tracemalloc can be started on demand and
+snapshots compared to find which lines allocated the growth. A background
+logger prints RSS and cache sizes every MEMORY_LOG_SECONDS so slow leaks show
+up as a trend in the worker logs.
+"""
+import gc
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+from datetime import datetime
+import psutil
+from config import MEMORY_LOG_SECONDS, MEMORY_MAX_SNAPSHOTS
+from utils.metrics import registry
+
+CACHE_PROBES = {}
+
+def register_cache_probe(name):
+    """Decorator registering `probe() -> dict` reporting the size of one in-process cache."""
+    def decorator(probe):
+        CACHE_PROBES[name] = probe
+        return probe
+    return decorator
+
+def _loaded(module_name):
+    """The module if something already imported it; probes never import heavy modules themselves."""
+    return sys.modules.get(module_name)
+
+@register_cache_probe("session_cache")
+def _session_cache():
+    model_utils = _loaded("utils.model_utils")
+    if model_utils is None:
+        return None
+    entries = list(model_utils.session_cache.values())
+    return {"entries": len(entries), "messages": sum(len(history.messages) for _, history in entries)}
+
+@register_cache_probe("models")
+def _models():
+    model_utils = _loaded("utils.model_utils")
+    providers = _loaded("utils.providers")
+    if model_utils is None or providers is None:
+        return None
+    return {
+        "providers": providers.selected_providers(),
+        "loaded": [f"{kind}:{provider}:{name}" for kind, provider, name in providers.loaded_models()],
+        "faiss_retriever_loaded": model_utils.retriever is not None
+    }
+
+@register_cache_probe("token_cache")
+def _token_cache():
+    auth = _loaded("utils.auth_middleware")
+    return None if auth is None else {"entries": len(auth.token_cache), "max_entries": auth.token_cache.max_size}
+
+@register_cache_probe("revocation_filter")
+def _revocation_filter():
+    auth = _loaded("utils.auth_middleware")
+    return None if auth is None else {"entries": len(auth.revocation_filter)}
+
+@register_cache_probe("dashboard")
+def _dashboard():
+    dashboard = _loaded("functions.dashboard_functions")
+    if dashboard is None:
+        return None
+    return {"story_entries": len(dashboard.story_cache), "motivation_entries": len(dashboard.motivation_cache)}
+
+@register_cache_probe("llm_cache")
+def _llm_cache():
+    from config import LLM_CACHE_PATH
+    # Lives in SQLite, not the heap; reported for completeness
+    return {"file_bytes": os.path.getsize(LLM_CACHE_PATH) if os.path.exists(LLM_CACHE_PATH) else 0}
+
+@register_cache_probe("gsheet_exporter")
+def _gsheet():
+    gsheet = _loaded("functions.gsheet")
+    exporter = getattr(gsheet, "_exporter", None)
+    return None if exporter is None else {"queued": exporter.queue.qsize()}
+
+def process_memory():
+    process = psutil.Process()
+    info = process.memory_info()
+    return {
+        "pid": process.pid,
+        "rss_bytes": info.rss,
+        "vms_bytes": info.vms,
+        "threads": process.num_threads(),
+        "uptime_seconds": round(time.time() - process.create_time(), 1)
+    }
+
+def gc_stats(count_objects=False):
+    stats = {"counts": gc.get_count(), "thresholds": gc.get_threshold(), "generations": gc.get_stats()}
+    if count_objects:
+        # Walks every tracked object; only on request
+        stats["tracked_objects"] = len(gc.get_objects())
+    return stats
+
+def cache_sizes():
+    sizes = {}
+    for name, probe in CACHE_PROBES.items():
+        try:
+            sizes[name] = probe()
+        except Exception as e:
+            sizes[name] = {"error": str(e)}
+    return sizes
+
+def memory_report(count_objects=False):
+    return {
+        "process": process_memory(),
+        "gc": gc_stats(count_objects),
+        "caches": cache_sizes(),
+        "tracemalloc": tracemalloc_status()
+    }
+
+resident_memory = registry.gauge("aira_process_resident_memory_bytes", "Resident set size of this worker.")
+registry.add_collector(lambda: resident_memory.set(psutil.Process().memory_info().rss))
+
+# --- tracemalloc ---------------------------------------------------------------
+
+_snapshots = OrderedDict()
+_snapshot_lock = threading.Lock()
+
+def tracemalloc_status():
+    if not tracemalloc.is_tracing():
+        return {"tracing": False, "snapshots": list(_snapshots)}
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        "tracing": True,
+        "frames": tracemalloc.get_traceback_limit(),
+        "traced_bytes": current,
+        "peak_bytes": peak,
+        "snapshots": list(_snapshots)
+    }
+
+def start_tracemalloc(frames=1):
+    """Start tracing allocations (costs CPU and memory while on)."""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+def stop_tracemalloc():
+    tracemalloc.stop()
+    with _snapshot_lock:
+        _snapshots.clear()
+
+def _snapshot():
+    if not tracemalloc.is_tracing():
+        raise RuntimeError("tracemalloc is not running")
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+
+def take_snapshot():
+    """Store a snapshot and return its id; raises RuntimeError when tracing is off."""
+    snapshot = _snapshot()
+    snapshot_id = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    with _snapshot_lock:
+        _snapshots[snapshot_id] = snapshot
+        while len(_snapshots) > MEMORY_MAX_SNAPSHOTS:
+            _snapshots.popitem(last=False)
+    return snapshot_id
+
+def compare_snapshots(older_id, newer_id=None, top=20):
+    """
+    Top-N allocation sites by size growth from older to newer. Raises KeyError for
+    unknown ids. Without newer_id the comparison is against a snapshot taken now
+    that is not stored, so it can't evict older_id.
+    """
+    with _snapshot_lock:
+        older = _snapshots[older_id]
+        newer = _snapshots[newer_id] if newer_id else None
+    if newer is None:
+        newer = _snapshot()
+    stats = newer.compare_to(older, "lineno")
+    return [
+        {
+            "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "size_diff_bytes": stat.size_diff,
+            "size_bytes": stat.size,
+            "count_diff": stat.count_diff,
+            "count": stat.count
+        }
+        for stat in stats[:top]
+    ]
+
+# --- periodic RSS log ----------------------------------------------------------
+
+class RSSLogger:
+    def __init__(self, interval_seconds):
+        self.interval_seconds = interval_seconds
+        self.pid = None
+        self.lock = threading.Lock()
+
+    def log_once(self):
+        memory = process_memory()
+        caches = cache_sizes()
+        sessions = (caches.get("session_cache") or {}).get("entries", 0)
+        tokens = (caches.get("token_cache") or {}).get("entries", 0)
+        print(
+            f"📈 Memory pid={memory['pid']} rss_mb={memory['rss_bytes'] / 1048576:.1f} "
+            f"threads={memory['threads']} session_cache={sessions} token_cache={tokens}"
+        )
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval_seconds)
+            try:
+                self.log_once()
+            except Exception as e:
+                print(f"⚠️ Memory log failed: {e}")
+
+    def ensure_started(self):
+        """Start the logger once per worker process; MEMORY_LOG_SECONDS=0 disables it."""
+        if self.interval_seconds <= 0 or self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+        threading.Thread(target=self._run, name="memory-log", daemon=True).start()
+
+rss_logger = RSSLogger(MEMORY_LOG_SECONDS)
@@ -0,0 +1,273 @@
+"""
+In-process metrics in the Prometheus text format, served at /metrics.
+
+Counters, gauges and histograms live in one registry and are cheap enough to
+update on every request and Mongo command. Labels must come from a fixed set
+(route endpoint, collection, LLM call site, job name) - never user ids - so the
+number of series stays bounded. Each gunicorn worker keeps its own registry;
+scrape the workers individually or sum per instance.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+TOKEN_BUCKETS = (16, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _label_text(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            items = sorted(self.series.items())
+        for key, value in items:
+            lines.extend(self._render_series(key, value))
+        return lines
+
+    def _render_series(self, key, value):
+        return [f"{self.name}{_label_text(self.labels, key)} {_number(value)}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.series[key] = self.series.get(key, 0) + amount
+
+    def set_total(self, value, **labels):
+        """For counters kept elsewhere and copied in at scrape time."""
+        key = self._key(labels)
+        with self.lock:
+            self.series[key] = value
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.series[key] = value
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            counts, total = self.series.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+            self.series[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _render_series(self, key, value):
+        counts, total = value
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            labels = _label_text(self.labels, key, [("le", _number(bound))])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _label_text(self.labels, key)
+        lines.append(f"{self.name}_sum{labels} {_number(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.collectors = []
+        self.lock = threading.Lock()
+
+    def _register(self, cls, name, documentation, labels, **kwargs):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, documentation, labels, **kwargs)
+            elif not isinstance(metric, cls) or metric.labels != tuple(labels):
+                raise ValueError(f"Metric {name} already registered with a different type or labels")
+            return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self._register(Counter, name, documentation, labels)
+
+    def gauge(self, name, documentation, labels=()):
+        return self._register(Gauge, name, documentation, labels)
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, documentation, labels, buckets=buckets)
+
+    def add_collector(self, collect):
+        """`collect()` runs at scrape time, e.g. to copy counters kept elsewhere into the registry."""
+        self.collectors.append(collect)
+
+    def render(self):
+        for collect in self.collectors:
+            try:
+                collect()
+            except Exception as e:
+                print(f"⚠️ Metrics collector {getattr(collect, '__name__', collect)} failed: {e}")
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+http_request_seconds = registry.histogram(
+    "aira_http_request_duration_seconds", "Request latency by route.", ("endpoint", "method", "status")
+)
+mongo_command_seconds = registry.histogram(
+    "aira_mongo_command_duration_seconds", "MongoDB command latency.", ("collection", "command", "outcome")
+)
+llm_call_seconds = registry.histogram(
+    "aira_llm_call_duration_seconds", "LLM call latency by call site.", ("site", "model", "outcome")
+)
+llm_tokens = registry.histogram(
+    "aira_llm_tokens", "Tokens per LLM call by call site.", ("site", "model", "kind"), buckets=TOKEN_BUCKETS
+)
+embedding_seconds = registry.histogram(
+    "aira_embedding_duration_seconds", "Embedding latency.", ("operation",)
+)
+retrieval_seconds = registry.histogram(
+    "aira_faiss_retrieval_duration_seconds", "FAISS retrieval latency, embedding included.", ("index",)
+)
+chat_response_seconds = registry.histogram(
+    "aira_chat_response_duration_seconds", "End-to-end chat chain latency."
+)
+scheduler_job_seconds = registry.histogram(
+    "aira_scheduler_job_duration_seconds", "Background scheduler job duration.", ("job", "outcome")
+)
+
+llm_cache_lookups = registry.counter(
+    "aira_llm_cache_lookups_total", "LLM response cache lookups.", ("site", "outcome")
+)
+llm_cache_tokens_saved = registry.counter(
+    "aira_llm_cache_tokens_saved_total", "Estimated LLM tokens not spent thanks to cache hits.", ("site",)
+)
+structured_output_parses = registry.counter(
+    "aira_structured_output_parses_total", "Structured-output parse outcomes.", ("site", "outcome")
+)
+
+def _collect_llm_stats():
+    from utils.llm_cache import get_cache_stats
+    from utils.structured_output import get_parse_stats
+    for site, counts in get_cache_stats().items():
+        for outcome in ("hits", "misses"):
+            llm_cache_lookups.set_total(counts.get(outcome, 0), site=site, outcome=outcome)
+        llm_cache_tokens_saved.set_total(counts.get("tokens_saved", 0), site=site)
+    for site, counts in get_parse_stats().items():
+        for outcome, count in counts.items():
+            if outcome not in ("attempts", "success_rate"):
+                structured_output_parses.set_total(count, site=site, outcome=outcome)
+
+registry.add_collector(_collect_llm_stats)
+
+# --- LLM call sites ------------------------------------------------------------
+
+_llm_site = ContextVar("llm_site", default="other")
+
+@contextmanager
+def llm_site(site):
+    """Attribute LLM calls made inside the block to `site` (a fixed, code-defined name)."""
+    token = _llm_site.set(site)
+    try:
+        yield
+    finally:
+        _llm_site.reset(token)
+
+def current_llm_site():
+    return _llm_site.get()
+
+# --- scheduler -------------------------------------------------------------------
+
+def timed_job(name):
+    """Decorator recording a scheduler job's duration; exceptions are re-raised."""
+    def decorator(job):
+        @wraps(job)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            outcome = "ok"
+            try:
+                return job(*args, **kwargs)
+            except Exception:
+                outcome = "error"
+                raise
+            finally:
+                scheduler_job_seconds.observe(time.perf_counter() - started, job=name, outcome=outcome)
+        return wrapper
+    return decorator
+
+# --- Flask -----------------------------------------------------------------------
+
+def _start_timer():
+    from flask import g
+    g.metrics_started = time.perf_counter()
+
+def _observe_request(response):
+    from flask import g, request
+    started = g.pop("metrics_started", None)
+    if started is not None:
+        # The endpoint name (blueprint.view), not the URL, keeps path parameters out of labels
+        http_request_seconds.observe(
+            time.perf_counter() - started,
+            endpoint=request.endpoint or "unmatched",
+            method=request.method,
+            status=response.status_code
+        )
+    return response
+
+def metrics_view():
+    from flask import Response
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+def init_metrics(app):
+    app.before_request(_start_timer)
+    app.after_request(_observe_request)
+    app.add_url_rule("/metrics", "metrics", metrics_view, methods=["GET"])
@@ -1,7 +1,5 @@
 import time
 import logging
-from langchain_groq import ChatGroq
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
@@ -9,14 +7,17 @@ from langchain_core.chat_history import BaseChatMessageHistory
 from langchain_community.chat_message_histories import ChatMessageHistory
 from langchain_core.runnables.history import RunnableWithMessageHistory
 from langchain_core.runnables import RunnableMap
-from config import GROQ_API_KEY, JWT_SECRET_KEY
+from config import JWT_SECRET_KEY
 from database.models import brain_collection,chat_collection
-from bson import ObjectId
-from flask import request
+from database.repository import latest_assessment as get_latest_assessment
+from utils.identity import user_key, user_filter
+from flask import request, g
 import jwt
 from datetime import datetime
-from functools import lru_cache
-from bson.errors import InvalidId
+from langchain_core.embeddings import Embeddings
+from utils.providers import get_chat_model, get_embeddings, CHAT_MODEL, LARGE_CHAT_MODEL
+from utils.metrics import embedding_seconds, retrieval_seconds
+from utils.tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -26,10 +27,23 @@ embedding_model = None
 retriever = None
 session_cache = {}
 
-@lru_cache(maxsize=1)
 def get_model():
-    """Returns a cached instance of the ChatGroq model"""
-    return ChatGroq(groq_api_key=GROQ_API_KEY, model_name="llama-3.3-70b-versatile")
+    """Returns the cached 70B model from the configured provider"""
+    return get_chat_model(LARGE_CHAT_MODEL)
+
+class TimedEmbeddings(Embeddings):
+    """Delegates to an embedding model, recording how long each call takes."""
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    def embed_documents(self, texts):
+        with embedding_seconds.time(operation="documents"):
+            return self.inner.embed_documents(texts)
+
+    def embed_query(self, text):
+        with embedding_seconds.time(operation="query"):
+            return self.inner.embed_query(text)
 
 def get_chat_history_collection():
     return chat_collection
@@ -46,19 +60,13 @@ def parse_iso_datetime(dt):
         raise ValueError("Unsupported datetime format")
     
 def get_user(user_id):
-    # Ensure user_id is an ObjectId
-    try:
-        if not isinstance(user_id, ObjectId):
-            user_id_obj = ObjectId(user_id)
-        else:
-            user_id_obj = user_id
-    except:
+    if user_key(user_id) is None:
         print(f"Invalid user_id format: {user_id}")
         return "User"  # Default if ID format is invalid
     
     # Query the database
     try:
-        user_data = brain_collection.find_one({"user_id": user_id_obj})
+        user_data = brain_collection.find_one(user_filter(user_id))
 
         # Check if user_data exists and has a name field
         if user_data:
@@ -72,6 +80,8 @@ def get_user(user_id):
 
 def get_session_id():
     """Extract session_id from the JWT token."""
+    if g.get("auth_checked"):
+        return g.session_id
     auth_header = request.headers.get("Authorization")
     if not auth_header or "Bearer " not in auth_header:
         return None
@@ -140,15 +150,8 @@ def clean_session_cache():
 
 def create_chain(user_id):
     """Creates a conversation chain dynamically with user-specific prompt and RAG retrieval."""
-    brain_collection = aira_brain()
-    try:
-        # Only try converting if it's a real ObjectId
-        user_doc = brain_collection.find_one({"user_id": ObjectId(user_id)})
-    except (InvalidId, TypeError):
-        # If it's a WhatsApp number or any other string ID
-        user_doc = brain_collection.find_one({"user_id": user_id})
+    latest_assessment = get_latest_assessment(user_id)
 
-    # print(f"User doc: {user_doc}")
     # Default fallback values
     name = "User"
     last_msg_time = "Unknown"
@@ -156,8 +159,7 @@ def create_chain(user_id):
     user_memory = "No memory available yet."
 
     # Extract user details if they exist
-    if user_doc and user_doc.get("assessments"):
-        latest_assessment = user_doc["assessments"][-1]
+    if latest_assessment:
         demographics = latest_assessment.get("demographics", {})
         assessment_info = latest_assessment.get("assessment", {})
         timestamp = latest_assessment.get("timestamp")
@@ -250,15 +252,15 @@ def create_chain(user_id):
     def get_model():
         global model
         if model is None:
-            logger.info("Initializing Groq LLM model")
-            model = ChatGroq(groq_api_key=GROQ_API_KEY, model_name="llama-3.1-8b-instant")
+            logger.info("Initializing chat model")
+            model = get_chat_model(CHAT_MODEL)
         return model
 
     def get_embedding_model():
         global embedding_model
         if embedding_model is None:
             logger.info("Initializing embedding model")
-            embedding_model = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+            embedding_model = TimedEmbeddings(get_embeddings())
         return embedding_model
 
     def get_retriever():
@@ -274,12 +276,16 @@ def create_chain(user_id):
             retriever = vector_store.as_retriever(search_type="similarity", search_kwargs={"k": 2})
         return retriever
 
+    def retrieve(query):
+        with span("faiss.retrieve", index="therapist_replies"), retrieval_seconds.time(index="therapist_replies"):
+            return get_retriever().invoke(query)
+
     def format_retrieved(docs):
         return " ".join([doc.page_content.replace("\n", " ") for doc in docs if hasattr(doc, "page_content")])
 
     return RunnableWithMessageHistory(
         RunnableMap({
-            "context": lambda x: format_retrieved(get_retriever().invoke(x["input"])),
+            "context": lambda x: format_retrieved(retrieve(x["input"])),
             "input": lambda x: x["input"],
             "chat_history": lambda x: x["chat_history"],
         })
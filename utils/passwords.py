@@ -0,0 +1,72 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+from config import PASSWORD_HASH_METHOD, PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE, PASSWORD_HASH_TIMEOUT
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing pool is saturated; callers should answer 503."""
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(max(1, PASSWORD_HASH_QUEUE))
+_method_prefix = None
+
+def _pool():
+    """One process pool per worker process, created lazily (and again after a fork)."""
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                _executor = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+                _executor_pid = os.getpid()
+    return _executor
+
+def _run(fn, *args):
+    """Run a KDF call off the request thread, bounding how many may wait at once."""
+    if PASSWORD_HASH_WORKERS <= 0:
+        return fn(*args)
+    # Don't wait for a slot: a full queue means excess logins get their 503 at once
+    if not _slots.acquire(blocking=False):
+        raise PasswordHasherBusy("Password hashing queue is full")
+    try:
+        future = _pool().submit(fn, *args)
+    except Exception:
+        _slots.release()
+        raise
+    # Held until the job leaves the pool, not until this caller stops waiting for it
+    future.add_done_callback(lambda _: _slots.release())
+    try:
+        return future.result(timeout=PASSWORD_HASH_TIMEOUT)
+    except TimeoutError:
+        raise PasswordHasherBusy("Password hashing timed out")
+
+def hash_password(password):
+    return _run(generate_password_hash, password, PASSWORD_HASH_METHOD)
+
+def verify_password(password_hash, password):
+    return _run(check_password_hash, password_hash, password)
+
+def expand_method(method):
+    """The method string werkzeug stores for `method`, with its defaults filled in (no hashing)."""
+    name, *args = method.split(":")
+    if name == "scrypt":
+        n, r, p = args or (2 ** 15, 8, 1)
+        return f"scrypt:{int(n)}:{int(r)}:{int(p)}"
+    if name == "pbkdf2":
+        hash_name = args[0] if args else "sha256"
+        iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    raise ValueError(f"Invalid hash method '{method}'.")
+
+def current_method_prefix():
+    """Fully-expanded method string for the configured algorithm, e.g. 'scrypt:32768:8:1'."""
+    global _method_prefix
+    if _method_prefix is None:
+        _method_prefix = expand_method(PASSWORD_HASH_METHOD)
+    return _method_prefix
+
+def needs_rehash(password_hash):
+    """True when a stored hash was made with a different algorithm or cost than configured."""
+    return password_hash.split("$", 1)[0] != current_method_prefix()
@@ -0,0 +1,123 @@
+"""
+Opt-in cProfile of a single request, meant for staging.
+
+With PROFILING_ENABLED=1 and ADMIN_SECRET set, a request carrying `X-Profile: 1`
+and an `Admin-Secret` header matching ADMIN_SECRET is run under cProfile. The
+response gets X-Profile-Id plus wall/CPU time headers, and the profile is
+written to PROFILE_DIR as <id>.prof (pstats, for snakeviz etc.) and <id>.txt
+(top functions by cumulative time). routes/admin.py serves both for download
+behind the same secret. Only one request is profiled at a time per process; others pass
+through with `X-Profile: busy`. cProfile sees the request thread only, so work
+handed to thread pools shows up as waiting.
+"""
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+from flask import g, request
+from config import ADMIN_SECRET, PROFILING_ENABLED, PROFILE_DIR, PROFILE_KEEP
+
+_lock = threading.Lock()
+PROFILE_ID = re.compile(r"^[0-9]{8}T[0-9]{6}-[a-z0-9_.]+-[0-9a-f]{8}$")
+
+def is_admin_request():
+    """True when the Admin-Secret header matches ADMIN_SECRET; always False while it is unset."""
+    if not ADMIN_SECRET:
+        return False
+    secret = request.headers.get("Admin-Secret") or ""
+    return hmac.compare_digest(secret.encode(), ADMIN_SECRET.encode())
+
+def profile_path(profile_id, extension):
+    return os.path.join(PROFILE_DIR, f"{profile_id}.{extension}")
+
+def list_profiles():
+    """Stored profile ids, newest first."""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    ids = [name[:-5] for name in os.listdir(PROFILE_DIR) if name.endswith(".prof")]
+    return sorted(ids, reverse=True)
+
+def _prune():
+    for profile_id in list_profiles()[PROFILE_KEEP:]:
+        for extension in ("prof", "txt"):
+            try:
+                os.remove(profile_path(profile_id, extension))
+            except FileNotFoundError:
+                pass
+
+def _start_profile():
+    if request.headers.get("X-Profile") != "1" or not is_admin_request():
+        return
+    if not _lock.acquire(blocking=False):
+        g.profile_busy = True
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is already attached to this interpreter
+        _lock.release()
+        g.profile_busy = True
+        return
+    g.profile = (profiler, time.perf_counter(), time.thread_time())
+
+def _stop_profile():
+    """Disable the active profiler; returns (profiler, wall_seconds, cpu_seconds) or None."""
+    active = g.pop("profile", None)
+    if active is None:
+        return None
+    profiler, wall_started, cpu_started = active
+    profiler.disable()
+    _lock.release()
+    return profiler, time.perf_counter() - wall_started, time.thread_time() - cpu_started
+
+def _save(profiler, wall, cpu):
+    endpoint = re.sub(r"[^a-z0-9_.]", "_", (request.endpoint or "unmatched").lower())
+    profile_id = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{endpoint}-{uuid.uuid4().hex[:8]}"
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    profiler.dump_stats(profile_path(profile_id, "prof"))
+
+    summary = io.StringIO()
+    summary.write(f"{request.method} {request.path}\nwall {wall * 1000:.1f} ms, cpu {cpu * 1000:.1f} ms\n\n")
+    pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(40)
+    with open(profile_path(profile_id, "txt"), "w", encoding="utf-8") as f:
+        f.write(summary.getvalue())
+    _prune()
+    return profile_id
+
+def _finish_profile(response):
+    if g.pop("profile_busy", False):
+        response.headers["X-Profile"] = "busy"
+        return response
+    stopped = _stop_profile()
+    if stopped is None:
+        return response
+    profiler, wall, cpu = stopped
+    try:
+        response.headers["X-Profile-Id"] = _save(profiler, wall, cpu)
+    except OSError as e:
+        print(f"⚠️ Could not store profile: {e}")
+    response.headers["X-Profile-Wall-Ms"] = f"{wall * 1000:.1f}"
+    response.headers["X-Profile-CPU-Ms"] = f"{cpu * 1000:.1f}"
+    return response
+
+def _abandon_profile(exc):
+    # after_request is skipped when the view raises past the error handlers
+    _stop_profile()
+
+def init_profiler(app):
+    if not PROFILING_ENABLED:
+        return
+    if not ADMIN_SECRET:
+        print("⚠️ PROFILING_ENABLED is set but ADMIN_SECRET is not; request profiling stays off")
+        return
+    # Registered first so the profile covers the other before_request hooks too
+    app.before_request_funcs.setdefault(None, []).insert(0, _start_profile)
+    app.after_request(_finish_profile)
+    app.teardown_request(_abandon_profile)
@@ -0,0 +1,232 @@
+"""
+Model providers, selected by config.
+
+Chat models and embeddings are built by the provider named in LLM_PROVIDER /
+EMBEDDING_PROVIDER instead of being constructed inline:
+
+    groq / huggingface  - the real services (default)
+    record              - calls LLM_RECORD_UPSTREAM and stores every prompt,
+                          response, token usage and latency in LLM_RECORDINGS_PATH
+    replay              - serves responses from LLM_RECORDINGS_PATH, sleeping the
+                          recorded latency divided by LLM_REPLAY_SPEED (2 = twice
+                          as fast, 0 = no sleep)
+
+A replay miss raises LookupError, or calls the upstream provider when
+LLM_REPLAY_ON_MISS=upstream. Models are built once per (provider, model) and
+carry the LLM metrics callback regardless of the provider.
+"""
+import threading
+import time
+from typing import Any
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from config import (
+    GROQ_API_KEY, LLM_PROVIDER, EMBEDDING_PROVIDER, LLM_RECORD_UPSTREAM,
+    LLM_REPLAY_SPEED, LLM_REPLAY_ON_MISS
+)
+from utils import llm_recordings
+from utils.llm_metrics import LLMMetricsCallback
+from utils.metrics import current_llm_site
+
+CHAT_MODEL = "llama-3.1-8b-instant"
+LARGE_CHAT_MODEL = "llama-3.3-70b-versatile"
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+CHAT_PROVIDERS = {}
+EMBEDDING_PROVIDERS = {}
+
+def register_chat_provider(name):
+    """Decorator registering `build(model_name, callbacks) -> BaseChatModel` under an LLM_PROVIDER name."""
+    def decorator(build):
+        CHAT_PROVIDERS[name] = build
+        return build
+    return decorator
+
+def register_embedding_provider(name):
+    """Decorator registering `build(model_name) -> Embeddings` under an EMBEDDING_PROVIDER name."""
+    def decorator(build):
+        EMBEDDING_PROVIDERS[name] = build
+        return build
+    return decorator
+
+_selected = {"chat": LLM_PROVIDER, "embeddings": EMBEDDING_PROVIDER}
+_instances = {}
+_lock = threading.Lock()
+
+def use_providers(chat=None, embeddings=None):
+    """Switch providers at runtime (benchmarks, scripts); drops already built models."""
+    with _lock:
+        if chat:
+            _selected["chat"] = chat
+        if embeddings:
+            _selected["embeddings"] = embeddings
+        _instances.clear()
+
+def selected_providers():
+    return dict(_selected)
+
+def _lookup(registry, kind):
+    name = _selected[kind]
+    if name not in registry:
+        raise ValueError(f"Unknown {kind} provider '{name}'; registered: {', '.join(sorted(registry))}")
+    return name, registry[name]
+
+def get_chat_model(model_name=CHAT_MODEL):
+    """The chat model for `model_name` from the selected provider, built once."""
+    name, build = _lookup(CHAT_PROVIDERS, "chat")
+    key = ("chat", name, model_name)
+    with _lock:
+        if key not in _instances:
+            print(f"🧠 Initializing {model_name} via {name} provider")
+            _instances[key] = build(model_name, [LLMMetricsCallback(model_name)])
+        return _instances[key]
+
+def get_embeddings(model_name=EMBEDDING_MODEL):
+    """The embedding model for `model_name` from the selected provider, built once."""
+    name, build = _lookup(EMBEDDING_PROVIDERS, "embeddings")
+    key = ("embeddings", name, model_name)
+    with _lock:
+        if key not in _instances:
+            print(f"🧠 Initializing {model_name} embeddings via {name} provider")
+            _instances[key] = build(model_name)
+        return _instances[key]
+
+def loaded_models():
+    """[(kind, provider, model_name)] for everything built so far."""
+    with _lock:
+        return list(_instances)
+
+# --- groq / huggingface --------------------------------------------------------
+
+@register_chat_provider("groq")
+def build_groq(model_name, callbacks):
+    from langchain_groq import ChatGroq
+    return ChatGroq(groq_api_key=GROQ_API_KEY, model_name=model_name, callbacks=callbacks)
+
+@register_embedding_provider("huggingface")
+def build_huggingface(model_name):
+    from langchain_huggingface import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=model_name)
+
+# --- record / replay -----------------------------------------------------------
+
+def _usage(result):
+    usage = (result.llm_output or {}).get("token_usage") or {}
+    if not usage:
+        return None
+    return {"prompt_tokens": usage.get("prompt_tokens"), "completion_tokens": usage.get("completion_tokens")}
+
+def _options(stop, kwargs):
+    """The call options that change the response (e.g. response_format from bind())."""
+    options = dict(kwargs)
+    if stop:
+        options["stop"] = stop
+    return options
+
+class RecordingChatModel(BaseChatModel):
+    """Calls `upstream` and stores the prompt, response, usage and latency."""
+
+    upstream: Any
+    model_name: str
+
+    @property
+    def _llm_type(self):
+        return "recording"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        started = time.perf_counter()
+        result = self.upstream._generate(messages, stop=stop, **kwargs)
+        latency_ms = (time.perf_counter() - started) * 1000
+        try:
+            llm_recordings.record_chat(
+                self.model_name, current_llm_site(), llm_recordings.serialize_messages(messages),
+                _options(stop, kwargs), result.generations[0].message.content, _usage(result), latency_ms
+            )
+        except Exception as e:
+            print(f"⚠️ Failed to record {self.model_name} call: {e}")
+        return result
+
+class ReplayChatModel(BaseChatModel):
+    """Answers from recordings, sleeping the recorded latency divided by `speed`."""
+
+    model_name: str
+    speed: float = 1.0
+    upstream: Any = None
+
+    @property
+    def _llm_type(self):
+        return "replay"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        site = current_llm_site()
+        found = llm_recordings.find_chat(
+            self.model_name, site, llm_recordings.serialize_messages(messages), _options(stop, kwargs)
+        )
+        if found is None:
+            if self.upstream is not None:
+                return self.upstream._generate(messages, stop=stop, **kwargs)
+            raise LookupError(f"No recording for {self.model_name} at site '{site}'")
+        response, usage, latency_ms, _ = found
+        if self.speed:
+            time.sleep(latency_ms / self.speed / 1000)
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=response))],
+            llm_output={"token_usage": usage or {}, "model_name": self.model_name}
+        )
+
+@register_chat_provider("record")
+def build_recording(model_name, callbacks):
+    upstream = CHAT_PROVIDERS[LLM_RECORD_UPSTREAM](model_name, [])
+    return RecordingChatModel(upstream=upstream, model_name=model_name, callbacks=callbacks)
+
+@register_chat_provider("replay")
+def build_replay(model_name, callbacks):
+    upstream = CHAT_PROVIDERS[LLM_RECORD_UPSTREAM](model_name, []) if LLM_REPLAY_ON_MISS == "upstream" else None
+    return ReplayChatModel(model_name=model_name, speed=LLM_REPLAY_SPEED, upstream=upstream, callbacks=callbacks)
+
+class RecordingEmbeddings(Embeddings):
+    def __init__(self, upstream, model_name):
+        self.upstream = upstream
+        self.model_name = model_name
+
+    def embed_documents(self, texts):
+        started = time.perf_counter()
+        vectors = self.upstream.embed_documents(texts)
+        latency_ms = (time.perf_counter() - started) * 1000 / max(len(texts), 1)
+        for text, vector in zip(texts, vectors):
+            llm_recordings.record_embedding(self.model_name, text, vector, latency_ms)
+        return vectors
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+class ReplayEmbeddings(Embeddings):
+    def __init__(self, model_name, speed=1.0, upstream=None):
+        self.model_name = model_name
+        self.speed = speed
+        self.upstream = upstream
+
+    def embed_query(self, text):
+        found = llm_recordings.find_embedding(self.model_name, text)
+        if found is None:
+            if self.upstream is not None:
+                return self.upstream.embed_query(text)
+            raise LookupError(f"No recorded {self.model_name} embedding for this text")
+        vector, latency_ms = found
+        if self.speed:
+            time.sleep(latency_ms / self.speed / 1000)
+        return vector
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+@register_embedding_provider("record")
+def build_recording_embeddings(model_name):
+    return RecordingEmbeddings(EMBEDDING_PROVIDERS["huggingface"](model_name), model_name)
+
+@register_embedding_provider("replay")
+def build_replay_embeddings(model_name):
+    upstream = EMBEDDING_PROVIDERS["huggingface"](model_name) if LLM_REPLAY_ON_MISS == "upstream" else None
+    return ReplayEmbeddings(model_name, LLM_REPLAY_SPEED, upstream)
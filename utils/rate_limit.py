@@ -0,0 +1,34 @@
+import threading
+import time
+from config import LLM_RATE_LIMIT_PER_MIN
+
+class TokenBucket:
+    """Blocking token bucket; a rate of 0 disables limiting."""
+
+    def __init__(self, rate_per_min, burst=None):
+        self.lock = threading.Lock()
+        self.set_rate(rate_per_min, burst)
+
+    def set_rate(self, rate_per_min, burst=None):
+        with self.lock:
+            self.rate = rate_per_min / 60.0
+            self.capacity = burst or max(1, rate_per_min // 10)
+            self.tokens = float(self.capacity)
+            self.updated = time.monotonic()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+# Shared by every non-conversational LLM call in this process
+llm_rate_limiter = TokenBucket(LLM_RATE_LIMIT_PER_MIN)
@@ -0,0 +1,236 @@
+import json
+import logging
+import re
+import threading
+from collections import defaultdict
+from utils.rate_limit import llm_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+_stats_lock = threading.Lock()
+_parse_stats = defaultdict(lambda: defaultdict(int))
+
+def record_parse_outcome(site, outcome):
+    """Count a structured-output outcome (ok, repaired, reasked, failed, error) per call site."""
+    with _stats_lock:
+        _parse_stats[site]["attempts"] += 1
+        _parse_stats[site][outcome] += 1
+
+def get_parse_stats():
+    """Return per-site parse counters with a success rate."""
+    with _stats_lock:
+        stats = {site: dict(counts) for site, counts in _parse_stats.items()}
+    for counts in stats.values():
+        succeeded = counts.get("ok", 0) + counts.get("repaired", 0) + counts.get("reasked", 0)
+        counts["success_rate"] = round(succeeded / counts["attempts"], 4) if counts.get("attempts") else None
+    return stats
+
+class JSONStreamParser:
+    """
+    Incrementally tracks the first top-level JSON object in streamed model output.
+
+    Text before the opening brace is ignored and `complete` flips as soon as the
+    object closes, so callers can stop streaming instead of waiting for trailing chatter.
+    """
+
+    def __init__(self):
+        self.buffer = []
+        self.stack = []
+        self.started = False
+        self.complete = False
+        self.in_string = False
+        self.escape = False
+
+    def feed(self, chunk):
+        for char in chunk or "":
+            if self.complete:
+                return
+            if not self.started:
+                if char != "{":
+                    continue
+                self.started = True
+            self.buffer.append(char)
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in "{[":
+                self.stack.append("}" if char == "{" else "]")
+            elif char in "}]":
+                if self.stack:
+                    self.stack.pop()
+                if not self.stack:
+                    self.complete = True
+
+    @property
+    def text(self):
+        return "".join(self.buffer)
+
+    def close(self):
+        """Text of the object so far, with unterminated strings and brackets closed."""
+        text = self.text
+        if self.complete or not self.started:
+            return text
+        if self.in_string:
+            text += '"'
+        text = _strip_dangling(text, self.stack)
+        return text + "".join(reversed(self.stack))
+
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_DANGLING_KEY = re.compile(r'(,|\{)\s*"(?:[^"\\]|\\.)*"\s*$')
+_CODE_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$", re.IGNORECASE)
+
+def _strip_dangling(text, closers):
+    """Drop a trailing comma, or an object key with no value, left behind by truncation."""
+    text = text.rstrip()
+    while text.endswith(","):
+        text = text[:-1].rstrip()
+    if closers and closers[-1] == "}":
+        if text.endswith(":"):
+            text = text[:-1].rstrip()
+        match = _DANGLING_KEY.search(text)
+        if match:
+            text = text[:match.start()] + ("{" if match.group(1) == "{" else "")
+    return text
+
+def repair_json(text):
+    """Locally repair common model mistakes: code fences, trailing commas, truncated arrays/objects."""
+    text = _CODE_FENCE.sub("", text.strip())
+    parser = JSONStreamParser()
+    parser.feed(text)
+    if not parser.started:
+        return None
+    repaired = parser.close()
+    return _TRAILING_COMMA.sub(r"\1", repaired)
+
+def iter_json_candidates(text):
+    """Yield each balanced top-level `{...}` block in the text, in order."""
+    index = text.find("{")
+    while index != -1:
+        parser = JSONStreamParser()
+        parser.feed(text[index:])
+        if parser.complete:
+            yield parser.text
+            index = text.find("{", index + len(parser.text))
+        else:
+            index = text.find("{", index + 1)
+
+def parse_json_output(text, required_keys=()):
+    """
+    Parse a JSON object from model output.
+
+    Returns (data, status) where status is "ok", "repaired" or "failed".
+    """
+    if not text:
+        return None, "failed"
+
+    def valid(data):
+        return isinstance(data, dict) and all(k in data for k in required_keys)
+
+    for candidate in iter_json_candidates(text):
+        try:
+            data = json.loads(candidate)
+            if valid(data):
+                return data, "ok"
+        except json.JSONDecodeError:
+            try:
+                data = json.loads(_TRAILING_COMMA.sub(r"\1", candidate))
+                if valid(data):
+                    return data, "repaired"
+            except json.JSONDecodeError:
+                continue
+
+    repaired = repair_json(text)
+    if repaired:
+        try:
+            data = json.loads(repaired)
+            if valid(data):
+                return data, "repaired"
+        except json.JSONDecodeError:
+            pass
+    return None, "failed"
+
+def json_mode(model):
+    """Bind the provider's JSON response mode when the model supports it."""
+    try:
+        return model.bind(response_format={"type": "json_object"})
+    except Exception:
+        return model
+
+def _stream_text(model, prompt):
+    """Stream the response and stop as soon as the first JSON object closes."""
+    parser = JSONStreamParser()
+    chunks = []
+    for chunk in model.stream(prompt):
+        content = getattr(chunk, "content", chunk)
+        if not isinstance(content, str):
+            continue
+        chunks.append(content)
+        parser.feed(content)
+        if parser.complete:
+            break
+    return "".join(chunks)
+
+def json_mode_rejected(error):
+    """
+    True when a JSON-mode call failed because the provider or model refused
+    response_format (a 400/422 bad request, or a local argument error), as opposed
+    to a transport failure, timeout or rate limit that plain text would hit too.
+    """
+    if isinstance(error, (TypeError, ValueError, NotImplementedError)):
+        return True
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status in (400, 422) or type(error).__name__ == "BadRequestError"
+
+def _complete(model, prompt, use_json_mode):
+    # One token per model request: JSON mode, the plain-text fallback and re-asks each count
+    llm_rate_limiter.acquire()
+    if use_json_mode:
+        # JSON mode returns a single well-formed object, so there is nothing to cut short
+        result = json_mode(model).invoke(prompt)
+        return getattr(result, "content", str(result))
+    return _stream_text(model, prompt)
+
+def invoke_json(model, prompt, required_keys=(), site="default", max_reasks=1):
+    """
+    Ask the model for a JSON object and return it as a dict (or None).
+
+    Uses the provider's JSON mode where available (otherwise a streaming parser),
+    repairs the output locally, and only re-asks the model when the reply is still unusable.
+    """
+    use_json_mode = True
+    messages = prompt
+    for attempt in range(max_reasks + 1):
+        try:
+            text = _complete(model, messages, use_json_mode)
+        except Exception as e:
+            if not use_json_mode or not json_mode_rejected(e):
+                record_parse_outcome(site, "error")
+                raise
+            # Some providers reject response_format for a model; fall back to plain text
+            logger.warning(f"JSON mode unavailable for {site}: {e}")
+            use_json_mode = False
+            try:
+                text = _complete(model, messages, use_json_mode)
+            except Exception:
+                record_parse_outcome(site, "error")
+                raise
+
+        data, status = parse_json_output(text, required_keys)
+        if data is not None:
+            record_parse_outcome(site, "reasked" if attempt else status)
+            return data
+
+        logger.warning(f"Unparseable JSON from model at {site} (attempt {attempt + 1})")
+        messages = (
+            f"{prompt}\n\nYour previous reply was not a valid JSON object with the keys "
+            f"{', '.join(required_keys)}. Reply again with only the JSON object."
+        )
+
+    record_parse_outcome(site, "failed")
+    return None
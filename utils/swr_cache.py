@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+class StaleWhileRevalidateCache:
+    """
+    In-process cache that serves a stale value immediately and refreshes it in the
+    background. Only a missing key is computed in the caller's thread, and only in
+    one of them: concurrent misses on the same key wait for that computation. At
+    most one refresh per key runs at a time.
+    """
+
+    def __init__(self, fresh_seconds, max_entries=10000, refresh_workers=2):
+        self.fresh_seconds = fresh_seconds
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.refreshing = set()
+        self.loading = {}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="swr-refresh")
+
+    def get(self, key, compute):
+        """Returns (value, state) where state is "fresh", "stale" or "miss"."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            else:
+                loading = self.loading.get(key)
+                leader = loading is None
+                if leader:
+                    loading = self.loading[key] = Future()
+        if entry is None:
+            if not leader:
+                return loading.result(), "miss"
+            try:
+                value = compute()
+                self.set(key, value)
+                loading.set_result(value)
+            except Exception as e:
+                loading.set_exception(e)
+                raise
+            finally:
+                with self.lock:
+                    self.loading.pop(key, None)
+            return value, "miss"
+
+        value, stored_at = entry
+        if time.time() - stored_at < self.fresh_seconds:
+            return value, "fresh"
+        self._refresh(key, compute)
+        return value, "stale"
+
+    def set(self, key, value):
+        if value is None:
+            return
+        with self.lock:
+            self.entries[key] = (value, time.time())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def _refresh(self, key, compute):
+        with self.lock:
+            if key in self.refreshing:
+                return
+            self.refreshing.add(key)
+
+        def run():
+            try:
+                self.set(key, compute())
+            except Exception as e:
+                print(f"⚠️ Background refresh failed for {key}: {e}")
+            finally:
+                with self.lock:
+                    self.refreshing.discard(key)
+
+        self.executor.submit(run)
+
+    def __len__(self):
+        return len(self.entries)
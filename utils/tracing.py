@@ -0,0 +1,225 @@
+"""
+Lightweight request tracing with W3C trace context.
+
+Spans carry OpenTelemetry-compatible ids (32-hex trace id, 16-hex span id) and
+are exported as one JSON object per line, so a file can be loaded into any
+OTLP/Jaeger tooling or just grepped by trace_id. The current span lives in a
+ContextVar: nested `span()` blocks become children, `bind_context()` carries
+the trace into thread pools, and `traceparent_headers()` / the Flask hook carry
+it across the scheduler's HTTP calls.
+
+Enabled with TRACING_ENABLED=1. TRACE_SAMPLE_RATE (0..1) is decided once per
+trace at the root; unsampled traces still propagate ids but export nothing.
+"""
+import json
+import os
+import random
+import threading
+import time
+from contextvars import ContextVar, copy_context
+from functools import wraps
+from config import TRACING_ENABLED, TRACE_SAMPLE_RATE, TRACE_EXPORTER, TRACE_FILE
+
+_current = ContextVar("current_span", default=None)
+
+EXPORTERS = {}
+
+def register_exporter(name):
+    """Decorator registering `export(span_dict)` under a TRACE_EXPORTER name."""
+    def decorator(export):
+        EXPORTERS[name] = export
+        return export
+    return decorator
+
+_file_lock = threading.Lock()
+
+@register_exporter("file")
+def export_to_file(record):
+    line = json.dumps(record, default=str)
+    with _file_lock:
+        directory = os.path.dirname(TRACE_FILE)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(TRACE_FILE, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+@register_exporter("console")
+def export_to_console(record):
+    print(f"🧵 {record['name']} {record['duration_ms']}ms trace={record['trace_id']} span={record['span_id']}")
+
+def _export(span):
+    export = EXPORTERS.get(TRACE_EXPORTER)
+    if export is None:
+        return
+    try:
+        export(span.to_dict())
+    except Exception as e:
+        print(f"⚠️ Trace export failed: {e}")
+
+def _new_id(hex_chars):
+    return f"{random.getrandbits(hex_chars * 4):0{hex_chars}x}"
+
+class Span:
+    def __init__(self, name, trace_id, parent_id, sampled, attributes=None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_id(16)
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes = dict(attributes or {})
+        self.status = "ok"
+        self.start_ns = None
+        self.end_ns = None
+        self._token = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    @property
+    def traceparent(self):
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def __enter__(self):
+        self.start_ns = time.time_ns()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.time_ns()
+        if exc is not None:
+            self.status = "error"
+            self.attributes["error"] = f"{exc_type.__name__}: {exc}"
+        try:
+            _current.reset(self._token)
+        except ValueError:
+            # Exited from another context (e.g. a teardown hook); just clear it
+            _current.set(None)
+        if self.sampled:
+            _export(self)
+        return False
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "status": self.status,
+            "attributes": self.attributes
+        }
+
+class _NoopSpan:
+    traceparent = None
+
+    def set_attribute(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+NOOP_SPAN = _NoopSpan()
+
+def parse_traceparent(header):
+    """(trace_id, parent_span_id, sampled) from a traceparent header, or None if malformed."""
+    parts = (header or "").strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16), int(parts[3], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return parts[1], parts[2], int(parts[3], 16) & 1 == 1
+
+def span(name, traceparent=None, **attributes):
+    """
+    A span to use as a context manager. Children of the current span inherit its
+    trace and sampling decision; `traceparent` continues a remote trace instead.
+    """
+    if not TRACING_ENABLED:
+        return NOOP_SPAN
+    remote = parse_traceparent(traceparent) if traceparent else None
+    parent = _current.get()
+    if remote:
+        trace_id, parent_id, sampled = remote
+    elif parent is not None:
+        trace_id, parent_id, sampled = parent.trace_id, parent.span_id, parent.sampled
+    else:
+        trace_id, parent_id, sampled = _new_id(32), None, random.random() < TRACE_SAMPLE_RATE
+    return Span(name, trace_id, parent_id, sampled, attributes)
+
+def record_span(name, duration_seconds, status="ok", **attributes):
+    """Export an already-finished child of the current span (e.g. from a driver callback)."""
+    parent = _current.get()
+    if parent is None or not parent.sampled:
+        return
+    finished = Span(name, parent.trace_id, parent.span_id, True, attributes)
+    finished.end_ns = time.time_ns()
+    finished.start_ns = finished.end_ns - int(duration_seconds * 1e9)
+    finished.status = status
+    _export(finished)
+
+def current_span():
+    return _current.get()
+
+def traced(name):
+    """Decorator running the function inside a span."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def bind_context(fn):
+    """Wrap `fn` to run in a copy of the caller's context, so pool threads join the current trace."""
+    context = copy_context()
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        # A Context can only be entered by one thread at a time; map() runs many
+        return context.copy().run(fn, *args, **kwargs)
+    return wrapper
+
+def traceparent_headers():
+    """{"traceparent": ...} for outgoing requests made inside a span, else {}."""
+    current = _current.get()
+    return {"traceparent": current.traceparent} if current is not None else {}
+
+# --- Flask -----------------------------------------------------------------------
+
+def _start_request_span():
+    from flask import g, request
+    g.trace_span = span(
+        f"{request.method} {request.endpoint or 'unmatched'}",
+        traceparent=request.headers.get("traceparent"),
+        http_method=request.method,
+        http_route=request.url_rule.rule if request.url_rule else None
+    ).__enter__()
+
+def _tag_response(response):
+    from flask import g
+    request_span = g.get("trace_span")
+    if request_span is not None and request_span.traceparent:
+        request_span.set_attribute("http_status", response.status_code)
+        response.headers["traceparent"] = request_span.traceparent
+    return response
+
+def _end_request_span(exc):
+    from flask import g
+    request_span = g.pop("trace_span", None)
+    if request_span is not None:
+        request_span.__exit__(type(exc) if exc else None, exc, None)
+
+def init_tracing(app):
+    app.before_request(_start_request_span)
+    app.after_request(_tag_response)
+    app.teardown_request(_end_request_span)
@@ -0,0 +1,151 @@
+"""
+Anonymized request capture for replaying real traffic shape (benchmarks/replay_traffic.py).
+
+With TRAFFIC_CAPTURE_ENABLED=1 every request (sampled by
+TRAFFIC_CAPTURE_SAMPLE_RATE) appends one NDJSON line to a per-process file next
+to TRAFFIC_CAPTURE_FILE (cache/traffic.ndjson -> cache/traffic.<pid>.ndjson),
+so workers never interleave partial lines:
+
+    {"ts": 1760854800.123, "gap_ms": 41.2, "pid": 311, "method": "POST",
+     "route": "/api/chat/send", "endpoint": "chat.chat", "status": 200,
+     "duration_ms": 812.4, "request_bytes": 48, "response_bytes": 377,
+     "query": {"days": "30", "user_id": null}, "body": {"message": "str"},
+     "user_bucket": 417, "system": false}
+
+Nothing identifying is kept: the route is the URL rule template, bodies are
+reduced to top-level field names and types, query values survive only when
+they are short numbers, and users become a keyed-hash bucket. Lines are
+written by a background thread so the request path only enqueues. /metrics and
+static files are not captured and don't count towards gap_ms.
+"""
+import hashlib
+import hmac
+import json
+import os
+import queue
+import random
+import threading
+import time
+from flask import request, g
+from config import (
+    TRAFFIC_CAPTURE_FILE, TRAFFIC_CAPTURE_SAMPLE_RATE, TRAFFIC_CAPTURE_BUCKETS, JWT_SECRET_KEY, SYSTEM_SECRET
+)
+
+SKIPPED_ENDPOINTS = {"metrics", "static"}
+# The only route the scheduler calls with System-Secret (routes/chat.py end_journal)
+SCHEDULER_ENDPOINTS = {"chat.end_journal"}
+
+def is_scheduler_request():
+    """A scheduler call: the endpoint it uses and a System-Secret that actually matches."""
+    if request.endpoint not in SCHEDULER_ENDPOINTS:
+        return False
+    secret = request.headers.get("System-Secret") or ""
+    return hmac.compare_digest(secret.encode(), SYSTEM_SECRET.encode())
+
+def user_bucket(user_id):
+    """Stable bucket in [0, TRAFFIC_CAPTURE_BUCKETS) for a user; the id itself is never written."""
+    if not user_id:
+        return None
+    digest = hmac.new(JWT_SECRET_KEY.encode(), str(user_id).encode(), hashlib.sha256).hexdigest()
+    return int(digest[:12], 16) % TRAFFIC_CAPTURE_BUCKETS
+
+def _shape(value):
+    return type(value).__name__
+
+def body_shape(payload):
+    """Top-level field names and value types of a JSON body; values are dropped."""
+    if isinstance(payload, dict):
+        return {key: _shape(value) for key, value in payload.items()}
+    return None if payload is None else _shape(payload)
+
+def query_shape(args):
+    """Query parameter names, keeping only short numeric values (days=30, limit=20)."""
+    return {key: value if value.isdigit() and len(value) <= 6 else None for key, value in args.items()}
+
+def capture_path(path, pid):
+    """The file one worker process writes: TRAFFIC_CAPTURE_FILE with the pid before the extension."""
+    root, ext = os.path.splitext(path)
+    return f"{root}.{pid}{ext}"
+
+class TrafficWriter:
+    def __init__(self, path):
+        self.path = path
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.pid = None
+        self.last_arrival = None
+
+    def gap_ms(self, arrival):
+        """Milliseconds since the previous captured request in this worker."""
+        with self.lock:
+            previous, self.last_arrival = self.last_arrival, arrival
+        return None if previous is None else round((arrival - previous) * 1000, 2)
+
+    def write(self, record):
+        self.ensure_started()
+        self.queue.put(record)
+
+    def ensure_started(self):
+        if self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+        threading.Thread(target=self._run, name="traffic-capture", daemon=True).start()
+
+    def _run(self):
+        path = capture_path(self.path, os.getpid())
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        while True:
+            records = [self.queue.get()]
+            while not self.queue.empty() and len(records) < 500:
+                records.append(self.queue.get_nowait())
+            try:
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(record) + "\n" for record in records))
+            except Exception as e:
+                print(f"⚠️ Traffic capture write failed ({len(records)} records dropped): {e}")
+
+writer = TrafficWriter(TRAFFIC_CAPTURE_FILE)
+
+def _start_capture():
+    if request.endpoint in SKIPPED_ENDPOINTS:
+        return
+    if random.random() < TRAFFIC_CAPTURE_SAMPLE_RATE:
+        arrival = time.time()
+        g.capture_started = (arrival, writer.gap_ms(arrival), time.perf_counter())
+
+def _capture(response):
+    started = g.pop("capture_started", None)
+    if started is None:
+        return response
+    arrival, gap_ms, perf_started = started
+    system = is_scheduler_request()
+    user_id = request.headers.get("User-ID") if system else g.get("user_id")
+    try:
+        writer.write({
+            "ts": round(arrival, 3),
+            "gap_ms": gap_ms,
+            "pid": os.getpid(),
+            "method": request.method,
+            "route": request.url_rule.rule if request.url_rule else None,
+            "endpoint": request.endpoint,
+            "status": response.status_code,
+            "duration_ms": round((time.perf_counter() - perf_started) * 1000, 2),
+            "request_bytes": request.content_length or 0,
+            "response_bytes": response.content_length or 0,
+            "query": query_shape(request.args),
+            "body": body_shape(request.get_json(silent=True)) if request.is_json else None,
+            "user_bucket": user_bucket(user_id),
+            "system": system
+        })
+    except Exception as e:
+        print(f"⚠️ Traffic capture failed: {e}")
+    return response
+
+def init_traffic_capture(app):
+    app.before_request(_start_capture)
+    app.after_request(_capture)
@@ -1,7 +1,13 @@
 import jwt
+from flask import g, request, has_request_context
 from datetime import datetime, timedelta
 from config import JWT_SECRET_KEY
 from utils.model_utils import get_model
+from utils.llm_cache import cached_llm_call
+
+# Bump when a prompt below changes so cached generations are not reused
+STORY_PROMPT_VERSION = "1"
+MOTIVATION_PROMPT_VERSION = "1"
 
 def verify_jwt_token(token):
     """Decode the JWT token and return the user_id if valid."""
@@ -18,6 +24,9 @@ def verify_jwt_token(token):
 def get_user_id(auth_header):
     if not auth_header or not auth_header.startswith("Bearer "):
         return None
+    # Already decoded (and checked against revoked sessions) by the auth middleware
+    if has_request_context() and g.get("auth_checked") and auth_header == request.headers.get("Authorization"):
+        return g.user_id
     try:
         token = auth_header.split(" ")[1]
         user_id = verify_jwt_token(token)
@@ -25,21 +34,41 @@ def get_user_id(auth_header):
     except:
         return None
     
-def generate_user_story(user_data):
-    """Generates a personalized user story based on the new schema"""
+def format_goals(goals):
+    """Goals as the frontend expects them."""
+    return [
+        {
+            "id": goal.get("goal_id"),
+            "text": goal.get("data"),
+            "timestamp": goal.get("timestamp").isoformat() if goal.get("timestamp") else None,
+            "value": goal.get("value")  # Include the value field
+        }
+        for goal in goals
+    ]
+
+def story_inputs(user_data):
+    """(demographics, goal texts) - everything the story depends on."""
+    demographics = user_data.get("assessments", [{}])[0].get("demographics", {})
+    goals = [g.get("data", "") for g in user_data.get("goals", []) if g.get("data")]
+    return demographics, goals
+
+def fallback_user_story(user_data):
+    """Static welcome text shown when the story can't be generated."""
+    demographics, _ = story_inputs(user_data)
+    return f"Welcome, {demographics.get('name', 'This user')}! We're here to help you on your journey."
+
+def generate_user_story(user_data, fallback=True):
+    """Generates a personalized user story based on the new schema (None on failure when fallback=False)"""
     model = get_model()
 
-    # Extract name and personal details from assessments → demographics
-    demographics = user_data.get("assessments", [{}])[0].get("demographics", {})
+    # Extract name and personal details from assessments → demographics, plus goals
+    demographics, goals = story_inputs(user_data)
     name = demographics.get("name", "This user")
     occupation = demographics.get("occupation", "an individual")
     hobbies = demographics.get("hobbies", "unspecified interests")
     education = demographics.get("education", "")
     age = demographics.get("age", "")
 
-    # Extract goals
-    goals = [g.get("data", "") for g in user_data.get("goals", []) if g.get("data")]
-
     # Construct story context
     story_context = f"""
     You are AIRA, a thoughtful assistant. Write a short, inspiring 3-5 sentence story about the user's journey based on the data below.
@@ -55,26 +84,38 @@ def generate_user_story(user_data):
     Only output the short story. Do not include headings or explanations.
     """
 
-    try:
-        result = model.invoke(story_context)
-        return result.content.strip() if hasattr(result, 'content') else str(result).strip()
-    except Exception as e:
-        print(f"Error generating user story: {e}")
-        return f"Welcome, {name}! We're here to help you on your journey."
+    def compute():
+        try:
+            result = model.invoke(story_context)
+            return result.content.strip() if hasattr(result, 'content') else str(result).strip()
+        except Exception as e:
+            print(f"Error generating user story: {e}")
+            return None
+
+    story = cached_llm_call("user_story", STORY_PROMPT_VERSION, model, story_context, compute)
+    if story or not fallback:
+        return story
+    return fallback_user_story(user_data)
 
 from operator import itemgetter
 
-def generate_motivational_message_from_chat_history(journal_data):
+def fallback_motivation(journal_data):
+    """Static motivation shown when there is no chat history or generation fails."""
+    if not any(j.get("messages") for j in journal_data.get("journals", [])):
+        return "Wishing you a peaceful day ahead 🌼 – AIRA"
+    return "Keep going, you're doing beautifully 💪 – AIRA"
+
+def generate_motivational_message_from_chat_history(journal_data, fallback=True):
     journals = journal_data.get("journals", [])
 
     # 1. Skip empty journals
     valid_journals = [j for j in journals if j.get("messages")]
 
     if not valid_journals:
-        return "Wishing you a peaceful day ahead 🌼 – AIRA"
+        return fallback_motivation(journal_data) if fallback else None
 
-    # 2. Sort journals by date descending (latest first)
-    sorted_journals = sorted(valid_journals, key=itemgetter("date"), reverse=True)
+    # 2. Sort journals by date (oldest first, so the messages taken below are the latest)
+    sorted_journals = sorted(valid_journals, key=itemgetter("date"))
 
     # 3. Collect messages from the most recent journals
     all_messages = []
@@ -110,9 +151,16 @@ def generate_motivational_message_from_chat_history(journal_data):
     """
 
     model = get_model()
-    try:
-        result = model.invoke(prompt)
-        return result.content.strip() if hasattr(result, 'content') else str(result).strip()
-    except Exception as e:
-        print(f"Error generating motivation: {e}")
-        return "Keep going, you're doing beautifully 💪 – AIRA"
+
+    def compute():
+        try:
+            result = model.invoke(prompt)
+            return result.content.strip() if hasattr(result, 'content') else str(result).strip()
+        except Exception as e:
+            print(f"Error generating motivation: {e}")
+            return None
+
+    motivation = cached_llm_call("motivation", MOTIVATION_PROMPT_VERSION, model, chat_text, compute)
+    if motivation or not fallback:
+        return motivation
+    return fallback_motivation(journal_data)